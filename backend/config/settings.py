@@ -56,6 +56,7 @@ INSTALLED_APPS = [
     "entities",
     "payment_modes",
     "core_transaction",
+    "sync",
 ]
 
 MIDDLEWARE = [
@@ -155,6 +156,40 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Keyset pagination for the transaction feed (see core_transaction/pagination.py).
+# Clients may ask for a smaller/larger page with ?page_size=, capped at the max.
+TRANSACTION_PAGE_SIZE = int(os.getenv("TRANSACTION_PAGE_SIZE", "50"))
+TRANSACTION_MAX_PAGE_SIZE = int(os.getenv("TRANSACTION_MAX_PAGE_SIZE", "500"))
+
+# Bulk transaction import (POST /api/transactions/bulk/, manage.py import_transactions)
+TRANSACTION_IMPORT_MAX_ROWS = int(os.getenv("TRANSACTION_IMPORT_MAX_ROWS", "20000"))
+TRANSACTION_IMPORT_CHUNK_SIZE = int(os.getenv("TRANSACTION_IMPORT_CHUNK_SIZE", "1000"))
+
+# Per-user cache of GET payloads (see users/response_cache.py). In-process memory
+# by default; point it at a shared backend in production, e.g.
+#   RESPONSE_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+#   RESPONSE_CACHE_LOCATION=redis://127.0.0.1:6379/1
+# or django.core.cache.backends.filebased.FileBasedCache with a directory.
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "responses": {
+        "BACKEND": os.getenv("RESPONSE_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("RESPONSE_CACHE_LOCATION", "responses"),
+    },
+}
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", "300"))
+
+# Delta sync (GET /api/sync/): changed objects per response, ?limit= capped at the max.
+SYNC_PAGE_SIZE = int(os.getenv("SYNC_PAGE_SIZE", "500"))
+SYNC_MAX_PAGE_SIZE = int(os.getenv("SYNC_MAX_PAGE_SIZE", "2000"))
+
+# Entity search/autocomplete (GET /api/entities/search/): results per query, ?limit= capped at the max.
+ENTITY_SEARCH_LIMIT = int(os.getenv("ENTITY_SEARCH_LIMIT", "20"))
+ENTITY_SEARCH_MAX_LIMIT = int(os.getenv("ENTITY_SEARCH_MAX_LIMIT", "100"))
+
+# How long clients may reuse GET /api/payment-modes/options/ without revalidating (seconds).
+SUPPORTED_APPS_MAX_AGE = int(os.getenv("SUPPORTED_APPS_MAX_AGE", "86400"))
+
 SIMPLE_JWT = {
     "USER_ID_FIELD": "user_id",
     "USER_ID_CLAIM": "user_id",
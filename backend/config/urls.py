@@ -22,13 +22,15 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from connections.views import UserConnectionViewSet
+from connections.views import ConnectionPermissionViewSet, UserConnectionViewSet
 from users.views import UserViewSet
 from entities.views import EntityViewSet, ChatListViewSet
+from sync.views import SyncView
 
 router = DefaultRouter()
 router.register(r"users", UserViewSet, basename="users")
 router.register(r"connections", UserConnectionViewSet, basename="connections")
+router.register(r"connection-permissions", ConnectionPermissionViewSet, basename="connection-permissions")
 router.register(r"entities", EntityViewSet, basename="entities")
 router.register(r"chat-list", ChatListViewSet, basename="chat-list")
 
@@ -37,6 +39,7 @@ urlpatterns = [
     path("api/", include(router.urls)),
     path("api/payment-modes/", include("payment_modes.urls")),
     path("api/", include("core_transaction.urls")),
+    path("api/sync/", SyncView.as_view(), name="sync"),
     path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,103 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Which of two rows for the same pair (A->B and B->A) survives the backfill.
+STATUS_RANK = {"accepted": 0, "pending": 1, "rejected": 2}
+
+
+def backfill_pairs(apps, schema_editor):
+    UserConnection = apps.get_model("connections", "UserConnection")
+    keep, duplicates = {}, []
+    rows = UserConnection.objects.order_by("created_at", "pk").values_list(
+        "pk", "requester_id", "receiver_id", "status"
+    )
+    for pk, requester_id, receiver_id, status in rows.iterator(chunk_size=5000):
+        if requester_id == receiver_id:
+            duplicates.append(pk)
+            continue
+        pair = tuple(sorted((requester_id, receiver_id)))
+        best = keep.get(pair)
+        if best is None or STATUS_RANK.get(status, 3) < STATUS_RANK.get(best[1], 3):
+            if best is not None:
+                duplicates.append(best[0])
+            keep[pair] = (pk, status)
+        else:
+            duplicates.append(pk)
+    UserConnection.objects.filter(pk__in=duplicates).delete()
+
+    connections = []
+    for (low, high), (pk, _) in keep.items():
+        connections.append(UserConnection(pk=pk, low_user_id=low, high_user_id=high))
+    UserConnection.objects.bulk_update(
+        connections, ["low_user", "high_user"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("connections", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Added nullable, backfilled (dropping reverse-direction duplicates),
+        # then made required.
+        migrations.AddField(
+            model_name="userconnection",
+            name="low_user",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="userconnection",
+            name="high_user",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(backfill_pairs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="userconnection",
+            name="low_user",
+            field=models.ForeignKey(
+                editable=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="userconnection",
+            name="high_user",
+            field=models.ForeignKey(
+                editable=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="userconnection",
+            constraint=models.UniqueConstraint(
+                fields=("low_user", "high_user"), name="unique_connection_pair"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="userconnection",
+            constraint=models.CheckConstraint(
+                condition=models.Q(("low_user__lt", models.F("high_user"))),
+                name="connection_pair_ordered",
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("connections", "0002_connection_canonical_pair"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="userconnection",
+            index=models.Index(
+                fields=["requester", "status"], name="connections_request_eefc97_idx"
+            ),
+        ),
+    ]
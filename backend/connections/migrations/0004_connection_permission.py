@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("connections", "0003_connection_requester_status_index"),
+        ("entities", "0006_entity_search_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ConnectionPermission",
+            fields=[
+                (
+                    "permission_id",
+                    models.BigAutoField(primary_key=True, serialize=False),
+                ),
+                (
+                    "app_key",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        help_text="Payment type, or '' for any",
+                        max_length=50,
+                    ),
+                ),
+                ("is_allowed", models.BooleanField(default=True)),
+                ("is_auto_approve_on", models.BooleanField(default=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "default_entity",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="entities.entity",
+                    ),
+                ),
+                (
+                    "payee_user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="connection_permissions",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "payer_user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("payee_user", "payer_user", "app_key"),
+                        name="unique_connection_permission",
+                    )
+                ],
+            },
+        ),
+    ]
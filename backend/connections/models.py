@@ -1,6 +1,30 @@
 from django.db import models
 from django.conf import settings
 
+
+# Entity types that can receive a networked payment.
+RECEIVING_TYPES = ("ACCOUNT", "WALLET")
+
+
+def _pk(user):
+    return getattr(user, "pk", user)
+
+
+class UserConnectionQuerySet(models.QuerySet):
+    def involving(self, user):
+        """Connections where `user` (a User or id) is the requester or the receiver."""
+        return self.filter(models.Q(requester=_pk(user)) | models.Q(receiver=_pk(user)))
+
+    def between(self, user_a, user_b):
+        """The connection between two users (Users or ids), in either direction: one unique-index probe."""
+        low, high = sorted((_pk(user_a), _pk(user_b)))
+        return self.filter(low_user=low, high_user=high)
+
+    def are_connected(self, user_a, user_b):
+        """Whether the two users have an accepted connection."""
+        return self.between(user_a, user_b).filter(status=UserConnection.STATUS_ACCEPTED).exists()
+
+
 class UserConnection(models.Model):
     STATUS_PENDING = "pending"
     STATUS_ACCEPTED = "accepted"
@@ -19,15 +43,63 @@ class UserConnection(models.Model):
     message = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # The pair in canonical order (lower user id first), whichever side sent
+    # the request, so A->B and B->A cannot both exist. Set in save().
+    low_user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+", editable=False)
+    high_user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+", editable=False)
+
+    objects = UserConnectionQuerySet.as_manager()
 
     class Meta:
         unique_together = ("requester", "receiver")
         indexes = [
             models.Index(fields=["requester", "receiver"]),
             models.Index(fields=["receiver", "status"]),
+            models.Index(fields=["requester", "status"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["low_user", "high_user"], name="unique_connection_pair"),
+            models.CheckConstraint(condition=models.Q(low_user__lt=models.F("high_user")), name="connection_pair_ordered"),
         ]
 
     def __str__(self):
         return f"{self.requester} -> {self.receiver} ({self.status})"
-        
-    objects: models.Manager["UserConnection"]
+
+    def save(self, *args, **kwargs):
+        self.low_user_id, self.high_user_id = sorted((self.requester_id, self.receiver_id))
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"requester", "receiver"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "low_user", "high_user"}
+        super().save(*args, **kwargs)
+
+
+class ConnectionPermission(models.Model):
+    """
+    A payee's rule for payments from one connected payer ("Connection
+    Settings"), for one payment type (the mode's app key) or, with an empty
+    `app_key`, for every type without a rule of its own. See connections/rules.py.
+    """
+
+    permission_id = models.BigAutoField(primary_key=True)
+    payer_user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    payee_user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="connection_permissions"
+    )
+    app_key = models.CharField(max_length=50, blank=True, default="", help_text="Payment type, or '' for any")
+    is_allowed = models.BooleanField(default=True)
+    # Only honoured while default_entity is set (the entity may be deleted).
+    is_auto_approve_on = models.BooleanField(default=False)
+    default_entity = models.ForeignKey(
+        "entities.Entity", on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # Also the index the decision query seeks on.
+            models.UniqueConstraint(fields=["payee_user", "payer_user", "app_key"], name="unique_connection_permission"),
+        ]
+
+    def __str__(self):
+        return f"{self.payer_user} -> {self.payee_user} [{self.app_key or '*'}]"
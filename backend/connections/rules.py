@@ -0,0 +1,95 @@
+"""
+Decisions for networked payments: may `payer` pay `payee` with this payment
+type, is it auto-approved, and which of the payee's entities receives it?
+
+Only users with an accepted connection may pay each other. Between them, a
+rule for the mode's app key beats the payee's catch-all rule (app_key '');
+with no rule the payment is allowed and waits for approval. A decision is
+one query (the connection probe plus the unique (payee_user, payer_user,
+app_key) index, with the default entity joined in), memoized per request by
+RuleResolver. Decisions are not cached across requests: a revoked rule must
+take effect at once in every worker.
+"""
+
+import copy
+from dataclasses import dataclass, field
+
+from django.contrib.auth import get_user_model
+from django.db.models import Exists, FilteredRelation, Q
+
+from entities.models import Entity
+
+from .models import UserConnection
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    auto_approve: bool
+    default_entity_id: int | None
+    # The default entity as loaded with the rule; use default_entity_copy().
+    default_entity: Entity | None = field(default=None, compare=False, repr=False)
+
+    def default_entity_copy(self):
+        """A fresh copy of the default entity, since one decision may serve several payments."""
+        return copy.copy(self.default_entity)
+
+
+DEFAULT_DECISION = Decision(allowed=True, auto_approve=False, default_entity_id=None)
+DENIED_DECISION = Decision(allowed=False, auto_approve=False, default_entity_id=None)
+
+ENTITY_FIELDS = [f.attname for f in Entity._meta.concrete_fields]
+
+
+def decide(payer_id, payee_id, app_key=""):
+    """
+    The decision for a payment from user `payer_id` to user `payee_id` with a
+    mode of type `app_key` ('' for no mode): one query on the payee's user
+    row, LEFT JOINed to their matching rules (specific one first) and the
+    rule's default entity.
+    """
+    connected = UserConnection.objects.between(payer_id, payee_id).filter(status=UserConnection.STATUS_ACCEPTED)
+    row = (
+        get_user_model()
+        .objects.filter(pk=payee_id)
+        .annotate(
+            rule=FilteredRelation(
+                "connection_permissions",
+                condition=Q(
+                    connection_permissions__payer_user=payer_id,
+                    connection_permissions__app_key__in={app_key, ""},
+                ),
+            ),
+            connected=Exists(connected),
+        )
+        .order_by("-rule__app_key")
+        .values_list(
+            "connected",
+            "rule__is_allowed",
+            "rule__is_auto_approve_on",
+            *(f"rule__default_entity__{name}" for name in ENTITY_FIELDS),
+        )
+        .first()
+    )
+    if row is None or not row[0]:
+        return DENIED_DECISION
+    connected, allowed, auto_approve, *entity_values = row
+    if allowed is None:
+        return DEFAULT_DECISION
+    if entity_values[0] is None:
+        return Decision(allowed, False, None)
+    default_entity = Entity.from_db(None, ENTITY_FIELDS, entity_values)
+    return Decision(allowed, allowed and auto_approve, default_entity.pk, default_entity)
+
+
+class RuleResolver:
+    """Per-request memo of decide(), so a request asks about each (payer, payee, type) once."""
+
+    def __init__(self):
+        self._memo = {}
+
+    def decide(self, payer_id, payee_id, app_key=""):
+        key = (payer_id, payee_id, app_key)
+        if key not in self._memo:
+            self._memo[key] = decide(payer_id, payee_id, app_key)
+        return self._memo[key]
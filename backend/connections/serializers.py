@@ -1,9 +1,11 @@
 from rest_framework import serializers
 
+from entities.models import Entity
+from payment_modes.registry import get_registry
 from users.models import User
 from users.serializers import NestedUserSerializer
 
-from .models import UserConnection
+from .models import RECEIVING_TYPES, ConnectionPermission, UserConnection
 
 
 class UserConnectionSerializer(serializers.ModelSerializer):
@@ -34,3 +36,59 @@ class UserConnectionListSerializer(serializers.ModelSerializer):
         model = UserConnection
         fields = ["connection_id", "requester", "receiver", "status", "message", "created_at", "updated_at"]
         read_only_fields = fields
+
+
+class ConnectionPermissionSerializer(serializers.ModelSerializer):
+    """
+    A rule the current user (the payee) sets for payments from one connected
+    user, given by username. `app_key` is a supported app key, or '' for
+    every payment type without a rule of its own.
+    """
+
+    payer_user = serializers.SlugRelatedField(slug_field="username", queryset=User.objects.all())
+    default_entity = serializers.PrimaryKeyRelatedField(
+        queryset=Entity.objects.all(), required=False, allow_null=True
+    )
+
+    class Meta:
+        model = ConnectionPermission
+        fields = [
+            "permission_id",
+            "payer_user",
+            "app_key",
+            "is_allowed",
+            "is_auto_approve_on",
+            "default_entity",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = ["permission_id", "created_at", "updated_at"]
+
+    def validate_app_key(self, value):
+        if value and value not in get_registry():
+            raise serializers.ValidationError(f"'{value}' is not a supported app.")
+        return value
+
+    def validate_default_entity(self, value):
+        user = self.context["request"].user
+        if value is not None and (value.owner_id != user.pk or value.type not in RECEIVING_TYPES):
+            raise serializers.ValidationError("Must be one of your accounts or wallets.")
+        return value
+
+    def validate(self, attrs):
+        user = self.context["request"].user
+        payer = attrs.get("payer_user", getattr(self.instance, "payer_user", None))
+        app_key = attrs.get("app_key", getattr(self.instance, "app_key", ""))
+        default_entity = attrs.get("default_entity", getattr(self.instance, "default_entity", None))
+        auto_approve = attrs.get("is_auto_approve_on", getattr(self.instance, "is_auto_approve_on", False))
+
+        if auto_approve and default_entity is None:
+            raise serializers.ValidationError({"is_auto_approve_on": "Set a default entity before turning on auto-approve."})
+        if "payer_user" in attrs and not UserConnection.objects.are_connected(user, payer):
+            raise serializers.ValidationError({"payer_user": "You are not connected with this user."})
+        existing = ConnectionPermission.objects.filter(payee_user=user, payer_user=payer, app_key=app_key)
+        if self.instance is not None:
+            existing = existing.exclude(pk=self.instance.pk)
+        if existing.exists():
+            raise serializers.ValidationError({"app_key": "A rule for this user and payment type already exists."})
+        return attrs
@@ -95,10 +95,10 @@ class UserConnectionActionTests(TestCase):
         self.client.credentials(**self.auth_headers_a)  # Auth as Kishan
         resp = self.client.get(self.connections_url)
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(resp.data), 1)
+        self.assertEqual(len(resp.data["results"]), 1)
 
         # Check for nested user data
-        conn = resp.data[0]
+        conn = resp.data["results"][0]
         self.assertIn("requester", conn)
         self.assertIn("receiver", conn)
         self.assertEqual(conn["requester"]["username"], "kishandev")
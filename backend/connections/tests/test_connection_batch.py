@@ -0,0 +1,66 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from connections.models import UserConnection
+from sync.models import SyncChange
+from users.models import User
+
+
+class ConnectionBatchTests(TestCase):
+    """Tests for POST /api/connections/batch/."""
+
+    url = "/api/connections/batch/"
+
+    def setUp(self):
+        self.client = APIClient()
+        self.me = User.objects.create_user(email="me@example.com", username="me", password=None)
+        self.others = [
+            User.objects.create_user(email=f"u{i}@example.com", username=f"u{i}", password=None) for i in range(5)
+        ]
+        self.incoming = [UserConnection.objects.create(requester=other, receiver=self.me) for other in self.others[:4]]
+        self.client.force_authenticate(user=self.me)
+
+    def test_accept_and_reject_in_one_call(self):
+        outgoing = UserConnection.objects.create(requester=self.me, receiver=self.others[4])
+        accepted = UserConnection.objects.create(requester=self.others[4], receiver=self.others[0])
+        accept = [c.pk for c in self.incoming[:3]] + [outgoing.pk, accepted.pk]
+        resp = self.client.post(self.url, {"accept": accept, "reject": [self.incoming[3].pk]}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            resp.data["results"],
+            {
+                **{c.pk: "accepted" for c in self.incoming[:3]},
+                self.incoming[3].pk: "rejected",
+                outgoing.pk: "forbidden",
+                accepted.pk: "not_found",
+            },
+        )
+        statuses = dict(UserConnection.objects.values_list("pk", "status"))
+        self.assertEqual([statuses[c.pk] for c in self.incoming], ["accepted"] * 3 + ["rejected"])
+        self.assertEqual(statuses[outgoing.pk], "pending")
+
+        again = self.client.post(self.url, {"reject": [self.incoming[0].pk]}, format="json")
+        self.assertEqual(again.data["results"], {self.incoming[0].pk: "not_pending"})
+
+    def test_changes_are_journaled_for_both_sides(self):
+        before = SyncChange.objects.filter(user=self.others[0]).order_by("-seq").values_list("seq", flat=True)[0]
+        self.client.post(self.url, {"accept": [self.incoming[0].pk]}, format="json")
+        change = SyncChange.objects.get(user=self.others[0], model=SyncChange.MODEL_CONNECTION, object_id=self.incoming[0].pk)
+        self.assertGreater(change.seq, before)
+        self.assertTrue(SyncChange.objects.filter(user=self.me, object_id=self.incoming[0].pk).exists())
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        with self.assertNumQueries(self.count_queries([self.incoming[0].pk])):
+            self.client.post(self.url, {"accept": [c.pk for c in self.incoming[1:]]}, format="json")
+
+    def count_queries(self, ids):
+        with CaptureQueriesContext(connection) as captured:
+            self.client.post(self.url, {"accept": ids}, format="json")
+        return len(captured)
+
+    def test_invalid_body(self):
+        resp = self.client.post(self.url, {"accept": [1], "reject": [1]}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,82 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from connections.models import UserConnection
+from users.models import User
+
+
+class ConnectionListTests(TestCase):
+    """Tests for the paginated, filtered connections list."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="me@example.com", username="me", password=None)
+        self.client.force_authenticate(user=self.user)
+        self.connections_url = "/api/connections/"
+        self.others = [
+            User.objects.create_user(email=f"u{i}@example.com", username=f"u{i}", password=None) for i in range(6)
+        ]
+        # u0, u1 -> me pending; me -> u2 pending; u3 -> me accepted; me -> u4 accepted; u5 -> me rejected
+        self.incoming_pending = [self.connect(self.others[0], self.user), self.connect(self.others[1], self.user)]
+        self.outgoing_pending = [self.connect(self.user, self.others[2])]
+        self.connect(self.others[3], self.user, "accepted")
+        self.connect(self.user, self.others[4], "accepted")
+        self.connect(self.others[5], self.user, "rejected")
+
+    def connect(self, requester, receiver, connection_status="pending"):
+        return UserConnection.objects.create(requester=requester, receiver=receiver, status=connection_status)
+
+    def list(self, **params):
+        resp = self.client.get(self.connections_url, params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return resp.data
+
+    def ids(self, **params):
+        return sorted(c["connection_id"] for c in self.list(**params)["results"])
+
+    def test_filters_by_direction_and_status(self):
+        self.assertEqual(self.ids(direction="incoming", status="pending"), sorted(c.pk for c in self.incoming_pending))
+        self.assertEqual(self.ids(direction="outgoing", status="pending"), [self.outgoing_pending[0].pk])
+        accepted = self.list(status="accepted")["results"]
+        self.assertEqual(sorted(c["requester"]["username"] for c in accepted), ["me", "u3"])
+        self.assertEqual(len(self.list()["results"]), 6)
+
+    def test_pages_follow_the_cursor_newest_first(self):
+        first = self.list(page_size=4)
+        self.assertEqual(len(first["results"]), 4)
+        self.assertIsNotNone(first["next"])
+        second = self.client.get(first["next"]).data
+        self.assertIsNone(second["next"])
+        ids = [c["connection_id"] for c in first["results"] + second["results"]]
+        expected = list(
+            UserConnection.objects.involving(self.user).order_by("-created_at", "-connection_id").values_list(
+                "connection_id", flat=True
+            )
+        )
+        self.assertEqual(ids, expected)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        def count(**params):
+            with CaptureQueriesContext(connection) as queries:
+                self.list(**params)
+            return len(queries)
+
+        self.assertEqual(count(page_size=1), count(page_size=6))
+        self.assertEqual(count(direction="incoming", page_size=1), count(direction="incoming", page_size=6))
+
+    def test_invalid_filters_are_rejected(self):
+        for params in ({"direction": "sideways"}, {"status": "maybe"}):
+            resp = self.client.get(self.connections_url, params)
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("detail", resp.data)
+
+    def test_summary_counts_per_status_and_direction(self):
+        with self.assertNumQueries(1):
+            resp = self.client.get(f"{self.connections_url}summary/")
+        self.assertEqual(resp.data["total"], 6)
+        self.assertEqual((resp.data["pending"], resp.data["accepted"], resp.data["rejected"]), (3, 2, 1))
+        self.assertEqual(resp.data["incoming"], {"pending": 2, "accepted": 1, "rejected": 1})
+        self.assertEqual(resp.data["outgoing"], {"pending": 1, "accepted": 1, "rejected": 0})
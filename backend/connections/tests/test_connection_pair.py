@@ -0,0 +1,46 @@
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from connections.models import UserConnection
+from users.models import User
+
+
+class ConnectionPairTests(TestCase):
+    """Tests for the canonical (low_user, high_user) pair key."""
+
+    def setUp(self):
+        self.user_a = User.objects.create_user(email="a@example.com", username="pair_a", password=None)
+        self.user_b = User.objects.create_user(email="b@example.com", username="pair_b", password=None)
+        self.user_c = User.objects.create_user(email="c@example.com", username="pair_c", password=None)
+
+    def test_pair_is_canonical_whatever_the_direction(self):
+        conn = UserConnection.objects.create(requester=self.user_b, receiver=self.user_a)
+        self.assertEqual((conn.low_user_id, conn.high_user_id), (self.user_a.pk, self.user_b.pk))
+
+    def test_reverse_duplicate_is_rejected_by_the_database(self):
+        UserConnection.objects.create(requester=self.user_a, receiver=self.user_b)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            UserConnection.objects.create(requester=self.user_b, receiver=self.user_a)
+
+    def test_self_connection_is_rejected_by_the_database(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            UserConnection.objects.create(requester=self.user_a, receiver=self.user_a)
+
+    def test_between_and_are_connected_are_one_query(self):
+        conn = UserConnection.objects.create(requester=self.user_b, receiver=self.user_a)
+        with self.assertNumQueries(1):
+            self.assertEqual(UserConnection.objects.between(self.user_a, self.user_b.pk).get(), conn)
+        with self.assertNumQueries(1):
+            self.assertFalse(UserConnection.objects.are_connected(self.user_a, self.user_b))
+
+        conn.status = UserConnection.STATUS_ACCEPTED
+        conn.save()
+        self.assertTrue(UserConnection.objects.are_connected(self.user_b, self.user_a))
+        self.assertFalse(UserConnection.objects.are_connected(self.user_a, self.user_c))
+
+    def test_pair_follows_a_changed_receiver(self):
+        conn = UserConnection.objects.create(requester=self.user_a, receiver=self.user_b)
+        conn.receiver = self.user_c
+        conn.save(update_fields=["receiver"])
+        conn.refresh_from_db()
+        self.assertEqual((conn.low_user_id, conn.high_user_id), (self.user_a.pk, self.user_c.pk))
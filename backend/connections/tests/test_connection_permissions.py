@@ -0,0 +1,125 @@
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from connections import rules
+from connections.models import ConnectionPermission, UserConnection
+from entities.models import Entity
+from payment_modes import registry
+from payment_modes.models import SupportedApp
+from users.models import User
+
+
+class ConnectionPermissionApiTests(TestCase):
+    """Tests for the payee's Connection Settings endpoint."""
+
+    url = "/api/connection-permissions/"
+
+    def setUp(self):
+        self.client = APIClient()
+        self.payee = User.objects.create_user(email="payee@example.com", username="payee", password=None)
+        self.payer = User.objects.create_user(email="payer@example.com", username="payer", password=None)
+        self.stranger = User.objects.create_user(email="stranger@example.com", username="stranger", password=None)
+        UserConnection.objects.create(requester=self.payer, receiver=self.payee, status=UserConnection.STATUS_ACCEPTED)
+        self.bank = Entity.objects.create(owner=self.payee, name="BOB", type="ACCOUNT")
+        SupportedApp.objects.get_or_create(key="gpay", defaults={"name": "Google Pay"})
+        registry.invalidate()
+        self.addCleanup(registry.invalidate)
+        self.client.force_authenticate(user=self.payee)
+
+    def test_create_and_list(self):
+        resp = self.client.post(
+            self.url,
+            {"payer_user": "payer", "app_key": "gpay", "default_entity": self.bank.pk, "is_auto_approve_on": True},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED, resp.data)
+        self.assertEqual(ConnectionPermission.objects.get().payee_user, self.payee)
+
+        listed = self.client.get(self.url, {"payer": "payer"}).data
+        self.assertEqual([(r["payer_user"], r["app_key"]) for r in listed], [("payer", "gpay")])
+        self.client.force_authenticate(user=self.payer)
+        self.assertEqual(self.client.get(self.url).data, [])
+
+    def test_auto_approve_requires_a_default_entity(self):
+        resp = self.client.post(self.url, {"payer_user": "payer", "is_auto_approve_on": True}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("is_auto_approve_on", resp.data)
+
+    def test_invalid_references_are_rejected(self):
+        theirs = Entity.objects.create(owner=self.payer, name="Not mine", type="ACCOUNT")
+        cases = [
+            ({"payer_user": "stranger"}, "payer_user"),
+            ({"payer_user": "payer", "app_key": "nope"}, "app_key"),
+            ({"payer_user": "payer", "default_entity": theirs.pk}, "default_entity"),
+        ]
+        for body, field in cases:
+            resp = self.client.post(self.url, body, format="json")
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(field, resp.data)
+
+    def test_duplicate_rule_is_rejected(self):
+        self.assertEqual(self.client.post(self.url, {"payer_user": "payer"}, format="json").status_code, 201)
+        resp = self.client.post(self.url, {"payer_user": "payer"}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("app_key", resp.data)
+
+
+class DecisionEngineTests(TestCase):
+    """Tests for connections.rules."""
+
+    def setUp(self):
+        self.payee = User.objects.create_user(email="payee@example.com", username="payee", password=None)
+        self.payer = User.objects.create_user(email="payer@example.com", username="payer", password=None)
+        self.link = UserConnection.objects.create(
+            requester=self.payer, receiver=self.payee, status=UserConnection.STATUS_ACCEPTED
+        )
+        self.bank = Entity.objects.create(owner=self.payee, name="BOB", type="ACCOUNT")
+
+    def rule(self, app_key="", **fields):
+        return ConnectionPermission.objects.create(payer_user=self.payer, payee_user=self.payee, app_key=app_key, **fields)
+
+    def test_no_rule_means_allowed_and_pending(self):
+        self.assertEqual(rules.decide(self.payer.pk, self.payee.pk, "gpay"), rules.DEFAULT_DECISION)
+
+    def test_specific_rule_beats_the_catch_all(self):
+        self.rule(is_allowed=False)
+        self.rule("gpay", default_entity=self.bank, is_auto_approve_on=True)
+        self.assertEqual(rules.decide(self.payer.pk, self.payee.pk, "gpay"), rules.Decision(True, True, self.bank.pk))
+        self.assertFalse(rules.decide(self.payer.pk, self.payee.pk, "phonepe").allowed)
+        self.assertFalse(rules.decide(self.payer.pk, self.payee.pk).allowed)
+
+    def test_unconnected_users_are_denied(self):
+        self.rule("gpay", default_entity=self.bank, is_auto_approve_on=True)
+        self.link.status = UserConnection.STATUS_REJECTED
+        self.link.save()
+        self.assertEqual(rules.decide(self.payer.pk, self.payee.pk, "gpay"), rules.DENIED_DECISION)
+        self.link.delete()
+        self.assertEqual(rules.decide(self.payer.pk, self.payee.pk), rules.DENIED_DECISION)
+
+    def test_decision_carries_the_default_entity(self):
+        self.rule(default_entity=self.bank)
+        decision = rules.decide(self.payer.pk, self.payee.pk)
+        self.assertEqual(decision, rules.Decision(True, False, self.bank.pk))
+        entity = decision.default_entity_copy()
+        self.assertEqual((entity.pk, entity.owner_id, entity.name), (self.bank.pk, self.payee.pk, "BOB"))
+        self.assertIsNot(entity, decision.default_entity_copy())
+
+    def test_auto_approve_needs_the_default_entity(self):
+        self.rule(default_entity=self.bank, is_auto_approve_on=True)
+        self.bank.delete()
+        self.assertEqual(rules.decide(self.payer.pk, self.payee.pk), rules.Decision(True, False, None))
+
+    def test_resolver_memoizes_one_query_per_request(self):
+        self.rule("gpay", default_entity=self.bank)
+        resolver = rules.RuleResolver()
+        with self.assertNumQueries(1):
+            for _ in range(3):
+                resolver.decide(self.payer.pk, self.payee.pk, "gpay")
+
+    def test_revoked_rule_applies_to_the_next_request(self):
+        rule = self.rule("gpay", default_entity=self.bank, is_auto_approve_on=True)
+        self.assertTrue(rules.RuleResolver().decide(self.payer.pk, self.payee.pk, "gpay").auto_approve)
+        # Revoked by a plain UPDATE, as another worker or the admin might: no signal, no cache bump.
+        ConnectionPermission.objects.filter(pk=rule.pk).update(is_allowed=False)
+        self.assertFalse(rules.RuleResolver().decide(self.payer.pk, self.payee.pk, "gpay").allowed)
@@ -1,10 +1,21 @@
-from django.db import models
+from django.db import transaction
+from django.db.models import Case, Count, Value, When
+from django.utils import timezone
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
-from .models import UserConnection
-from .serializers import UserConnectionListSerializer, UserConnectionSerializer
+from core_transaction.pagination import KeysetPagination
+from sync.changes import record_changes
+from sync.models import SyncChange
+from users.batch import FORBIDDEN, NOT_FOUND, NOT_PENDING, BatchDecisionSerializer
+from users.response_cache import bump_versions
+
+from .models import ConnectionPermission, UserConnection
+from .serializers import ConnectionPermissionSerializer, UserConnectionListSerializer, UserConnectionSerializer
+
+DIRECTIONS = ("incoming", "outgoing")
 
 
 class IsInvolvedPermission(permissions.BasePermission):
@@ -16,10 +27,17 @@ class IsInvolvedPermission(permissions.BasePermission):
         return obj.requester_id == request.user.pk or obj.receiver_id == request.user.pk
 
 
+class ConnectionPagination(KeysetPagination):
+    """Newest connections first; `connection_id` breaks ties."""
+
+    ordering = ("-created_at", "-connection_id")
+
+
 class UserConnectionViewSet(viewsets.ModelViewSet):
     queryset = UserConnection.objects.all().order_by("-created_at")
     serializer_class = UserConnectionSerializer
     permission_classes = [permissions.IsAuthenticated, IsInvolvedPermission]
+    pagination_class = ConnectionPagination
 
     def get_serializer_class(self):
         """
@@ -33,7 +51,100 @@ class UserConnectionViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         # restrict list to connections where current user is involved
         user = self.request.user
-        return UserConnection.objects.filter(models.Q(requester=user) | models.Q(receiver=user)).order_by("-created_at")
+        return UserConnection.objects.involving(user).order_by("-created_at")
+
+    def get_keyset_branches(self, queryset):
+        """
+        The list queryset, filtered by `?direction=incoming|outgoing` and
+        `?status=pending|accepted|rejected`: one branch per direction, each
+        served by its (receiver, status) or (requester, status) index, with
+        both users joined in so a page costs one query per branch.
+        """
+        user = self.request.user
+        direction = self.request.query_params.get("direction")
+        if direction is not None and direction not in DIRECTIONS:
+            raise ValidationError({"detail": f"`direction` must be one of: {', '.join(DIRECTIONS)}."})
+        connection_status = self.request.query_params.get("status")
+        statuses = [choice for choice, _ in UserConnection.STATUS_CHOICES]
+        if connection_status is not None and connection_status not in statuses:
+            raise ValidationError({"detail": f"`status` must be one of: {', '.join(statuses)}."})
+
+        sides = {"incoming": {"receiver": user}, "outgoing": {"requester": user}}
+        branches = []
+        for side in [direction] if direction else DIRECTIONS:
+            branch = queryset.filter(**sides[side]).select_related("requester", "receiver")
+            if connection_status:
+                branch = branch.filter(status=connection_status)
+            branches.append(branch)
+        return branches
+
+    @action(detail=False, methods=["get"])
+    def summary(self, request):
+        """Number of the user's connections per status and direction, from one GROUP BY query."""
+        statuses = [choice for choice, _ in UserConnection.STATUS_CHOICES]
+        counts = {side: dict.fromkeys(statuses, 0) for side in DIRECTIONS}
+        rows = (
+            UserConnection.objects.involving(request.user)
+            .annotate(side=Case(When(requester=request.user, then=Value("outgoing")), default=Value("incoming")))
+            .values_list("side", "status")
+            .annotate(count=Count("pk"))
+            .order_by()
+        )
+        for side, connection_status, count in rows:
+            counts[side][connection_status] = count
+        totals = {choice: counts["incoming"][choice] + counts["outgoing"][choice] for choice in statuses}
+        return Response({"total": sum(totals.values()), **totals, **counts})
+
+    @action(detail=False, methods=["post"])
+    def batch(self, request):
+        """
+        Accept and/or reject many pending requests sent to the current user:
+        `{"accept": [ids], "reject": [ids]}`. One locking read, then one
+        filtered UPDATE per new status; every id gets its outcome (the new
+        status, "not_found", "forbidden" or "not_pending") in `results`.
+        """
+        serializer = BatchDecisionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        decisions = {
+            UserConnection.STATUS_ACCEPTED: serializer.validated_data["accept"],
+            UserConnection.STATUS_REJECTED: serializer.validated_data["reject"],
+        }
+        results, changed = {}, []
+        with transaction.atomic():
+            rows = (
+                UserConnection.objects.select_for_update()
+                .involving(request.user)
+                .filter(pk__in=[pk for ids in decisions.values() for pk in ids])
+                .order_by("pk")
+                .values_list("pk", "requester_id", "receiver_id", "status")
+            )
+            rows = {row[0]: row for row in rows}
+            for new_status, ids in decisions.items():
+                eligible = []
+                for pk in ids:
+                    row = rows.get(pk)
+                    if row is None:
+                        results[pk] = NOT_FOUND
+                    elif row[2] != request.user.pk:
+                        results[pk] = FORBIDDEN
+                    elif row[3] != UserConnection.STATUS_PENDING:
+                        results[pk] = NOT_PENDING
+                    else:
+                        results[pk] = new_status
+                        eligible.append(row)
+                if eligible:
+                    UserConnection.objects.filter(
+                        pk__in=[row[0] for row in eligible], status=UserConnection.STATUS_PENDING
+                    ).update(status=new_status, updated_at=timezone.now())
+                    changed += eligible
+            # A filtered UPDATE sends no signals: journal and invalidate here.
+            record_changes(
+                (user_id, SyncChange.MODEL_CONNECTION, pk, False)
+                for pk, requester_id, receiver_id, _ in changed
+                for user_id in (requester_id, receiver_id)
+            )
+            bump_versions(*{user_id for _, requester_id, receiver_id, _ in changed for user_id in (requester_id, receiver_id)})
+        return Response({"results": results})
 
     def perform_create(self, serializer):
         # set the requester as current user and initial status pending
@@ -52,9 +163,7 @@ class UserConnectionViewSet(viewsets.ModelViewSet):
             return Response({"detail": "You cannot send a connection request to yourself."}, status=status.HTTP_400_BAD_REQUEST)
 
         # Check for existing connection (in either direction)
-        existing_connection = UserConnection.objects.filter(
-            models.Q(requester=requester, receiver=receiver) | models.Q(requester=receiver, receiver=requester)
-        ).first()
+        existing_connection = UserConnection.objects.between(requester, receiver).first()
 
         if existing_connection:
             if existing_connection.status == "accepted":
@@ -97,3 +206,23 @@ class UserConnectionViewSet(viewsets.ModelViewSet):
         conn.save()
         serializer = self.get_serializer(conn)
         return Response(serializer.data)
+
+
+class ConnectionPermissionViewSet(viewsets.ModelViewSet):
+    """
+    The current user's rules for payments they receive from connected users
+    ("Connection Settings"). `?payer=<username>` narrows the list to one friend.
+    """
+
+    serializer_class = ConnectionPermissionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = ConnectionPermission.objects.filter(payee_user=self.request.user).select_related("payer_user")
+        payer = self.request.query_params.get("payer")
+        if payer:
+            queryset = queryset.filter(payer_user__username=payer)
+        return queryset.order_by("payer_user_id", "app_key")
+
+    def perform_create(self, serializer):
+        serializer.save(payee_user=self.request.user)
@@ -0,0 +1,106 @@
+import copy
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+
+from connections.models import RECEIVING_TYPES
+from entities.models import Entity
+from sync.changes import record_changes, transaction_changes
+from users.batch import FORBIDDEN, NOT_FOUND, NOT_PENDING
+from users.response_cache import bump_versions
+
+from .balances import merge_deltas, post_balance_deltas, transaction_deltas
+from .chats import post_settled
+from .ledger import add_postings_many
+from .models import Transaction
+from .rollups import merge_rollup_deltas, post_rollup_deltas, rollup_change_deltas
+
+
+def settle_pending(user, accept=(), reject=()):
+    """
+    Accept (complete) or reject many PENDING transactions of which `user`
+    owns the payee, in one database transaction.
+
+    The rows are locked and read with one query, each new status is written
+    with one filtered UPDATE, and what the per-row signals would do is done
+    once for the whole batch: balances get the net delta per entity, each
+    entity's ledger is extended once, rollups and chat summaries get one
+    update per touched row, and the changes are journaled for sync.
+
+    Returns {transaction_id: new status | NOT_FOUND | FORBIDDEN | NOT_PENDING}.
+    """
+    results = {}
+    with transaction.atomic():
+        rows = Transaction.objects.select_for_update().visible_to(user).filter(pk__in={*accept, *reject}).order_by('pk')
+        rows = {instance.pk: instance for instance in rows}
+        settled = []
+        for ids, new_status in ((accept, 'COMPLETED'), (reject, 'REJECTED')):
+            eligible = []
+            for pk in ids:
+                before = rows.get(pk)
+                if before is None:
+                    results[pk] = NOT_FOUND
+                elif before.payee_owner_id != user.pk:
+                    results[pk] = FORBIDDEN
+                elif before.status != 'PENDING':
+                    results[pk] = NOT_PENDING
+                else:
+                    results[pk] = new_status
+                    eligible.append(before)
+            if not eligible:
+                continue
+            Transaction.objects.filter(pk__in=[before.pk for before in eligible], status='PENDING').update(
+                status=new_status, updated_at=timezone.now()
+            )
+            for before in eligible:
+                after = copy.copy(before)
+                after.status = new_status
+                settled.append((before, after))
+
+        if settled:
+            completed = [after for _, after in settled if after.status == 'COMPLETED']
+            post_balance_deltas(merge_deltas(*(transaction_deltas(after) for after in completed)))
+            add_postings_many(completed)
+            post_rollup_deltas(merge_rollup_deltas(*(rollup_change_deltas(before, after) for before, after in settled)))
+            post_settled(before for before, _ in settled)
+            # A filtered UPDATE sends no signals: journal and invalidate here.
+            record_changes(change for before, after in settled for change in transaction_changes(before, after))
+            bump_versions(*{owner for _, after in settled for owner in (after.payer_owner_id, after.payee_owner_id)})
+    return results
+
+
+def approve_pending(user, transaction_id, payee_id=None):
+    """
+    Accept one PENDING transaction paid to `user`, optionally into another of
+    their accounts or wallets first ("Modify & Accept"), in one database
+    transaction.
+
+    The transaction row is locked before its status is checked, then the
+    payer, old and new payee entities are locked in entity_id order (the
+    order post_balance_deltas uses), so concurrent approvals of the same
+    transaction queue up and only the first one finds it PENDING. The save
+    then moves the balances, ledger, rollups and chat summaries through the
+    usual signals, under those locks.
+    """
+    with transaction.atomic():
+        instance = Transaction.objects.select_for_update().visible_to(user).filter(pk=transaction_id).first()
+        if instance is None:
+            raise NotFound()
+        if instance.payee_owner_id != user.pk:
+            raise PermissionDenied("Only the payee can accept this transaction.")
+        if instance.status != 'PENDING':
+            raise ValidationError({"detail": "Transaction not pending."})
+
+        payee_id = payee_id or instance.payee_id
+        entity_ids = sorted({instance.payer_id, instance.payee_id, payee_id})
+        entities = {entity.pk: entity for entity in Entity.objects.select_for_update().filter(pk__in=entity_ids).order_by('pk')}
+        payee = entities.get(payee_id)
+        if payee is None or payee.owner_id != user.pk or payee.type not in RECEIVING_TYPES:
+            raise ValidationError({"payee": ["Must be one of your accounts or wallets."]})
+
+        instance.payer = entities[instance.payer_id]
+        instance.payee = payee
+        instance.status = 'COMPLETED'
+        instance.save(update_fields=['payee', 'payee_owner', 'status', 'updated_at'])
+    return instance
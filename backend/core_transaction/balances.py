@@ -0,0 +1,134 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import Case, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Round
+from django.utils import timezone
+
+from entities.models import Entity
+from .models import Transaction
+
+BALANCE_FIELD = Entity._meta.get_field('current_balance')
+
+
+def transaction_deltas(instance, sign=1):
+    """
+    Balance effect of one transaction as {entity_id: delta}: the payer is
+    debited and the payee credited. Only COMPLETED transactions move money.
+    Pass sign=-1 for the reversal.
+    """
+    deltas = defaultdict(Decimal)
+    if instance.status == 'COMPLETED':
+        amount = sign * instance._meta.get_field('amount').to_python(instance.amount)
+        deltas[instance.payer_id] -= amount
+        deltas[instance.payee_id] += amount
+    return deltas
+
+
+def merge_deltas(*many):
+    """
+    Sum several {entity_id: delta} maps into one.
+    """
+    merged = defaultdict(Decimal)
+    for deltas in many:
+        for entity_id, delta in deltas.items():
+            merged[entity_id] += delta
+    return merged
+
+
+def transaction_change_deltas(before, after):
+    """
+    Net balance effect of editing a transaction from `before` to `after`
+    (either may be None for a create/delete): undo the old posting and apply
+    the new one. Unchanged entities net to zero and are skipped when posted.
+    """
+    return merge_deltas(
+        transaction_deltas(before, sign=-1) if before is not None else {},
+        transaction_deltas(after) if after is not None else {},
+    )
+
+
+def post_balance_deltas(deltas):
+    """
+    Apply {entity_id: delta} to Entity.current_balance in one atomic step.
+
+    Rows are locked in ascending entity_id order before they are written, so
+    two postings touching the same entities always queue in the same order and
+    cannot deadlock. The balances are then changed with a single UPDATE that
+    adds each delta in SQL (never read-modify-write in Python), touching only
+    current_balance and updated_at.
+    """
+    deltas = {entity_id: delta for entity_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    entity_ids = sorted(deltas)
+    with transaction.atomic():
+        # Row locks (FOR UPDATE on Postgres; SQLite locks the whole database on write).
+        list(Entity.objects.select_for_update().filter(pk__in=entity_ids).order_by('pk').values_list('pk', flat=True))
+        Entity.objects.filter(pk__in=entity_ids).update(
+            current_balance=F('current_balance') + Case(
+                *[When(pk=entity_id, then=Value(deltas[entity_id])) for entity_id in entity_ids],
+                output_field=models.DecimalField(
+                    max_digits=BALANCE_FIELD.max_digits, decimal_places=BALANCE_FIELD.decimal_places
+                ),
+            ),
+            updated_at=timezone.now(),
+        )
+
+
+def _completed_cents(side):
+    """
+    Correlated SUM of COMPLETED amounts where the outer Entity is `side`
+    ('payer' or 'payee'), in integer cents: SQLite sums decimals as floats,
+    but integral floats add up exactly.
+    """
+    total = (
+        Transaction.objects.filter(status='COMPLETED', **{side: OuterRef('pk')})
+        .order_by()
+        .values(side)
+        .annotate(cents=Sum(Round(F('amount') * 100)))
+        .values('cents')[:1]
+    )
+    return Coalesce(Subquery(total), 0, output_field=models.DecimalField(max_digits=21, decimal_places=0))
+
+
+def ledger_drift(owner_ids):
+    """
+    Compare the stored balance of every entity owned by `owner_ids` with
+    opening_balance + COMPLETED incoming - COMPLETED outgoing.
+
+    Balances and ledger sums come from a single SELECT, so they are a
+    consistent snapshot even while new transactions are being posted.
+    Returns [(entity_id, stored, expected)] for mismatching entities only.
+    """
+    rows = (
+        Entity.objects.filter(owner__in=owner_ids)
+        .annotate(incoming_cents=_completed_cents('payee'), outgoing_cents=_completed_cents('payer'))
+        .values_list('entity_id', 'current_balance', 'opening_balance', 'incoming_cents', 'outgoing_cents')
+    )
+    drift = []
+    for entity_id, stored, opening, incoming, outgoing in rows:
+        expected = opening + (Decimal(int(incoming)) - Decimal(int(outgoing))) / 100
+        if stored != expected:
+            drift.append((entity_id, stored, expected))
+    return drift
+
+
+def accept_drift(drift):
+    """
+    Take the stored balances of ledger_drift() rows as right: move each
+    mismatch into the entity's opening_balance, with one UPDATE, so the
+    ledger agrees with the balance instead of the other way round.
+    """
+    shift = {entity_id: stored - expected for entity_id, stored, expected in drift if stored != expected}
+    if not shift:
+        return
+    opening = Entity._meta.get_field('opening_balance')
+    Entity.objects.filter(pk__in=shift).update(
+        opening_balance=F('opening_balance') + Case(
+            *[When(pk=entity_id, then=Value(delta)) for entity_id, delta in sorted(shift.items())],
+            output_field=models.DecimalField(max_digits=opening.max_digits, decimal_places=opening.decimal_places),
+        ),
+    )
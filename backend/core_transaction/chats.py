@@ -0,0 +1,165 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Q, Value, When
+
+from .models import ChatSummary, Transaction
+
+LAST_FIELDS = ('last_transaction_id', 'last_amount', 'last_date')
+
+
+def _chat_lookups(payer_id, payee_id, payer_owner_id, payee_owner_id):
+    lookups = [{'entity_id': entity_id} for entity_id in sorted({payer_id, payee_id})]
+    if payer_owner_id != payee_owner_id:
+        low, high = sorted((payer_owner_id, payee_owner_id))
+        lookups.append({'low_user_id': low, 'high_user_id': high})
+    return lookups
+
+
+def chat_lookups(instance):
+    """ChatSummary.objects.filter() lookups of the chats a transaction shows up in."""
+    if instance is None:
+        return []
+    return _chat_lookups(instance.payer_id, instance.payee_id, instance.payer_owner_id, instance.payee_owner_id)
+
+
+def _key(lookup):
+    return tuple(sorted(lookup.items()))
+
+
+def chat_transactions(lookup):
+    """Every transaction of one chat."""
+    if 'entity_id' in lookup:
+        return Transaction.objects.filter(Q(payer_id=lookup['entity_id']) | Q(payee_id=lookup['entity_id']))
+    low, high = lookup['low_user_id'], lookup['high_user_id']
+    return Transaction.objects.filter(
+        Q(payer_owner_id=low, payee_owner_id=high) | Q(payer_owner_id=high, payee_owner_id=low)
+    )
+
+
+def _last_values(instance):
+    amount = Transaction._meta.get_field('amount').to_python(instance.amount)
+    return dict(zip(LAST_FIELDS, (instance.pk, amount, instance.date)))
+
+
+def _newest_values(lookup):
+    newest = (
+        chat_transactions(lookup)
+        .order_by('-date', '-transaction_id')
+        .values_list('transaction_id', 'amount', 'date')
+        .first()
+    )
+    return dict(zip(LAST_FIELDS, newest or (None, None, None)))
+
+
+def _post(lookup, change, pending=0, newest=None):
+    """
+    Apply `change` to the chat's summary; when `newest` (a transaction now in
+    the chat) sorts after the stored last transaction, it becomes the last
+    one. A missing summary is created (or updated, if a concurrent writer
+    created it first).
+    """
+    if newest is not None:
+        newer = (
+            Q(last_date__isnull=True)
+            | Q(last_date__lt=newest.date)
+            | Q(last_date=newest.date, last_transaction_id__lt=newest.pk)
+        )
+        for field, value in _last_values(newest).items():
+            change.setdefault(field, Case(When(newer, then=Value(value)), default=F(field)))
+    if not change:
+        return
+    rows = ChatSummary.objects.filter(**lookup)
+    if rows.update(**change) or newest is None:
+        return
+    try:
+        with transaction.atomic():
+            ChatSummary.objects.create(**lookup, pending_count=max(pending, 0), **_last_values(newest))
+    except IntegrityError:
+        rows.update(**change)
+
+
+def apply_change(before, after):
+    """
+    Move the chat summaries from the stored transaction state `before` to
+    `after` (either may be None): a conditional UPDATE per chat, plus one
+    index seek for the new newest transaction when the old newest one left
+    its chat, was re-dated or changed amount.
+    """
+    if before is not None and after is not None and all(
+        getattr(before, field) == getattr(after, field) for field in ('payer_id', 'payee_id', 'amount', 'status', 'date')
+    ):
+        return
+    before_chats = {_key(lookup): lookup for lookup in chat_lookups(before)}
+    after_chats = {_key(lookup): lookup for lookup in chat_lookups(after)}
+    for key in sorted(before_chats.keys() | after_chats.keys()):
+        lookup = before_chats.get(key) or after_chats[key]
+        was_in, is_in = key in before_chats, key in after_chats
+        pending = int(is_in and after.status == 'PENDING') - int(was_in and before.status == 'PENDING')
+        change = {'pending_count': F('pending_count') + pending} if pending else {}
+        if was_in and ChatSummary.objects.filter(**lookup, last_transaction_id=before.pk).exists():
+            # Runs after the write, so the seek sees `after` (or its absence).
+            change.update(_newest_values(lookup))
+        _post(lookup, change, pending, after if is_in else None)
+
+
+def post_new_transactions(instances):
+    """Chat summary updates for freshly inserted transactions, one per chat (see TransactionImporter)."""
+    chats = {}
+    for instance in instances:
+        for lookup in chat_lookups(instance):
+            chats.setdefault(_key(lookup), (lookup, []))[1].append(instance)
+    for key in sorted(chats):
+        lookup, members = chats[key]
+        pending = sum(instance.status == 'PENDING' for instance in members)
+        change = {'pending_count': F('pending_count') + pending} if pending else {}
+        _post(lookup, change, pending, max(members, key=lambda instance: (instance.date, instance.pk)))
+
+
+def post_settled(instances):
+    """
+    Chat summary updates for PENDING transactions that were accepted or
+    rejected in one go (see core_transaction/approvals.py): one pending_count
+    UPDATE per chat. The last transaction of a chat cannot change, since no
+    date or amount did.
+    """
+    chats = {}
+    for instance in instances:
+        for lookup in chat_lookups(instance):
+            chats.setdefault(_key(lookup), [lookup, 0])[1] += 1
+    for key in sorted(chats):
+        lookup, settled = chats[key]
+        ChatSummary.objects.filter(**lookup).update(pending_count=F('pending_count') - settled)
+
+
+def rebuild_chat_summaries(owner_ids=None, batch_size=5000):
+    """
+    Recompute the chat summaries of `owner_ids` (or everyone) with one pass
+    over their transactions in (date, transaction_id) order.
+    """
+    transactions = Transaction.objects.order_by('date', 'transaction_id')
+    summaries = ChatSummary.objects.all()
+    if owner_ids is not None:
+        owner_ids = set(owner_ids)
+        transactions = transactions.filter(Q(payer_owner_id__in=owner_ids) | Q(payee_owner_id__in=owner_ids))
+        summaries = summaries.filter(
+            Q(entity__owner_id__in=owner_ids) | Q(low_user_id__in=owner_ids) | Q(high_user_id__in=owner_ids)
+        )
+
+    rebuilt = {}
+    rows = transactions.values_list(
+        'transaction_id', 'amount', 'date', 'status', 'payer_id', 'payee_id', 'payer_owner_id', 'payee_owner_id'
+    )
+    for pk, amount, date, status, payer_id, payee_id, payer_owner_id, payee_owner_id in rows.iterator(
+        chunk_size=batch_size
+    ):
+        entity_owners = {payer_id: payer_owner_id, payee_id: payee_owner_id}
+        for lookup in _chat_lookups(payer_id, payee_id, payer_owner_id, payee_owner_id):
+            if owner_ids is not None:
+                owners = [entity_owners[lookup['entity_id']]] if 'entity_id' in lookup else lookup.values()
+                if owner_ids.isdisjoint(owners):
+                    continue
+            summary = rebuilt.setdefault(_key(lookup), ChatSummary(**lookup))
+            summary.last_transaction_id, summary.last_amount, summary.last_date = pk, amount, date
+            summary.pending_count += status == 'PENDING'
+
+    summaries.delete()
+    return len(ChatSummary.objects.bulk_create(rebuilt.values(), batch_size=batch_size))
@@ -0,0 +1,180 @@
+import csv
+import io
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+
+from connections.rules import RuleResolver
+from entities.models import Entity
+from payment_modes.models import Payment_Mode
+from sync.changes import record_changes, transaction_changes
+from users.response_cache import bump_versions
+
+from .balances import merge_deltas, post_balance_deltas, transaction_deltas
+from .chats import post_new_transactions
+from .ledger import add_postings_many
+from .models import Transaction
+from .rollups import merge_rollup_deltas, post_rollup_deltas, rollup_deltas
+
+
+class TransactionImportRowSerializer(serializers.Serializer):
+    """
+    Shape/type validation for one imported row. Foreign keys are plain ids
+    here; they are resolved for the whole batch at once by TransactionImporter
+    instead of one query per field per row.
+    """
+
+    payer = serializers.IntegerField()
+    payee = serializers.IntegerField()
+    amount = serializers.DecimalField(max_digits=19, decimal_places=2, min_value=Decimal('0.01'))
+    date = serializers.DateTimeField()
+    description = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    status = serializers.ChoiceField(choices=Transaction.STATUS_CHOICES, default='PENDING')
+    mode = serializers.IntegerField(required=False, allow_null=True)
+    category = serializers.IntegerField(required=False, allow_null=True)
+
+
+def parse_rows(content, fmt):
+    """
+    Turn an uploaded JSON array or CSV document (with a header row) into a
+    list of dicts. Empty CSV cells are treated as missing values.
+    """
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+    if fmt == 'json':
+        rows = json.loads(content)
+        if not isinstance(rows, list):
+            raise ValueError("Expected a JSON array of transactions.")
+        return rows
+    if fmt == 'csv':
+        reader = csv.DictReader(io.StringIO(content))
+        return [{key: value for key, value in row.items() if key and value not in ('', None)} for row in reader]
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+class TransactionImporter:
+    """
+    Validate and insert a batch of transactions for `user`.
+
+    Rows are inserted with bulk_create in chunks, so the per-row post_save
+    balance signal does not fire; instead the net effect of all COMPLETED rows
+    is summed per entity and posted with one UPDATE at the end, and their
+    postings are merged into each entity's ledger once; category rollups get one
+    merged delta per (category, month, status) and each touched chat summary
+    one update. Everything happens in one database transaction.
+
+    The user must own the payer of every row. A row paying another user's
+    entity is networked and follows that user's connection permission
+    (connections/rules.py), as a single create does.
+
+    With `partial=False` (all-or-nothing) any invalid row aborts the import.
+    With `partial=True` valid rows are inserted and invalid ones reported.
+    """
+
+    def __init__(self, user, partial=False, chunk_size=None):
+        self.user = user
+        self.partial = partial
+        self.chunk_size = chunk_size or getattr(settings, 'TRANSACTION_IMPORT_CHUNK_SIZE', 1000)
+
+    def run(self, rows):
+        """
+        Returns {"created": [...ids], "errors": [{"row": index, "errors": {...}}]}.
+        """
+        valid, errors = self.validate(rows)
+        if errors and not self.partial:
+            return {'created': [], 'errors': errors}
+
+        with transaction.atomic():
+            created = []
+            for start in range(0, len(valid), self.chunk_size):
+                created.extend(Transaction.objects.bulk_create(valid[start : start + self.chunk_size]))
+
+            deltas = merge_deltas(*(transaction_deltas(instance) for instance in created))
+            post_balance_deltas(deltas)
+            # One merge per entity into the ledger tail after its earliest
+            # new posting, so the cost follows the import, not the history.
+            add_postings_many([instance for instance in created if instance.status == 'COMPLETED'])
+            post_rollup_deltas(merge_rollup_deltas(*(rollup_deltas(instance) for instance in created)))
+            post_new_transactions(created)
+            # bulk_create skips the post_save that invalidates cached responses
+            # and journals the rows for delta sync.
+            owners = {instance.payer_owner_id for instance in created} | {instance.payee_owner_id for instance in created}
+            bump_versions(*owners)
+            record_changes(change for instance in created for change in transaction_changes(None, instance))
+
+        return {'created': [instance.pk for instance in created], 'errors': errors}
+
+    def validate(self, rows):
+        # One serializer instance validates every row (as ListSerializer does),
+        # rather than re-building its fields per row.
+        row_serializer = TransactionImportRowSerializer()
+        cleaned, errors = [], []
+        for index, row in enumerate(rows):
+            try:
+                cleaned.append((index, row_serializer.run_validation(row)))
+            except serializers.ValidationError as exc:
+                errors.append({'row': index, 'errors': exc.detail})
+
+        entities, modes = self.load_references(data for _, data in cleaned)
+        rules = RuleResolver()
+        valid = []
+        for index, data in cleaned:
+            row_errors = self.check_references(data, entities, modes)
+            if row_errors:
+                errors.append({'row': index, 'errors': row_errors})
+                continue
+            payee_id, payee_owner_id, row_status = data['payee'], entities[data['payee']].owner_id, data['status']
+            if payee_owner_id != self.user.pk:
+                # Networked, as in TransactionViewSet.perform_create: the
+                # payee's rules decide, not the status in the file.
+                decision = rules.decide(self.user.pk, payee_owner_id, modes.get(data.get('mode'), ''))
+                if not decision.allowed:
+                    errors.append({'row': index, 'errors': {'payee': ["The payee does not accept this payment type from you."]}})
+                    continue
+                payee_id = decision.default_entity_id or payee_id
+                row_status = 'COMPLETED' if decision.auto_approve else 'PENDING'
+            valid.append(
+                Transaction(
+                    payer_id=data['payer'],
+                    payee_id=payee_id,
+                    payer_owner_id=self.user.pk,
+                    payee_owner_id=payee_owner_id,
+                    amount=data['amount'],
+                    date=data['date'],
+                    description=data.get('description'),
+                    status=row_status,
+                    mode_id=data.get('mode'),
+                    category_id=data.get('category'),
+                )
+            )
+        errors.sort(key=lambda error: error['row'])
+        return valid, errors
+
+    def load_references(self, rows):
+        entity_ids, mode_ids = set(), set()
+        for data in rows:
+            entity_ids.update(pk for pk in (data['payer'], data['payee'], data.get('category')) if pk is not None)
+            if data.get('mode') is not None:
+                mode_ids.add(data['mode'])
+        entities = Entity.objects.only('owner', 'type').in_bulk(entity_ids)
+        modes = dict(Payment_Mode.objects.filter(pk__in=mode_ids, owner=self.user).values_list('mode_id', 'app_key'))
+        return entities, modes
+
+    def check_references(self, data, entities, modes):
+        errors = {}
+        for field in ('payer', 'payee'):
+            if data[field] not in entities:
+                errors[field] = [f"Entity {data[field]} does not exist."]
+        if not errors and entities[data['payer']].owner_id != self.user.pk:
+            errors['payer'] = ["You must own the payer entity."]
+        category = data.get('category')
+        if category is not None:
+            entity = entities.get(category)
+            if entity is None or entity.owner_id != self.user.pk or entity.type != 'CATEGORY':
+                errors['category'] = [f"Category {category} is not one of your categories."]
+        if data.get('mode') is not None and data['mode'] not in modes:
+            errors['mode'] = [f"Payment mode {data['mode']} is not one of your payment modes."]
+        return errors
@@ -0,0 +1,189 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import F, Q
+
+from .balances import transaction_deltas
+from .models import Posting, Transaction
+
+
+def _after(date, transaction_id):
+    """Postings strictly later than (date, transaction_id) in ledger order."""
+    return Q(date__gt=date) | Q(date=date, transaction_id__gt=transaction_id)
+
+
+def _not_after(date, transaction_id):
+    return Q(date__lt=date) | Q(date=date, transaction_id__lte=transaction_id)
+
+
+def _before(date, transaction_id):
+    return Q(date__lt=date) | Q(date=date, transaction_id__lt=transaction_id)
+
+
+def add_postings(instance):
+    """
+    Append the postings of a COMPLETED transaction. A backdated transaction
+    shifts the running total of every later posting of the same entity by its
+    amount (one UPDATE per entity) instead of recomputing the ledger.
+
+    Callers must hold the entity row locks (post_balance_deltas takes them),
+    which serializes concurrent ledger writes per entity.
+    """
+    for entity_id, amount in transaction_deltas(instance).items():
+        if not amount:
+            continue
+        ledger = Posting.objects.filter(entity_id=entity_id)
+        ledger.filter(_after(instance.date, instance.pk)).update(running_total=F('running_total') + amount)
+        previous = (
+            ledger.filter(_not_after(instance.date, instance.pk))
+            .order_by('-date', '-transaction_id')
+            .values_list('running_total', flat=True)
+            .first()
+        )
+        Posting.objects.create(
+            entity_id=entity_id,
+            transaction_id=instance.pk,
+            date=instance.date,
+            amount=amount,
+            running_total=(previous or Decimal('0')) + amount,
+        )
+
+
+def add_postings_many(instances):
+    """
+    Append the postings of many newly COMPLETED transactions, one entity at a
+    time: the running total before the entity's earliest new posting and the
+    postings after it are read once, the merged ledger tail is recomputed in
+    Python, and the new postings and shifted totals are written with one
+    bulk INSERT and one bulk UPDATE per entity.
+
+    Same locking contract as add_postings.
+    """
+    new = defaultdict(list)
+    for instance in instances:
+        for entity_id, amount in transaction_deltas(instance).items():
+            if amount:
+                new[entity_id].append((instance.date, instance.pk, amount))
+    for entity_id in sorted(new):
+        rows = sorted(new[entity_id])
+        first_date, first_id, _ = rows[0]
+        ledger = Posting.objects.filter(entity_id=entity_id)
+        running_total = (
+            ledger.filter(_before(first_date, first_id))
+            .order_by('-date', '-transaction_id')
+            .values_list('running_total', flat=True)
+            .first()
+        ) or Decimal('0')
+        later = list(ledger.filter(_after(first_date, first_id)).order_by('date', 'transaction_id'))
+        merged = sorted(
+            [(date, transaction_id, amount, None) for date, transaction_id, amount in rows]
+            + [(posting.date, posting.transaction_id, posting.amount, posting) for posting in later],
+            key=lambda row: row[:2],
+        )
+        created, shifted = [], []
+        for date, transaction_id, amount, posting in merged:
+            running_total += amount
+            if posting is None:
+                created.append(
+                    Posting(
+                        entity_id=entity_id,
+                        transaction_id=transaction_id,
+                        date=date,
+                        amount=amount,
+                        running_total=running_total,
+                    )
+                )
+            elif posting.running_total != running_total:
+                posting.running_total = running_total
+                shifted.append(posting)
+        Posting.objects.bulk_create(created)
+        Posting.objects.bulk_update(shifted, ['running_total'])
+
+
+def remove_postings(instance):
+    """
+    Drop the postings of a transaction that is no longer COMPLETED as stored
+    (or was deleted), and shift later running totals back.
+    """
+    for entity_id, amount in transaction_deltas(instance).items():
+        if not amount:
+            continue
+        ledger = Posting.objects.filter(entity_id=entity_id)
+        ledger.filter(transaction_id=instance.pk).delete()
+        ledger.filter(_after(instance.date, instance.pk)).update(running_total=F('running_total') - amount)
+
+
+def apply_change(before, after):
+    """
+    Move the ledger from the stored state `before` to `after` (either may be
+    None). Edits that cannot change a posting leave the ledger untouched.
+    """
+    if before is not None and after is not None and all(
+        getattr(before, field) == getattr(after, field) for field in ('payer_id', 'payee_id', 'amount', 'status', 'date')
+    ):
+        return
+    if before is not None:
+        remove_postings(before)
+    if after is not None:
+        add_postings(after)
+
+
+def _balance_through(entity, postings):
+    running_total = postings.order_by('-date', '-transaction_id').values_list('running_total', flat=True).first()
+    return entity.opening_balance + (running_total or Decimal('0'))
+
+
+def balance_at(entity, at):
+    """
+    Balance of `entity` at instant `at`, including every COMPLETED transaction
+    dated at or before it: one seek on the (entity, date, transaction) index.
+    """
+    return _balance_through(entity, Posting.objects.filter(entity=entity, date__lte=at))
+
+
+def balance_before(entity, position=None):
+    """
+    Balance of `entity` counting only transactions strictly before the ledger
+    position `(date, transaction_id)`, or all of them when position is None.
+    """
+    postings = Posting.objects.filter(entity=entity)
+    if position is not None:
+        postings = postings.filter(_before(*position))
+    return _balance_through(entity, postings)
+
+
+def rebuild_postings(entity_ids, batch_size=5000):
+    """
+    Recompute the postings of `entity_ids` from scratch, streaming each
+    entity's COMPLETED transactions in ledger order.
+    """
+    Posting.objects.filter(entity_id__in=entity_ids).delete()
+    completed = Transaction.objects.filter(status='COMPLETED').order_by('date', 'transaction_id')
+    created = 0
+    for entity_id in entity_ids:
+        running_total = Decimal('0')
+        batch = []
+        rows = completed.filter(Q(payer_id=entity_id) | Q(payee_id=entity_id)).values_list(
+            'transaction_id', 'date', 'payer_id', 'payee_id', 'amount'
+        )
+        for transaction_id, date, payer_id, payee_id, amount in rows.iterator(chunk_size=batch_size):
+            if payer_id == payee_id:
+                continue
+            amount = amount if payee_id == entity_id else -amount
+            running_total += amount
+            batch.append(
+                Posting(
+                    entity_id=entity_id,
+                    transaction_id=transaction_id,
+                    date=date,
+                    amount=amount,
+                    running_total=running_total,
+                )
+            )
+            if len(batch) >= batch_size:
+                Posting.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        Posting.objects.bulk_create(batch)
+        created += len(batch)
+    return created
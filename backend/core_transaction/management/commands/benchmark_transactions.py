@@ -0,0 +1,210 @@
+import random
+import statistics
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core_transaction.ledger import balance_at, rebuild_postings
+from core_transaction.models import Transaction
+from core_transaction.pagination import TransactionCursorPagination
+from core_transaction.views import TransactionViewSet
+from entities.models import Entity
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway ledger and time the transaction read paths. "
+        "Everything runs inside one database transaction that is rolled back "
+        "at the end unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            nargs="+",
+            default=[100_000, 1_000_000],
+            help="Ledger sizes to benchmark; each size is seeded from scratch.",
+        )
+        parser.add_argument("--page-size", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement; the median is reported.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--keep", action="store_true", help="Commit the seeded rows instead of rolling back.")
+
+    def handle(self, *args, **options):
+        self.repeat = options["repeat"]
+        self.page_size = options["page_size"]
+        random.seed(options["seed"])
+
+        for rows in options["rows"]:
+            with transaction.atomic():
+                user = self.seed(rows)
+                self.bench_pagination(user)
+                self.bench_visibility(user)
+                self.bench_ledger(user)
+                if not options["keep"]:
+                    transaction.set_rollback(True)
+
+    # ------------------------------------------------------------------ seeding
+
+    def seed(self, rows, batch_size=10_000):
+        """
+        Create a benchmark user plus a few neighbours and spread `rows`
+        COMPLETED transactions over them. Roughly half the rows touch the
+        benchmark user so visibility filters have real work to do; one in ten
+        is a transfer to another user's entity.
+        """
+        suffix = uuid.uuid4().hex[:8]
+        users = [
+            User.objects.create_user(email=f"bench_{suffix}_{i}@example.com", username=f"bench_{suffix}_{i}")
+            for i in range(4)
+        ]
+        entities = {
+            user.pk: Entity.objects.bulk_create(
+                [Entity(owner=user, name=f"Account {n}", type="ACCOUNT") for n in range(5)]
+                + [Entity(owner=user, name=f"Payee {n}", type="EXTERNAL_PAYEE") for n in range(20)]
+            )
+            for user in users
+        }
+        main, others = users[0], users[1:]
+
+        start = timezone.now() - timedelta(days=3 * 365)
+        span = 3 * 365 * 24 * 3600
+        created = 0
+        self.stdout.write(f"Seeding {rows:,} transactions...")
+        t0 = time.perf_counter()
+        while created < rows:
+            batch = []
+            for _ in range(min(batch_size, rows - created)):
+                owner = main if random.random() < 0.5 else random.choice(others)
+                payer, payee = random.sample(entities[owner.pk], 2)
+                if random.random() < 0.1:
+                    payee = random.choice(entities[random.choice(users).pk])
+                batch.append(
+                    Transaction(
+                        payer=payer,
+                        payee=payee,
+                        payer_owner_id=payer.owner_id,
+                        payee_owner_id=payee.owner_id,
+                        amount=Decimal(random.randint(100, 500_000)) / 100,
+                        date=start + timedelta(seconds=random.randrange(span)),
+                        status="COMPLETED",
+                    )
+                )
+            Transaction.objects.bulk_create(batch)
+            created += len(batch)
+        self.stdout.write(f"  done in {time.perf_counter() - t0:.1f}s")
+        return main
+
+    # ------------------------------------------------------------ measurements
+
+    def timed(self, fn):
+        samples = []
+        for _ in range(self.repeat):
+            t0 = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - t0) * 1000)
+        return statistics.median(samples)
+
+    def make_request(self, user, params):
+        request = Request(APIRequestFactory().get("/api/transactions/", params, HTTP_HOST="localhost"))
+        request.user = user
+        return request
+
+    def get_view(self, request):
+        return TransactionViewSet(request=request, format_kwarg=None, action="list")
+
+    def get_queryset(self, request):
+        return self.get_view(request).get_queryset()
+
+    def bench_pagination(self, user):
+        """
+        Keyset pages vs the equivalent OFFSET query at increasing depth.
+        """
+        request = self.make_request(user, {"page_size": self.page_size})
+        queryset = self.get_queryset(request).order_by(*TransactionCursorPagination.ordering)
+        total = queryset.count()
+        self.stdout.write(f"\nPagination ({total:,} visible rows, page size {self.page_size})")
+        self.stdout.write(f"  {'depth':>10} {'keyset ms':>10} {'offset ms':>10}")
+
+        paginator = TransactionCursorPagination()
+        for fraction in (0, 0.1, 0.5, 0.99):
+            offset = min(int(total * fraction), max(total - self.page_size, 0))
+            params = {"page_size": self.page_size}
+            if offset:
+                # Position of the row just before the page we want (not timed).
+                last = queryset.values("date", "transaction_id")[offset - 1]
+                params["cursor"] = paginator.make_token([last["date"], last["transaction_id"]])
+            page_request = self.make_request(user, params)
+
+            keyset_ms = self.timed(
+                lambda: TransactionCursorPagination().paginate_queryset(
+                    self.get_queryset(page_request), page_request, self.get_view(page_request)
+                )
+            )
+            offset_ms = self.timed(lambda: list(queryset[offset : offset + self.page_size]))
+            self.stdout.write(f"  {offset:>10,} {keyset_ms:>10.2f} {offset_ms:>10.2f}")
+
+    def bench_visibility(self, user):
+        """
+        First page and full count of the user's feed under the original
+        join + OR + DISTINCT plan, an OR on the denormalized owner columns, and
+        the per-branch merge the paginator uses (page only).
+        """
+        legacy = (
+            Transaction.objects.filter(Q(payer__owner=user) | Q(payee__owner=user))
+            .distinct()
+            .order_by(*TransactionCursorPagination.ordering)
+        )
+        denormalized = Transaction.objects.visible_to(user).order_by(*TransactionCursorPagination.ordering)
+        request = self.make_request(user, {"page_size": self.page_size})
+
+        def branches():
+            TransactionCursorPagination().paginate_queryset(self.get_queryset(request), request, self.get_view(request))
+
+        self.stdout.write(f"\nVisibility plans (page size {self.page_size})")
+        self.stdout.write(f"  {'plan':<24} {'page ms':>10} {'count ms':>10}")
+        self.stdout.write(
+            f"  {'join + OR + DISTINCT':<24} {self.timed(lambda: list(legacy[: self.page_size])):>10.2f}"
+            f" {self.timed(legacy.count):>10.2f}"
+        )
+        self.stdout.write(
+            f"  {'owner columns, OR':<24} {self.timed(lambda: list(denormalized[: self.page_size])):>10.2f}"
+            f" {self.timed(denormalized.count):>10.2f}"
+        )
+        self.stdout.write(f"  {'owner columns, branches':<24} {self.timed(branches):>10.2f} {'-':>10}")
+
+    def bench_ledger(self, user):
+        """
+        Balance-as-of-date for the user's busiest account: one seek on the
+        posting ledger vs summing the transaction history up to that date.
+        """
+        entity_ids = list(Entity.objects.filter(owner=user).order_by("pk").values_list("pk", flat=True))
+        t0 = time.perf_counter()
+        postings = rebuild_postings(entity_ids)
+        self.stdout.write(f"\nPosting ledger ({postings:,} postings rebuilt in {time.perf_counter() - t0:.1f}s)")
+
+        entity = Entity.objects.get(pk=entity_ids[0])
+        completed = Transaction.objects.filter(status="COMPLETED")
+
+        def scan(at):
+            incoming = completed.filter(payee=entity, date__lte=at).aggregate(total=Sum("amount"))["total"] or 0
+            outgoing = completed.filter(payer=entity, date__lte=at).aggregate(total=Sum("amount"))["total"] or 0
+            return entity.opening_balance + incoming - outgoing
+
+        self.stdout.write(f"  {'as of':<12} {'ledger ms':>10} {'scan ms':>10}")
+        now = timezone.now()
+        for days_ago in (3 * 365, 365, 30, 0):
+            at = now - timedelta(days=days_ago)
+            ledger_ms = self.timed(lambda: balance_at(entity, at))
+            scan_ms = self.timed(lambda: scan(at))
+            self.stdout.write(f"  {at:%Y-%m-%d}   {ledger_ms:>10.2f} {scan_ms:>10.2f}")
@@ -0,0 +1,50 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core_transaction.importer import TransactionImporter, parse_rows
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Import transactions from a JSON array or CSV file (header row: "
+        "payer,payee,amount,date[,description,status,mode,category]) on behalf "
+        "of a user. Same validation and balance posting as POST /api/transactions/bulk/."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to a .json or .csv file.")
+        parser.add_argument("--user", required=True, help="Email of the importing user.")
+        parser.add_argument("--format", choices=["json", "csv"], help="Defaults to the file extension.")
+        parser.add_argument(
+            "--partial", action="store_true", help="Insert valid rows and report invalid ones instead of aborting."
+        )
+        parser.add_argument("--chunk-size", type=int, help="Rows per bulk INSERT.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}")
+
+        fmt = options["format"] or os.path.splitext(options["path"])[1].lstrip(".").lower()
+        try:
+            with open(options["path"], "rb") as handle:
+                rows = parse_rows(handle.read(), fmt)
+        except (OSError, ValueError, UnicodeDecodeError) as exc:
+            raise CommandError(str(exc))
+
+        t0 = time.perf_counter()
+        importer = TransactionImporter(user, partial=options["partial"], chunk_size=options["chunk_size"])
+        result = importer.run(rows)
+        elapsed = time.perf_counter() - t0
+
+        for error in result["errors"]:
+            self.stderr.write(f"row {error['row']}: {error['errors']}")
+        if result["errors"] and not options["partial"]:
+            raise CommandError(f"{len(result['errors'])} invalid rows; nothing was imported.")
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported {len(result['created'])} of {len(rows)} transactions in {elapsed:.1f}s.")
+        )
@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core_transaction.models import CategoryRollup
+from core_transaction.rollups import aggregate_rollups, rebuild_rollups
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the monthly category rollups from transactions with one "
+        "aggregation per chunk of owners. With --check, only compare the stored "
+        "rollups against a fresh aggregation and report differences."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--owner", type=int, action="append", help="Only these user ids (repeatable).")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Owners per transaction.")
+        parser.add_argument("--check", action="store_true", help="Report differences without changing anything.")
+
+    def handle(self, *args, **options):
+        owners = User.objects.order_by("pk").values_list("pk", flat=True)
+        if options["owner"]:
+            owners = owners.filter(pk__in=options["owner"])
+        owners = list(owners)
+
+        size = options["chunk_size"]
+        t0 = time.perf_counter()
+        total = 0
+        for start in range(0, len(owners), size):
+            chunk = owners[start : start + size]
+            if options["check"]:
+                total += self.check_chunk(chunk)
+                continue
+            with transaction.atomic():
+                total += rebuild_rollups(chunk)
+            self.stdout.write(f"{min(start + size, len(owners))}/{len(owners)} owners, {total} rollups")
+
+        summary = f"{total} mismatched rollups" if options["check"] else f"Rebuilt {total} rollups"
+        self.stdout.write(
+            self.style.SUCCESS(f"{summary} for {len(owners)} owners in {time.perf_counter() - t0:.1f}s")
+        )
+
+    def check_chunk(self, owners):
+        def key(rollup):
+            return (rollup.entity_id, rollup.month, rollup.status)
+
+        stored = {key(r): (r.total, r.count) for r in CategoryRollup.objects.filter(owner_id__in=owners)}
+        expected = {key(r): (r.total, r.count) for r in aggregate_rollups(owners)}
+        mismatched = 0
+        for entity_id, month, status in sorted(stored.keys() | expected.keys()):
+            have = stored.get((entity_id, month, status))
+            want = expected.get((entity_id, month, status))
+            if have != want:
+                mismatched += 1
+                self.stdout.write(f"  entity {entity_id} {month:%Y-%m} {status}: stored {have}, expected {want}")
+        return mismatched
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core_transaction.chats import rebuild_chat_summaries
+from users.models import User
+from users.response_cache import bump_versions
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the chat list summaries (last transaction and pending count of "
+        "every entity and user-pair chat) from transactions, to repair drift "
+        "(migration 0010 backfills existing data). Each chunk of owners is "
+        "rebuilt in its own transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--owner", type=int, action="append", help="Only these user ids (repeatable).")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Owners per transaction.")
+
+    def handle(self, *args, **options):
+        owners = User.objects.order_by("pk").values_list("pk", flat=True)
+        if options["owner"]:
+            owners = owners.filter(pk__in=options["owner"])
+        owners = list(owners)
+
+        size = options["chunk_size"]
+        t0 = time.perf_counter()
+        total = 0
+        for start in range(0, len(owners), size):
+            chunk = owners[start : start + size]
+            with transaction.atomic():
+                total += rebuild_chat_summaries(chunk)
+                bump_versions(*chunk)
+            self.stdout.write(f"{min(start + size, len(owners))}/{len(owners)} owners, {total} summaries")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {total} chat summaries for {len(owners)} owners in {time.perf_counter() - t0:.1f}s"
+            )
+        )
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core_transaction.ledger import rebuild_postings
+from entities.models import Entity
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the posting ledger (signed entries with running totals) from "
+        "COMPLETED transactions, to repair entities (migration 0008 backfills "
+        "existing data). Each chunk of entities is rebuilt in its own "
+        "transaction with those entity rows locked."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--entity", type=int, action="append", help="Only rebuild these entity ids (repeatable).")
+        parser.add_argument("--owner", type=int, action="append", help="Only rebuild entities of these user ids.")
+        parser.add_argument("--chunk-size", type=int, default=200, help="Entities per transaction.")
+
+    def handle(self, *args, **options):
+        entities = Entity.objects.order_by("pk")
+        if options["entity"]:
+            entities = entities.filter(pk__in=options["entity"])
+        if options["owner"]:
+            entities = entities.filter(owner__in=options["owner"])
+        entity_ids = list(entities.values_list("pk", flat=True))
+
+        size = options["chunk_size"]
+        t0 = time.perf_counter()
+        total = 0
+        for start in range(0, len(entity_ids), size):
+            chunk = entity_ids[start : start + size]
+            with transaction.atomic():
+                # Same lock order as post_balance_deltas, so live postings wait for us.
+                list(Entity.objects.select_for_update().filter(pk__in=chunk).order_by("pk").values_list("pk", flat=True))
+                total += rebuild_postings(chunk)
+            self.stdout.write(f"{min(start + size, len(entity_ids))}/{len(entity_ids)} entities, {total} postings")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {total} postings for {len(entity_ids)} entities in {time.perf_counter() - t0:.1f}s"
+            )
+        )
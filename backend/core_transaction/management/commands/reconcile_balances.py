@@ -0,0 +1,100 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from core_transaction.balances import accept_drift, ledger_drift, post_balance_deltas
+from entities.models import Entity
+from sync.changes import record_changes
+from sync.models import SyncChange
+from users.models import User
+from users.response_cache import bump_versions
+
+
+def _init_worker():
+    # Spawned workers need Django set up; forked ones must not reuse the
+    # parent's database connection.
+    import django
+
+    django.setup()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every Entity balance as opening_balance plus its COMPLETED "
+        "transactions and fix (or, with --dry-run, only report; with --accept-drift, "
+        "adopt into opening_balance) mismatches. "
+        "Owners are processed in chunks across a process pool; each chunk is "
+        "one read-only query, and fixes are applied as small atomic deltas, so "
+        "no long locks are held."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report mismatches without changing anything.")
+        parser.add_argument(
+            "--accept-drift",
+            action="store_true",
+            help=(
+                "Keep the stored balances and move each mismatch into opening_balance instead. "
+                "For balances known to be right whose opening balance is unknown (e.g. entities "
+                "posted to before the ledger existed); review them with --dry-run first."
+            ),
+        )
+        parser.add_argument("--chunk-size", type=int, default=500, help="Owners per chunk.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=min(4, os.cpu_count() or 1),
+            help="Worker processes; 0 runs every chunk in this process.",
+        )
+        parser.add_argument("--owner", type=int, action="append", help="Limit to these user ids (repeatable).")
+
+    def handle(self, *args, **options):
+        owners = User.objects.order_by("pk").values_list("pk", flat=True)
+        if options["owner"]:
+            owners = owners.filter(pk__in=options["owner"])
+        owners = list(owners)
+        size = options["chunk_size"]
+        chunks = [owners[i : i + size] for i in range(0, len(owners), size)]
+
+        t0 = time.perf_counter()
+        mismatches = 0
+        for done, drift in enumerate(self.scan(chunks, options["workers"]), start=1):
+            mismatches += len(drift)
+            for entity_id, stored, expected in drift:
+                self.stdout.write(
+                    f"  entity {entity_id}: stored {stored}, ledger {expected} (off by {stored - expected})"
+                )
+            if drift and options["accept_drift"] and not options["dry_run"]:
+                accept_drift(drift)
+            elif drift and not options["dry_run"]:
+                # A delta, not an absolute value: postings committed since the
+                # scan moved balance and ledger together, so the drift still holds.
+                fixed = Entity.objects.filter(pk__in=[entity_id for entity_id, _, _ in drift]).values_list(
+                    "pk", "owner_id"
+                )
+                with transaction.atomic():
+                    post_balance_deltas({entity_id: expected - stored for entity_id, stored, expected in drift})
+                    record_changes((owner_id, SyncChange.MODEL_ENTITY, pk, False) for pk, owner_id in fixed)
+                bump_versions(*chunks[done - 1])
+            self.stdout.write(f"chunk {done}/{len(chunks)}: {len(drift)} mismatched, {mismatches} so far")
+
+        verb = "found" if options["dry_run"] else "accepted" if options["accept_drift"] else "fixed"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {mismatches} mismatched balances across {len(owners)} owners "
+                f"in {time.perf_counter() - t0:.1f}s"
+            )
+        )
+
+    def scan(self, chunks, workers):
+        if workers <= 0 or len(chunks) <= 1:
+            for chunk in chunks:
+                yield ledger_drift(chunk)
+            return
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            yield from pool.map(ledger_drift, chunks)
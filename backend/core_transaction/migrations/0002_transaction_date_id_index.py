@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core_transaction", "0001_initial"),
+        ("entities", "0003_entity_current_balance"),
+        ("payment_modes", "0004_alter_payment_mode_linked_entity"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["-date", "-transaction_id"], name="core_transa_date_dba1c3_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_owners(apps, schema_editor):
+    Transaction = apps.get_model("core_transaction", "Transaction")
+    Entity = apps.get_model("entities", "Entity")
+    Transaction.objects.update(
+        payer_owner=Subquery(Entity.objects.filter(pk=OuterRef("payer")).values("owner")[:1]),
+        payee_owner=Subquery(Entity.objects.filter(pk=OuterRef("payee")).values("owner")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core_transaction", "0002_transaction_date_id_index"),
+        ("entities", "0003_entity_current_balance"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Added nullable, backfilled from Entity.owner, then made required.
+        migrations.AddField(
+            model_name="transaction",
+            name="payer_owner",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="payee_owner",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(backfill_owners, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="transaction",
+            name="payer_owner",
+            field=models.ForeignKey(
+                editable=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="transaction",
+            name="payee_owner",
+            field=models.ForeignKey(
+                editable=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["payer_owner", "-date", "-transaction_id"],
+                name="core_transa_payer_o_97fda5_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["payee_owner", "-date", "-transaction_id"],
+                name="core_transa_payee_o_938d7f_idx",
+            ),
+        ),
+    ]
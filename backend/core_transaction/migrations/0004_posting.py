@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core_transaction", "0003_transaction_owner_columns"),
+        ("entities", "0004_entity_opening_balance"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Posting",
+            fields=[
+                ("posting_id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("date", models.DateTimeField()),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=19)),
+                ("running_total", models.DecimalField(decimal_places=2, max_digits=19)),
+                (
+                    "entity",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="postings",
+                        to="entities.entity",
+                    ),
+                ),
+                (
+                    "transaction",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="postings",
+                        to="core_transaction.transaction",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["entity", "date", "transaction"],
+                        name="core_transa_entity__597cf7_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("entity", "transaction"),
+                        name="unique_posting_per_entity",
+                    )
+                ],
+            },
+        ),
+    ]
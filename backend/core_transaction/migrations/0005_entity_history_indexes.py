@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core_transaction", "0004_posting"),
+        ("entities", "0004_entity_opening_balance"),
+        ("payment_modes", "0004_alter_payment_mode_linked_entity"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["payer", "-date", "-transaction_id"],
+                name="core_transa_payer_i_866222_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["payee", "-date", "-transaction_id"],
+                name="core_transa_payee_i_4a46c9_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["category", "-date", "-transaction_id"],
+                name="core_transa_categor_29784c_idx",
+            ),
+        ),
+    ]
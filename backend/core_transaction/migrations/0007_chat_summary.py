@@ -0,0 +1,95 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core_transaction", "0006_category_rollup"),
+        ("entities", "0005_entity_chat_list_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChatSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("last_transaction_id", models.IntegerField(blank=True, null=True)),
+                (
+                    "last_amount",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=19, null=True
+                    ),
+                ),
+                ("last_date", models.DateTimeField(blank=True, null=True)),
+                ("pending_count", models.PositiveIntegerField(default=0)),
+                (
+                    "entity",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="chat_summary",
+                        to="entities.entity",
+                    ),
+                ),
+                (
+                    "high_user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "low_user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Chat summaries",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("low_user", "high_user"),
+                        name="unique_chat_summary_per_user_pair",
+                    ),
+                    models.CheckConstraint(
+                        condition=models.Q(
+                            models.Q(
+                                ("entity__isnull", False),
+                                ("high_user__isnull", True),
+                                ("low_user__isnull", True),
+                            ),
+                            models.Q(
+                                ("entity__isnull", True),
+                                ("high_user__isnull", False),
+                                ("low_user__isnull", False),
+                            ),
+                            _connector="OR",
+                        ),
+                        name="chat_summary_entity_xor_user_pair",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:10
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import F
+
+BATCH_SIZE = 5000
+
+
+def backfill(apps, schema_editor):
+    """
+    Fill the posting ledger from the existing COMPLETED transactions, the way
+    rebuild_postings does. It uses the historical models, so it works whatever
+    that command looks like later.
+    """
+    Transaction = apps.get_model('core_transaction', 'Transaction')
+    Posting = apps.get_model('core_transaction', 'Posting')
+
+    Posting.objects.all().delete()
+
+    # One pass in ledger order, keeping each entity's running total.
+    running_totals = defaultdict(Decimal)
+    postings = []
+    rows = (
+        Transaction.objects.filter(status='COMPLETED')
+        .exclude(payer_id=F('payee_id'))
+        .order_by('date', 'transaction_id')
+        .values_list('transaction_id', 'amount', 'date', 'payer_id', 'payee_id')
+    )
+    for pk, amount, date, payer_id, payee_id in rows.iterator(chunk_size=BATCH_SIZE):
+        for entity_id, signed in ((payer_id, -amount), (payee_id, amount)):
+            running_totals[entity_id] += signed
+            postings.append(
+                Posting(
+                    entity_id=entity_id,
+                    transaction_id=pk,
+                    date=date,
+                    amount=signed,
+                    running_total=running_totals[entity_id],
+                )
+            )
+        if len(postings) >= BATCH_SIZE:
+            Posting.objects.bulk_create(postings)
+            postings = []
+    Posting.objects.bulk_create(postings)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_transaction', '0007_chat_summary'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:10
+
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import Round, TruncMonth
+
+
+def backfill(apps, schema_editor):
+    """
+    Fill the category rollups from the existing transactions, the way
+    rebuild_category_rollups does. It uses the historical models, so it works
+    whatever that command looks like later.
+    """
+    Transaction = apps.get_model('core_transaction', 'Transaction')
+    CategoryRollup = apps.get_model('core_transaction', 'CategoryRollup')
+
+    CategoryRollup.objects.all().delete()
+
+    # Amounts are summed in cents so SQLite does not add them up as floats.
+    groups = (
+        Transaction.objects.filter(category__isnull=False)
+        .order_by()
+        .annotate(month=TruncMonth('date', output_field=DateField()))
+        .values_list('category__owner_id', 'category_id', 'month', 'status')
+        .annotate(cents=Sum(Round(F('amount') * 100)), count=Count('pk'))
+    )
+    CategoryRollup.objects.bulk_create(
+        (
+            CategoryRollup(
+                owner_id=owner_id,
+                entity_id=entity_id,
+                month=month,
+                status=status,
+                total=Decimal(int(cents)).scaleb(-2),
+                count=count,
+            )
+            for owner_id, entity_id, month, status, cents, count in groups
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_transaction', '0008_backfill_postings'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.8 on 2026-10-18 21:10
+
+from django.db import migrations
+
+BATCH_SIZE = 5000
+
+
+def backfill(apps, schema_editor):
+    """
+    Fill the chat summaries from the existing transactions, the way
+    rebuild_chat_summaries does. It uses the historical models, so it works
+    whatever that command looks like later.
+    """
+    Transaction = apps.get_model('core_transaction', 'Transaction')
+    ChatSummary = apps.get_model('core_transaction', 'ChatSummary')
+
+    ChatSummary.objects.all().delete()
+
+    # One pass in transaction order; the last row seen is each chat's latest.
+    summaries = {}
+    rows = Transaction.objects.order_by('date', 'transaction_id').values_list(
+        'transaction_id', 'amount', 'date', 'status', 'payer_id', 'payee_id', 'payer_owner_id', 'payee_owner_id'
+    )
+    for pk, amount, date, status, payer_id, payee_id, payer_owner_id, payee_owner_id in rows.iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        chats = [('entity', entity_id) for entity_id in {payer_id, payee_id}]
+        if payer_owner_id != payee_owner_id:
+            chats.append(('users', *sorted((payer_owner_id, payee_owner_id))))
+        for chat in chats:
+            if chat not in summaries:
+                if chat[0] == 'entity':
+                    summaries[chat] = ChatSummary(entity_id=chat[1])
+                else:
+                    summaries[chat] = ChatSummary(low_user_id=chat[1], high_user_id=chat[2])
+            summary = summaries[chat]
+            summary.last_transaction_id, summary.last_amount, summary.last_date = pk, amount, date
+            summary.pending_count += status == 'PENDING'
+    ChatSummary.objects.bulk_create(summaries.values(), batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_transaction', '0009_backfill_category_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
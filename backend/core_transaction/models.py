@@ -1,7 +1,74 @@
-from django.db import models
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import models, transaction
 from entities.models import Entity
 from payment_modes.models import Payment_Mode
 
+
+class TransactionQuerySet(models.QuerySet):
+    def for_display(self):
+        """
+        Preload everything TransactionSerializer renders, in the same query.
+        """
+        return self.select_related('payer', 'payee', 'mode', 'category')
+
+    def visible_to(self, user):
+        """
+        Transactions where `user` owns the payer or the payee entity.
+        Uses the denormalized owner columns, so there is no join on Entity
+        and no DISTINCT.
+        """
+        return self.filter(models.Q(payer_owner=user) | models.Q(payee_owner=user))
+
+    def entity_history(self, entity, balance_after_first):
+        """
+        Transactions where `entity` is payer, payee or category, annotated with
+        `signed_amount` (its effect on the entity's balance) and
+        `running_balance` (the entity's balance right after each row).
+
+        The running balance is a window SUM over the rows in feed order
+        (newest first) anchored at `balance_after_first`, the balance after
+        the first row the query returns; keyset filters applied to this
+        queryset run before the window, so every page gets its own anchor.
+        """
+        completed = models.Q(status='COMPLETED')
+        signed_amount = models.Case(
+            models.When(completed & models.Q(payer=entity, payee=entity), then=models.Value(Decimal('0'))),
+            models.When(completed & models.Q(payee=entity), then=models.F('amount')),
+            models.When(completed & models.Q(payer=entity), then=-models.F('amount')),
+            default=models.Value(Decimal('0')),
+            output_field=models.DecimalField(max_digits=19, decimal_places=2),
+        )
+        newer_inclusive = models.Window(
+            models.Sum('signed_amount'),
+            order_by=[models.F('date').desc(), models.F('transaction_id').desc()],
+        )
+        return (
+            self.filter(models.Q(payer=entity) | models.Q(payee=entity) | models.Q(category=entity))
+            .annotate(signed_amount=signed_amount)
+            .annotate(
+                running_balance=models.ExpressionWrapper(
+                    models.Value(balance_after_first) - newer_inclusive + models.F('signed_amount'),
+                    output_field=models.DecimalField(max_digits=19, decimal_places=2),
+                )
+            )
+        )
+
+    def visibility_branches(self, user):
+        """
+        `visible_to` split into one queryset per side, each served by its own
+        (owner, date, transaction_id) index as a plain range scan. The branches
+        overlap on transfers between the user's own entities; callers merge
+        them and drop duplicates. Applied to a `visible_to(user)` queryset,
+        each branch's equality on its owner column still picks its index.
+        """
+        return [
+            self.filter(payer_owner=user),
+            self.filter(payee_owner=user),
+        ]
+
+
 class Transaction(models.Model):
     STATUS_CHOICES = [
         ('PENDING', 'Pending'),
@@ -45,8 +112,158 @@ class Transaction(models.Model):
         help_text="Optional category for classification"
     )
 
+    # Denormalized copies of payer.owner / payee.owner so that visibility
+    # checks never join Entity. Entity ownership cannot change, so these only
+    # need to be set when the payer/payee is assigned (see sync_owners).
+    payer_owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+        editable=False,
+    )
+    payee_owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+        editable=False,
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TransactionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Serves the keyset-paginated feed: ORDER BY date DESC, transaction_id DESC
+            models.Index(fields=["-date", "-transaction_id"]),
+            # One index per visibility branch (see TransactionQuerySet.visibility_branches)
+            models.Index(fields=["payer_owner", "-date", "-transaction_id"]),
+            models.Index(fields=["payee_owner", "-date", "-transaction_id"]),
+            # Per-entity chat history (TransactionQuerySet.entity_history)
+            models.Index(fields=["payer", "-date", "-transaction_id"]),
+            models.Index(fields=["payee", "-date", "-transaction_id"]),
+            models.Index(fields=["category", "-date", "-transaction_id"]),
+        ]
+
     def __str__(self):
         return f"{self.payer} -> {self.payee}: {self.amount} ({self.status})"
+
+    # Fields whose change moves money between entities or re-dates a posting
+    # (see signals.py).
+    BALANCE_FIELDS = frozenset(['payer', 'payee', 'amount', 'status', 'date'])
+    # Fields that move a transaction between category rollups (see rollups.py).
+    ROLLUP_FIELDS = frozenset(['category', 'amount', 'status', 'date'])
+
+    def save(self, *args, **kwargs):
+        self.sync_owners()
+        # One database transaction around pre_save/INSERT-or-UPDATE/post_save,
+        # so the balance signals can lock the old row and post the difference
+        # atomically with the write.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def sync_owners(self):
+        """
+        Copy the owners of payer/payee onto the row. Must be called explicitly
+        before bulk_create, which bypasses save().
+        """
+        self.payer_owner_id = self.payer.owner_id
+        self.payee_owner_id = self.payee.owner_id
+
+
+class Posting(models.Model):
+    """
+    One side of a COMPLETED transaction in an entity's ledger: a signed amount
+    (credit > 0, debit < 0) plus the entity's running total up to and including
+    this posting, in (date, transaction_id) order. The balance at any instant
+    is opening_balance + the running total of the last posting before it,
+    which is a single index seek (see core_transaction/ledger.py).
+    """
+
+    posting_id = models.BigAutoField(primary_key=True)
+    entity = models.ForeignKey(Entity, on_delete=models.CASCADE, related_name='postings')
+    transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, related_name='postings')
+    date = models.DateTimeField()
+    amount = models.DecimalField(max_digits=19, decimal_places=2)
+    running_total = models.DecimalField(max_digits=19, decimal_places=2)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['entity', 'transaction'], name='unique_posting_per_entity'),
+        ]
+        indexes = [
+            models.Index(fields=['entity', 'date', 'transaction']),
+        ]
+
+    def __str__(self):
+        return f"{self.entity_id} {self.amount:+} @ {self.date:%Y-%m-%d} = {self.running_total}"
+
+
+class CategoryRollup(models.Model):
+    """
+    Running totals of the transactions tagged with a CATEGORY entity, per
+    calendar month (in TIME_ZONE) and status, kept up to date by the
+    transaction signals so category analytics never scan transactions (see
+    core_transaction/rollups.py).
+    """
+
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    entity = models.ForeignKey(Entity, on_delete=models.CASCADE, related_name='rollups')
+    month = models.DateField(help_text="First day of the month")
+    status = models.CharField(max_length=20, choices=Transaction.STATUS_CHOICES)
+    total = models.DecimalField(max_digits=19, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['entity', 'month', 'status'], name='unique_rollup_per_entity_month_status'),
+        ]
+        indexes = [
+            models.Index(fields=['owner', 'month']),
+        ]
+
+    def __str__(self):
+        return f"{self.entity_id} {self.month:%Y-%m} {self.status}: {self.total} ({self.count})"
+
+
+class ChatSummary(models.Model):
+    """
+    Denormalized header of one chat for the chat list: its newest transaction
+    and how many of its transactions are PENDING. A chat is either an entity
+    (every transaction it pays or receives) or a pair of users (every
+    transaction between their entities), stored as (low_user, high_user) so
+    both sides share the row. Kept up to date by the transaction signals
+    (see core_transaction/chats.py).
+    """
+
+    entity = models.OneToOneField(
+        Entity, on_delete=models.CASCADE, null=True, blank=True, related_name='chat_summary'
+    )
+    low_user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='+'
+    )
+    high_user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='+'
+    )
+    # Plain columns rather than a foreign key: deleting the newest transaction
+    # must leave its id here so the signal can tell the summary needs a new one.
+    last_transaction_id = models.IntegerField(null=True, blank=True)
+    last_amount = models.DecimalField(max_digits=19, decimal_places=2, null=True, blank=True)
+    last_date = models.DateTimeField(null=True, blank=True)
+    pending_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['low_user', 'high_user'], name='unique_chat_summary_per_user_pair'),
+            models.CheckConstraint(
+                condition=models.Q(entity__isnull=False, low_user__isnull=True, high_user__isnull=True)
+                | models.Q(entity__isnull=True, low_user__isnull=False, high_user__isnull=False),
+                name='chat_summary_entity_xor_user_pair',
+            ),
+        ]
+        verbose_name_plural = "Chat summaries"
+
+    def __str__(self):
+        chat = f"entity {self.entity_id}" if self.entity_id else f"users {self.low_user_id}/{self.high_user_id}"
+        return f"{chat}: last {self.last_transaction_id}, {self.pending_count} pending"
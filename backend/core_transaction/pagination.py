@@ -0,0 +1,186 @@
+import base64
+import binascii
+import datetime
+import heapq
+import itertools
+import json
+import operator
+from decimal import Decimal
+from functools import reduce
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CursorEncoder(json.JSONEncoder):
+    """
+    Like DjangoJSONEncoder, but keeps full microsecond precision on datetimes
+    so that a cursor always points at exactly one row.
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.date)):
+            return o.isoformat()
+        if isinstance(o, Decimal):
+            return str(o)
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("seek") pagination over a composite, unique ordering.
+
+    Each page is fetched with a range predicate on the ordering columns that
+    starts right after the last row of the previous page, so a deep page costs
+    the same index range scan as the first one (no OFFSET). The cursor is an
+    opaque URL-safe token holding the ordering values of that last row.
+
+    Subclasses set `ordering`; every field must sort in the same direction and
+    the last one must be unique (usually the primary key) to break ties.
+
+    A view whose filter is an OR of independently indexed predicates can
+    define `get_keyset_branches(queryset)`, returning querysets whose union is
+    `queryset` (the list queryset, as filtered by the view), each built from
+    it by narrowing it further, so no filter of the view is lost. Each branch is then paged on its own index and the results are
+    merged (rows present in several branches are kept once), which avoids
+    OR/DISTINCT plans on large tables. With `union_branches = True` the
+    branches must be disjoint `values()` querysets with the same columns;
+    they are combined with UNION ALL and paged in a single query instead.
+    """
+
+    ordering = ()
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    cursor_query_param = "cursor"
+    union_branches = False
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        position = self.decode_cursor(request, queryset.model)
+        get_branches = getattr(view, "get_keyset_branches", None)
+        branches = get_branches(queryset) if get_branches is not None else [queryset]
+
+        # Fetch one extra row to know whether there is a next page.
+        limit = self.page_size + 1
+        if len(branches) == 1:
+            rows = list(self.seek(branches[0], position)[:limit])
+        elif self.union_branches:
+            first, *rest = [self.seek(branch, position).order_by() for branch in branches]
+            rows = list(first.union(*rest, all=True).order_by(*self.ordering)[:limit])
+        else:
+            pages = [list(self.seek(branch, position)[:limit]) for branch in branches]
+            reverse = self.ordering[0].startswith("-")
+            merged = heapq.merge(*pages, key=self.get_position, reverse=reverse)
+            # The ordering is unique, so duplicates from overlapping branches are adjacent.
+            unique = (next(group) for _, group in itertools.groupby(merged, key=self.get_position))
+            rows = list(itertools.islice(unique, limit))
+
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+        return self.page
+
+    @property
+    def fields(self):
+        return [field.lstrip("-") for field in self.ordering]
+
+    def seek(self, queryset, position):
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_seek_filter(position))
+        return queryset
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_seek_filter(self, position):
+        """
+        Build `(f1, f2, ...) < (v1, v2, ...)` (or `>` when ascending) as an OR of
+        prefix-equal comparisons. The redundant `f1 <= v1` conjunct gives the
+        planner a range bound on the leading index column, so the scan starts
+        at the cursor instead of filtering from the top of the index.
+        """
+        descending = self.ordering[0].startswith("-")
+        lookup = "lt" if descending else "gt"
+        clauses = []
+        for i, field in enumerate(self.fields):
+            conditions = dict(zip(self.fields[:i], position[:i]))
+            conditions[f"{field}__{lookup}"] = position[i]
+            clauses.append(Q(**conditions))
+        bound = Q(**{f"{self.fields[0]}__{lookup}e": position[0]})
+        return bound & reduce(operator.or_, clauses)
+
+    def get_position(self, item):
+        if isinstance(item, dict):
+            return [item[field] for field in self.fields]
+        return [getattr(item, field) for field in self.fields]
+
+    def make_token(self, position):
+        payload = json.dumps(position, cls=CursorEncoder, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def encode_cursor(self, position):
+        return replace_query_param(self.base_url, self.cursor_query_param, self.make_token(position))
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            position = json.loads(payload)
+            if not isinstance(position, list) or len(position) != len(self.fields):
+                raise ValueError
+            return [self.to_python(model, field, value) for field, value in zip(self.fields, position)]
+        except (binascii.Error, ValueError, TypeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def to_python(self, model, field, value):
+        try:
+            return model._meta.get_field(field).to_python(value)
+        except FieldDoesNotExist:
+            return value
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class TransactionCursorPagination(KeysetPagination):
+    """
+    Newest-first transaction feed. `transaction_id` breaks ties between rows
+    sharing the same `date`.
+    """
+
+    ordering = ("-date", "-transaction_id")
+    page_size = getattr(settings, "TRANSACTION_PAGE_SIZE", 50)
+    max_page_size = getattr(settings, "TRANSACTION_MAX_PAGE_SIZE", 500)
@@ -0,0 +1,108 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import Round, TruncMonth
+from django.utils import timezone
+
+from entities.models import Entity
+
+from .models import CategoryRollup, Transaction
+
+
+def month_of(date):
+    """First day of the month `date` falls in, in the current time zone (like TruncMonth)."""
+    return timezone.localtime(date).date().replace(day=1)
+
+
+def rollup_deltas(instance, sign=1):
+    """
+    Map (category_id, month, status) -> [amount, count] for one transaction;
+    sign=-1 takes it out of its rollup. Untagged transactions have none.
+    """
+    deltas = defaultdict(lambda: [Decimal('0'), 0])
+    if instance is None or instance.category_id is None:
+        return deltas
+    amount = Transaction._meta.get_field('amount').to_python(instance.amount)
+    key = (instance.category_id, month_of(instance.date), instance.status)
+    deltas[key][0] += sign * amount
+    deltas[key][1] += sign
+    return deltas
+
+
+def merge_rollup_deltas(*many):
+    merged = defaultdict(lambda: [Decimal('0'), 0])
+    for deltas in many:
+        for key, (amount, count) in deltas.items():
+            merged[key][0] += amount
+            merged[key][1] += count
+    return merged
+
+
+def rollup_change_deltas(before, after):
+    """Rollup moves for a transaction going from stored state `before` to `after` (either may be None)."""
+    return merge_rollup_deltas(rollup_deltas(before, sign=-1), rollup_deltas(after))
+
+
+def post_rollup_deltas(deltas):
+    """
+    Apply rollup deltas with one UPDATE per touched row, in key order so
+    concurrent writers lock rows in the same order. A missing row is created
+    (retrying as an UPDATE if a concurrent writer created it first), and a row
+    whose count drops to zero is removed so rollups match rebuild_rollups().
+    """
+    for (entity_id, month, status), (amount, count) in sorted(deltas.items()):
+        if not amount and not count:
+            continue
+        rows = CategoryRollup.objects.filter(entity_id=entity_id, month=month, status=status)
+        change = {'total': F('total') + amount, 'count': F('count') + count}
+        if rows.update(**change):
+            if count < 0:
+                rows.filter(count=0).delete()
+            continue
+        owner_id = Entity.objects.filter(pk=entity_id).values_list('owner_id', flat=True).get()
+        try:
+            with transaction.atomic():
+                CategoryRollup.objects.create(
+                    owner_id=owner_id, entity_id=entity_id, month=month, status=status, total=amount, count=count
+                )
+        except IntegrityError:
+            rows.update(**change)
+
+
+def aggregate_rollups(owner_ids=None):
+    """
+    Rollups computed from scratch with one GROUP BY over transactions, as
+    unsaved CategoryRollup rows. Amounts are summed in cents so SQLite does
+    not add them up as floats.
+    """
+    tagged = Transaction.objects.filter(category__isnull=False)
+    if owner_ids is not None:
+        tagged = tagged.filter(category__owner_id__in=owner_ids)
+    groups = (
+        tagged.order_by()
+        .annotate(month=TruncMonth('date', output_field=DateField()))
+        .values_list('category__owner_id', 'category_id', 'month', 'status')
+        .annotate(cents=Sum(Round(F('amount') * 100)), count=Count('pk'))
+    )
+    return [
+        CategoryRollup(
+            owner_id=owner_id,
+            entity_id=entity_id,
+            month=month,
+            status=status,
+            total=Decimal(int(cents)).scaleb(-2),
+            count=count,
+        )
+        for owner_id, entity_id, month, status, cents, count in groups
+    ]
+
+
+def rebuild_rollups(owner_ids=None, batch_size=1000):
+    """Replace the rollups of `owner_ids` (or everyone) with a full aggregation."""
+    rollups = CategoryRollup.objects.all()
+    if owner_ids is not None:
+        rollups = rollups.filter(owner_id__in=owner_ids)
+    rollups.delete()
+    return len(CategoryRollup.objects.bulk_create(aggregate_rollups(owner_ids), batch_size=batch_size))
@@ -1,20 +1,85 @@
 from rest_framework import serializers
 from .models import Transaction
-from entities.serializers import EntitySerializer
+from entities.serializers import CachedEntityRenderer
 from payment_modes.serializers import PaymentModeSerializer
 
 class TransactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transaction
-        fields = '__all__'
+        exclude = ['payer_owner', 'payee_owner']
         read_only_fields = ['transaction_id', 'created_at', 'updated_at']
 
+    def validate_category(self, value):
+        """Tag with one of the requester's own CATEGORY entities only (like TransactionImporter)."""
+        if value is not None and (value.owner_id != self.context['request'].user.pk or value.type != 'CATEGORY'):
+            raise serializers.ValidationError(f"Category {value.pk} is not one of your categories.")
+        return value
+
+    def validate(self, attrs):
+        """
+        The requester must own the payer. On a solo payment (between the
+        user's own entities) the user sets the status freely, and the payee
+        can only be moved to another of their own entities. A networked
+        payment gets its status from the payee's rules and approval, and keeps
+        the payee and amount they applied to.
+        """
+        user = self.context['request'].user
+        payer, payee = attrs.get('payer'), attrs.get('payee')
+        if payer is not None and payer.owner_id != user.pk:
+            raise serializers.ValidationError({'payer': "You must own the payer entity."})
+        if self.instance is None:
+            if 'status' in attrs and payee.owner_id != user.pk:
+                raise serializers.ValidationError(
+                    {'status': "Set by the payee's connection settings on a payment to another user."}
+                )
+            return attrs
+
+        if self.instance.payee_owner_id != self.instance.payer_owner_id:
+            errors = {}
+            if payee is not None and payee.pk != self.instance.payee_id:
+                errors['payee'] = "Cannot be changed on a payment to another user."
+            if 'amount' in attrs and attrs['amount'] != self.instance.amount:
+                errors['amount'] = "Cannot be changed on a payment to another user."
+            if 'status' in attrs and attrs['status'] != self.instance.status:
+                errors['status'] = "Only the payee can accept or reject a payment to another user."
+            if errors:
+                raise serializers.ValidationError(errors)
+        elif payee is not None and payee.owner_id != user.pk:
+            raise serializers.ValidationError({'payee': "Create a new payment to pay another user."})
+        return attrs
+
     def to_representation(self, instance):
         """
         Return detailed representation for read operations.
+
+        Expects payer/payee to be preloaded (TransactionQuerySet.for_display);
+        the renderer is shared by every row of a list response.
         """
         representation = super().to_representation(instance)
-        representation['payer'] = EntitySerializer(instance.payer).data
-        representation['payee'] = EntitySerializer(instance.payee).data
+        renderer = self.get_entity_renderer()
+        representation['payer'] = renderer.render(instance.payer)
+        representation['payee'] = renderer.render(instance.payee)
         # representation['mode'] = PaymentModeSerializer(instance.mode).data
         return representation
+
+    def get_entity_renderer(self):
+        # With many=True this serializer is the ListSerializer's single child,
+        # so the renderer (and its per-entity memo) lives for one response.
+        if not hasattr(self, '_entity_renderer'):
+            self._entity_renderer = CachedEntityRenderer()
+        return self._entity_renderer
+
+
+class EntityHistorySerializer(TransactionSerializer):
+    """
+    A row of an entity's chat history (TransactionQuerySet.entity_history):
+    how much it moved this entity's balance, and the balance right after it.
+    """
+    signed_amount = serializers.DecimalField(max_digits=19, decimal_places=2, read_only=True)
+    running_balance = serializers.DecimalField(max_digits=19, decimal_places=2, read_only=True)
+
+
+class TransactionApprovalSerializer(serializers.Serializer):
+    """Body of an approval: optionally, the payee's entity to receive the money instead."""
+
+    payee = serializers.IntegerField(required=False, min_value=1)
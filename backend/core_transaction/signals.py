@@ -1,35 +1,59 @@
-from django.db.models.signals import post_save, post_delete
-from django.dispatch import receiver
-from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import Signal, receiver
+from . import chats, ledger, rollups
+from .balances import post_balance_deltas, transaction_change_deltas
 from .models import Transaction
 
+# Sent once balances, ledger, rollups and chat summaries have followed a
+# transaction write, with the stored state `before` (None for a create or an
+# update that cannot move money) and `after` (None for a delete).
+transaction_changed = Signal()
+
+@receiver(pre_save, sender=Transaction)
+def capture_balance_state(sender, instance, update_fields=None, **kwargs):
+    """
+    Remember the balance-relevant state of the row being updated, as stored in
+    the database (locked until the save commits), so post_save can post only
+    the difference the edit makes, to balances, the posting ledger, the
+    category rollups and the chat summaries.
+    """
+    instance._balance_before = None
+    if instance._state.adding:
+        return
+    tracked = Transaction.BALANCE_FIELDS | Transaction.ROLLUP_FIELDS
+    if update_fields is not None and not tracked.intersection(update_fields):
+        return
+    instance._balance_before = (
+        Transaction.objects.select_for_update()
+        .only(*tracked, 'payer_owner', 'payee_owner')
+        .filter(pk=instance.pk)
+        .first()
+    )
+
 @receiver(post_save, sender=Transaction)
 def update_balance_on_save(sender, instance, created, **kwargs):
     """
     Update Entity balances when a transaction is saved.
-    Only affects balances if status is COMPLETED.
+    Only COMPLETED transactions affect balances, so this covers creation,
+    edits of amount/payer/payee and status transitions in either direction.
     """
-    if created and instance.status == 'COMPLETED':
-        with transaction.atomic():
-            # Deduct from Payer
-            instance.payer.current_balance -= instance.amount
-            instance.payer.save()
-            
-            # Add to Payee
-            instance.payee.current_balance += instance.amount
-            instance.payee.save()
+    before = getattr(instance, '_balance_before', None)
+    instance._balance_before = None
+    if created or before is not None:
+        post_balance_deltas(transaction_change_deltas(before, instance))
+        ledger.apply_change(before, instance)
+        rollups.post_rollup_deltas(rollups.rollup_change_deltas(before, instance))
+        chats.apply_change(before, instance)
+    transaction_changed.send(sender=Transaction, before=before, after=instance)
 
 @receiver(post_delete, sender=Transaction)
 def update_balance_on_delete(sender, instance, **kwargs):
     """
     Revert balance changes if a COMPLETED transaction is deleted.
     """
-    if instance.status == 'COMPLETED':
-        with transaction.atomic():
-            # Revert Payer (Add back)
-            instance.payer.current_balance += instance.amount
-            instance.payer.save()
-            
-            # Revert Payee (Deduct back)
-            instance.payee.current_balance -= instance.amount
-            instance.payee.save()
+    # Add back to Payer, deduct back from Payee
+    post_balance_deltas(transaction_change_deltas(instance, None))
+    ledger.apply_change(instance, None)
+    rollups.post_rollup_deltas(rollups.rollup_change_deltas(instance, None))
+    chats.apply_change(instance, None)
+    transaction_changed.send(sender=Transaction, before=instance, after=None)
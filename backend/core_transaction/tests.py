@@ -1,10 +1,46 @@
+import random
+import threading
+import time
+from importlib import import_module
+from io import StringIO
+from unittest import mock
+
+from rest_framework.exceptions import ValidationError
 from rest_framework.test import APITestCase
 from users.models import User
+from connections import rules
+from connections.models import ConnectionPermission, UserConnection
 from entities.models import Entity
-from .models import Transaction
+from entities.serializers import EntitySerializer
+from payment_modes.models import Payment_Mode
+from .approvals import approve_pending
+from .chats import rebuild_chat_summaries
+from .ledger import balance_at, rebuild_postings
+from .rollups import rebuild_rollups
+from .models import CategoryRollup, ChatSummary, Posting, Transaction
+from .views import TransactionViewSet
 from decimal import Decimal
+from django.apps import apps as django_apps
+from django.db import OperationalError, connection
+from django.db import transaction as db_transaction
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
+def retry_locked(fn):
+    # SQLite reports write contention as "database/table is locked" instead
+    # of blocking; a real client would retry the same way.
+    while True:
+        try:
+            return fn()
+        except OperationalError as exc:
+            if 'locked' not in str(exc):
+                raise
+            time.sleep(0.005)
+
+
 class TransactionBalanceTests(APITestCase):
     def setUp(self):
         self.user = User.objects.create_user(
@@ -90,3 +126,1125 @@ class TransactionBalanceTests(APITestCase):
         
         self.assertEqual(self.payer.current_balance, Decimal('1000.00'))
         self.assertEqual(self.payee.current_balance, Decimal('0.00'))
+
+
+class TransactionPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='pageuser',
+            email='page@example.com',
+            password='password123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.account = Entity.objects.create(owner=self.user, name="My Bank", type="ACCOUNT")
+        self.shop = Entity.objects.create(owner=self.user, name="Shop", type="EXTERNAL_PAYEE")
+
+        # Several rows share a date so the tie-breaker on transaction_id matters.
+        now = timezone.now()
+        self.transactions = [
+            Transaction.objects.create(
+                payer=self.account,
+                payee=self.shop,
+                amount=Decimal('10.00'),
+                date=now - timezone.timedelta(days=i // 3),
+                status='PENDING'
+            )
+            for i in range(10)
+        ]
+
+    def test_walk_all_pages(self):
+        """
+        Following `next` visits every row exactly once, newest first.
+        """
+        seen = []
+        url = '/api/transactions/?page_size=4'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 4)
+            seen.extend(row['transaction_id'] for row in response.data['results'])
+            url = response.data['next']
+
+        expected = [
+            tx.transaction_id
+            for tx in sorted(self.transactions, key=lambda tx: (tx.date, tx.transaction_id), reverse=True)
+        ]
+        self.assertEqual(seen, expected)
+
+    def test_page_size_is_capped(self):
+        response = self.client.get('/api/transactions/?page_size=100000')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertIsNone(response.data['next'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/transactions/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+    def test_branches_keep_the_filters_of_the_list_queryset(self):
+        kept = self.transactions[:4]
+        narrowed = TransactionViewSet.get_queryset
+
+        def get_queryset(view):
+            return narrowed(view).filter(pk__in=[tx.pk for tx in kept])
+
+        with mock.patch.object(TransactionViewSet, 'get_queryset', get_queryset):
+            response = self.client.get('/api/transactions/')
+        self.assertEqual(sorted(row['transaction_id'] for row in response.data['results']), [tx.pk for tx in kept])
+
+
+class TransactionVisibilityTests(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', email='alice@example.com', password='password123')
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com', password='password123')
+        self.carol = User.objects.create_user(username='carol', email='carol@example.com', password='password123')
+        self.alice_bank = Entity.objects.create(owner=self.alice, name="Alice Bank", type="ACCOUNT")
+        self.alice_food = Entity.objects.create(owner=self.alice, name="Food", type="CATEGORY")
+        self.bob_bank = Entity.objects.create(owner=self.bob, name="Bob Bank", type="ACCOUNT")
+
+        self.own = Transaction.objects.create(
+            payer=self.alice_bank, payee=self.alice_food, amount=Decimal('5.00'), date=timezone.now()
+        )
+        self.transfer = Transaction.objects.create(
+            payer=self.alice_bank, payee=self.bob_bank, amount=Decimal('7.00'), date=timezone.now()
+        )
+
+    def test_owner_columns_are_synced(self):
+        self.assertEqual(self.transfer.payer_owner, self.alice)
+        self.assertEqual(self.transfer.payee_owner, self.bob)
+
+    def test_each_side_sees_shared_transaction_once(self):
+        self.client.force_authenticate(user=self.alice)
+        ids = [row['transaction_id'] for row in self.client.get('/api/transactions/').data['results']]
+        self.assertEqual(sorted(ids), sorted([self.own.transaction_id, self.transfer.transaction_id]))
+
+        self.client.force_authenticate(user=self.bob)
+        ids = [row['transaction_id'] for row in self.client.get('/api/transactions/').data['results']]
+        self.assertEqual(ids, [self.transfer.transaction_id])
+
+    def test_stranger_sees_nothing(self):
+        self.client.force_authenticate(user=self.carol)
+        self.assertEqual(self.client.get('/api/transactions/').data['results'], [])
+        response = self.client.get(f'/api/transactions/{self.transfer.transaction_id}/')
+        self.assertEqual(response.status_code, 404)
+
+
+class TransactionSerializerQueryTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', email='reader@example.com', password='password123')
+        self.client.force_authenticate(user=self.user)
+        food = Entity.objects.create(owner=self.user, name="Food", type="CATEGORY")
+        payees = [Entity.objects.create(owner=self.user, name=f"Shop {i}", type="EXTERNAL_PAYEE") for i in range(5)]
+        accounts = [Entity.objects.create(owner=self.user, name=f"Bank {i}", type="ACCOUNT") for i in range(3)]
+        for i in range(40):
+            Transaction.objects.create(
+                payer=accounts[i % 3],
+                payee=payees[i % 5],
+                category=food,
+                amount=Decimal('1.00'),
+                date=timezone.now(),
+            )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_is_independent_of_page_size(self):
+        self.assertEqual(
+            self.count_queries('/api/transactions/?page_size=2'),
+            self.count_queries('/api/transactions/?page_size=40'),
+        )
+
+    def test_nested_entities_match_entity_serializer(self):
+        row = self.client.get('/api/transactions/?page_size=1').data['results'][0]
+        tx = Transaction.objects.get(pk=row['transaction_id'])
+        self.assertEqual(row['payer'], EntitySerializer(tx.payer).data)
+        self.assertEqual(row['payee'], EntitySerializer(tx.payee).data)
+
+
+class BalanceEngineConcurrencyTests(TransactionTestCase):
+    """
+    Fires many concurrent transfers between a handful of accounts from several
+    threads (each with its own DB connection) and checks that no update was
+    lost: every balance must equal its opening amount plus the ledger.
+    """
+
+    THREADS = 8
+    TRANSFERS_PER_THREAD = 150
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='stress', email='stress@example.com', password='password123')
+        self.accounts = [
+            Entity.objects.create(owner=self.user, name=f"Account {i}", type="ACCOUNT", current_balance=Decimal('1000.00'))
+            for i in range(5)
+        ]
+
+    def transfer_worker(self, seed, errors):
+        rng = random.Random(seed)
+        try:
+            for _ in range(self.TRANSFERS_PER_THREAD):
+                payer_id, payee_id = rng.sample([account.pk for account in self.accounts], 2)
+                amount = Decimal(rng.randint(1, 5000)) / 100
+                retry_locked(lambda: self.create_transfer(payer_id, payee_id, amount))
+        except Exception as exc:  # surfaced in the main thread
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    def create_transfer(self, payer_id, payee_id, amount):
+        # Like a request: the entities are loaded (and may go stale) before the write.
+        payer = Entity.objects.get(pk=payer_id)
+        payee = Entity.objects.get(pk=payee_id)
+        with db_transaction.atomic():
+            Transaction.objects.create(
+                payer=payer, payee=payee, amount=amount, date=timezone.now(), status='COMPLETED'
+            )
+
+    def test_concurrent_transfers_do_not_lose_updates(self):
+        errors = []
+        threads = [
+            threading.Thread(target=self.transfer_worker, args=(seed, errors)) for seed in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(Transaction.objects.count(), self.THREADS * self.TRANSFERS_PER_THREAD)
+
+        for account in self.accounts:
+            account.refresh_from_db()
+            # Summed in Python: SQLite's SUM() over decimals goes through floats.
+            incoming = sum(Transaction.objects.filter(payee=account).values_list('amount', flat=True))
+            outgoing = sum(Transaction.objects.filter(payer=account).values_list('amount', flat=True))
+            self.assertEqual(account.current_balance, Decimal('1000.00') + incoming - outgoing)
+
+
+class TransactionBulkImportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='importer', email='importer@example.com', password='password123')
+        self.other = User.objects.create_user(username='other', email='other@example.com', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.bank = Entity.objects.create(owner=self.user, name="Bank", type="ACCOUNT", current_balance=Decimal('1000.00'))
+        self.shop = Entity.objects.create(owner=self.user, name="Shop", type="EXTERNAL_PAYEE")
+        self.food = Entity.objects.create(owner=self.user, name="Food", type="CATEGORY")
+        self.stranger_a = Entity.objects.create(owner=self.other, name="A", type="ACCOUNT")
+        self.stranger_b = Entity.objects.create(owner=self.other, name="B", type="ACCOUNT")
+        self.url = '/api/transactions/bulk/'
+
+    def row(self, **overrides):
+        row = {
+            'payer': self.bank.entity_id,
+            'payee': self.shop.entity_id,
+            'amount': '10.00',
+            'date': '2025-01-15T10:00:00Z',
+            'status': 'COMPLETED',
+            'category': self.food.entity_id,
+        }
+        row.update(overrides)
+        return row
+
+    def test_json_import_posts_net_balances(self):
+        rows = [self.row() for _ in range(30)] + [self.row(status='PENDING', amount='999.00')]
+        response = self.client.post(self.url, rows, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['created']), 31)
+        self.assertEqual(Transaction.objects.count(), 31)
+
+        self.bank.refresh_from_db()
+        self.shop.refresh_from_db()
+        self.assertEqual(self.bank.current_balance, Decimal('700.00'))
+        self.assertEqual(self.shop.current_balance, Decimal('300.00'))
+        self.assertEqual(Transaction.objects.first().payer_owner, self.user)
+
+    def test_all_or_nothing_rejects_batch(self):
+        rows = [self.row(), self.row(amount='-5'), self.row(payer=self.stranger_a.entity_id, payee=self.stranger_b.entity_id)]
+        response = self.client.post(self.url, rows, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['row'] for error in response.data['errors']], [1, 2])
+        self.assertEqual(Transaction.objects.count(), 0)
+        self.bank.refresh_from_db()
+        self.assertEqual(self.bank.current_balance, Decimal('1000.00'))
+
+    def test_payer_must_be_mine(self):
+        response = self.client.post(self.url, [self.row(payer=self.stranger_a.entity_id, payee=self.bank.entity_id)], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('payer', response.data['errors'][0]['errors'])
+        self.stranger_a.refresh_from_db()
+        self.assertEqual(self.stranger_a.current_balance, Decimal('0.00'))
+
+    def test_networked_rows_wait_for_the_payee(self):
+        UserConnection.objects.create(requester=self.user, receiver=self.other, status='accepted')
+        response = self.client.post(self.url, [self.row(payee=self.stranger_a.entity_id, category=None)], format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(Transaction.objects.get().status, 'PENDING')
+        self.stranger_a.refresh_from_db()
+        self.assertEqual(self.stranger_a.current_balance, Decimal('0.00'))
+
+    def test_rows_that_net_to_zero_still_get_postings(self):
+        rows = [self.row(), self.row(payer=self.shop.entity_id, payee=self.bank.entity_id)]
+        response = self.client.post(self.url, rows, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        for entity in (self.bank, self.shop):
+            self.assertEqual(Posting.objects.filter(entity=entity).count(), 2)
+
+    def test_import_merges_into_existing_ledgers(self):
+        start = timezone.now() - timezone.timedelta(days=60)
+        for day in range(0, 60, 3):
+            Transaction.objects.create(
+                payer=self.bank, payee=self.shop, amount=Decimal('7.00'), status='COMPLETED',
+                date=start + timezone.timedelta(days=day),
+            )
+        rows = [self.row(date=(start + timezone.timedelta(days=day, hours=1)).isoformat()) for day in (1, 30, 61)]
+        self.assertEqual(self.client.post(self.url, rows, format='json').status_code, 201)
+
+        def ledgers():
+            return list(Posting.objects.order_by('entity_id', 'date', 'transaction_id').values_list(
+                'entity_id', 'transaction_id', 'amount', 'running_total'
+            ))
+
+        merged = ledgers()
+        rebuild_postings([self.bank.pk, self.shop.pk])
+        self.assertEqual(ledgers(), merged)
+
+    def test_partial_inserts_valid_rows(self):
+        rows = [self.row(), self.row(payee=999999), self.row(category=self.shop.entity_id)]
+        response = self.client.post(f'{self.url}?partial=true', rows, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['created']), 1)
+        self.assertEqual([error['row'] for error in response.data['errors']], [1, 2])
+        self.bank.refresh_from_db()
+        self.assertEqual(self.bank.current_balance, Decimal('990.00'))
+
+    def test_csv_upload(self):
+        csv_content = (
+            "payer,payee,amount,date,status,description\n"
+            f"{self.bank.entity_id},{self.shop.entity_id},12.50,2025-01-01T00:00:00Z,COMPLETED,Milk\n"
+            f"{self.bank.entity_id},{self.shop.entity_id},7.50,2025-01-02T00:00:00Z,COMPLETED,\n"
+        )
+        upload = SimpleUploadedFile('statement.csv', csv_content.encode(), content_type='text/csv')
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['created']), 2)
+        self.bank.refresh_from_db()
+        self.assertEqual(self.bank.current_balance, Decimal('980.00'))
+
+    def test_import_query_count_does_not_grow_with_rows(self):
+        def count(n):
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.post(self.url, [self.row() for _ in range(n)], format='json')
+            return len(ctx.captured_queries)
+
+        # The first import into a month creates its category rollup row.
+        count(1)
+        self.assertEqual(count(5), count(50))
+
+
+class TransactionEditBalanceTests(APITestCase):
+    """
+    Random create/edit/delete sequences checked after every step against a
+    brute-force recompute of every balance from the ledger.
+    """
+
+    OPENING = Decimal('500.00')
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='editor', email='editor@example.com', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.entities = [
+            Entity.objects.create(owner=self.user, name=f"Entity {i}", type="ACCOUNT", current_balance=self.OPENING)
+            for i in range(4)
+        ]
+
+    def assert_balances_match_ledger(self):
+        for entity in self.entities:
+            entity.refresh_from_db()
+            completed = Transaction.objects.filter(status='COMPLETED')
+            incoming = sum(completed.filter(payee=entity).values_list('amount', flat=True))
+            outgoing = sum(completed.filter(payer=entity).values_list('amount', flat=True))
+            self.assertEqual(entity.current_balance, self.OPENING + incoming - outgoing, entity.name)
+
+    def test_status_transitions(self):
+        payer, payee = self.entities[:2]
+        tx = Transaction.objects.create(payer=payer, payee=payee, amount=Decimal('40.00'), date=timezone.now())
+        for status in ['COMPLETED', 'REJECTED', 'PENDING', 'COMPLETED', 'COMPLETED']:
+            response = self.client.patch(f'/api/transactions/{tx.pk}/', {'status': status}, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['status'], status)
+            self.assert_balances_match_ledger()
+
+    def test_solo_payments_complete_unless_told_otherwise(self):
+        payer, payee = self.entities[:2]
+        body = {'payer': payer.pk, 'payee': payee.pk, 'amount': '40.00', 'date': '2025-01-15T10:00:00Z'}
+        self.assertEqual(self.client.post('/api/transactions/', body, format='json').data['status'], 'COMPLETED')
+        response = self.client.post('/api/transactions/', {**body, 'status': 'PENDING'}, format='json')
+        self.assertEqual(response.data['status'], 'PENDING')
+        self.assert_balances_match_ledger()
+
+    def test_swap_direction_and_entity(self):
+        a, b, c = self.entities[:3]
+        tx = Transaction.objects.create(payer=a, payee=b, amount=Decimal('25.00'), date=timezone.now(), status='COMPLETED')
+        self.client.patch(f'/api/transactions/{tx.pk}/', {'payer': b.pk, 'payee': a.pk}, format='json')
+        self.assert_balances_match_ledger()
+        self.client.patch(f'/api/transactions/{tx.pk}/', {'payee': c.pk, 'amount': '99.99'}, format='json')
+        self.assert_balances_match_ledger()
+
+    def test_non_balance_edit_does_not_post(self):
+        tx = Transaction.objects.create(
+            payer=self.entities[0], payee=self.entities[1], amount=Decimal('5.00'), date=timezone.now(), status='COMPLETED'
+        )
+        tx.description = 'renamed'
+        # SAVEPOINT, UPDATE, sync journal (lock counter, advance it, upsert),
+        # response versions, RELEASE
+        with self.assertNumQueries(7):
+            tx.save(update_fields=['description'])
+        self.assert_balances_match_ledger()
+
+    def test_random_edits_match_recompute_oracle(self):
+        rng = random.Random(7)
+        statuses = ['PENDING', 'COMPLETED', 'REJECTED']
+        transactions = []
+        for step in range(150):
+            op = rng.choice(['create', 'create', 'amount', 'direction', 'entity', 'status', 'delete'])
+            if op == 'create' or not transactions:
+                payer, payee = rng.sample(self.entities, 2)
+                transactions.append(Transaction.objects.create(
+                    payer=payer, payee=payee, amount=Decimal(rng.randint(1, 10000)) / 100,
+                    date=timezone.now(), status=rng.choice(statuses)
+                ))
+                continue
+
+            tx = rng.choice(transactions)
+            if op == 'amount':
+                tx.amount = Decimal(rng.randint(1, 10000)) / 100
+            elif op == 'direction':
+                tx.payer, tx.payee = tx.payee, tx.payer
+            elif op == 'entity':
+                tx.payee = rng.choice([entity for entity in self.entities if entity.pk != tx.payer_id])
+            elif op == 'status':
+                tx.status = rng.choice(statuses)
+            if op == 'delete':
+                transactions.remove(tx)
+                tx.delete()
+            else:
+                tx.save()
+            self.assert_balances_match_ledger()
+
+
+class ReconcileBalancesCommandTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='recon', email='recon@example.com', password='password123')
+        self.bank = Entity.objects.create(owner=self.user, name="Bank", type="ACCOUNT", current_balance=Decimal('1000.00'))
+        self.shop = Entity.objects.create(owner=self.user, name="Shop", type="EXTERNAL_PAYEE")
+        for amount in ['0.10', '0.20', '33.33']:
+            Transaction.objects.create(
+                payer=self.bank, payee=self.shop, amount=Decimal(amount), date=timezone.now(), status='COMPLETED'
+            )
+        Transaction.objects.create(payer=self.bank, payee=self.shop, amount=Decimal('50.00'), date=timezone.now())
+
+    def reconcile(self, *args):
+        out = StringIO()
+        call_command('reconcile_balances', '--workers=0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_consistent_ledger_reports_nothing(self):
+        self.assertIn('found 0 mismatched', self.reconcile('--dry-run'))
+
+    def test_dry_run_reports_without_fixing(self):
+        Entity.objects.filter(pk=self.bank.pk).update(current_balance=Decimal('1.00'))
+        output = self.reconcile('--dry-run')
+        self.assertIn(f'entity {self.bank.pk}: stored 1.00, ledger 966.37', output)
+        self.bank.refresh_from_db()
+        self.assertEqual(self.bank.current_balance, Decimal('1.00'))
+
+    def test_fix_restores_ledger_balance(self):
+        Entity.objects.filter(pk__in=[self.bank.pk, self.shop.pk]).update(current_balance=Decimal('0.00'))
+        self.assertIn('fixed 2 mismatched', self.reconcile('--chunk-size=1'))
+        self.bank.refresh_from_db()
+        self.shop.refresh_from_db()
+        self.assertEqual(self.bank.current_balance, Decimal('966.37'))
+        self.assertEqual(self.shop.current_balance, Decimal('33.63'))
+
+    def test_accept_drift_keeps_stored_balances(self):
+        Entity.objects.filter(pk=self.bank.pk).update(current_balance=Decimal('1.00'))
+        self.assertIn('accepted 1 mismatched', self.reconcile('--accept-drift'))
+        self.bank.refresh_from_db()
+        self.assertEqual((self.bank.current_balance, self.bank.opening_balance), (Decimal('1.00'), Decimal('34.63')))
+        self.assertIn('found 0 mismatched', self.reconcile('--dry-run'))
+
+    def test_migration_backfill_leaves_drift_visible(self):
+        backfill = import_module('entities.migrations.0004_entity_opening_balance').backfill_opening_balance
+        idle = Entity.objects.create(owner=self.user, name="Idle", type="ACCOUNT", current_balance=Decimal('70.00'))
+        Entity.objects.update(opening_balance=Decimal('0.00'))
+        backfill(django_apps, None)
+        idle.refresh_from_db()
+        self.bank.refresh_from_db()
+        self.assertEqual(idle.opening_balance, Decimal('70.00'))
+        self.assertEqual(self.bank.opening_balance, Decimal('0.00'))
+        self.assertIn(f'entity {self.bank.pk}: stored 966.37, ledger -33.63', self.reconcile('--dry-run'))
+
+    def test_manual_balance_edit_moves_opening_balance(self):
+        self.client.force_authenticate(user=self.user)
+        self.client.patch(f'/api/entities/{self.bank.pk}/', {'current_balance': '2000.00'}, format='json')
+        self.assertIn('found 0 mismatched', self.reconcile('--dry-run'))
+
+
+class PostingLedgerTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='ledger', email='ledger@example.com', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.entities = [
+            Entity.objects.create(owner=self.user, name=f"Entity {i}", type="ACCOUNT", current_balance=Decimal('100.00'))
+            for i in range(3)
+        ]
+        self.start = timezone.now() - timezone.timedelta(days=100)
+
+    def brute_force_balance(self, entity, at):
+        completed = Transaction.objects.filter(status='COMPLETED', date__lte=at)
+        incoming = sum(completed.filter(payee=entity).values_list('amount', flat=True))
+        outgoing = sum(completed.filter(payer=entity).values_list('amount', flat=True))
+        return entity.opening_balance + incoming - outgoing
+
+    def snapshot(self):
+        return list(Posting.objects.order_by('entity_id', 'date', 'transaction_id').values_list(
+            'entity_id', 'transaction_id', 'amount', 'running_total'
+        ))
+
+    def test_incremental_ledger_matches_brute_force_and_rebuild(self):
+        rng = random.Random(3)
+        transactions = []
+        for step in range(80):
+            op = rng.choice(['create', 'create', 'create', 'backdate', 'amount', 'status', 'delete'])
+            if op == 'create' or not transactions:
+                payer, payee = rng.sample(self.entities, 2)
+                transactions.append(Transaction.objects.create(
+                    payer=payer, payee=payee, amount=Decimal(rng.randint(1, 5000)) / 100,
+                    date=self.start + timezone.timedelta(days=rng.randint(0, 100)),
+                    status=rng.choice(['PENDING', 'COMPLETED', 'COMPLETED'])
+                ))
+                continue
+            tx = rng.choice(transactions)
+            if op == 'delete':
+                transactions.remove(tx)
+                tx.delete()
+                continue
+            if op == 'backdate':
+                tx.date = self.start + timezone.timedelta(days=rng.randint(0, 100))
+            elif op == 'amount':
+                tx.amount = Decimal(rng.randint(1, 5000)) / 100
+            else:
+                tx.status = rng.choice(['PENDING', 'COMPLETED', 'REJECTED'])
+            tx.save()
+
+        for entity in self.entities:
+            entity.refresh_from_db()
+            for days in range(0, 101, 5):
+                at = self.start + timezone.timedelta(days=days, hours=12)
+                self.assertEqual(balance_at(entity, at), self.brute_force_balance(entity, at))
+            self.assertEqual(balance_at(entity, timezone.now()), entity.current_balance)
+
+        incremental = self.snapshot()
+        rebuild_postings([entity.pk for entity in self.entities])
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_balance_endpoint(self):
+        bank, shop = self.entities[:2]
+        Transaction.objects.create(payer=bank, payee=shop, amount=Decimal('30.00'), date=self.start, status='COMPLETED')
+        Transaction.objects.create(
+            payer=bank, payee=shop, amount=Decimal('20.00'),
+            date=self.start + timezone.timedelta(days=10), status='COMPLETED'
+        )
+        at = (self.start + timezone.timedelta(days=5)).isoformat()
+        response = self.client.get(f'/api/entities/{bank.pk}/balance/', {'at': at})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['balance'], '70.00')
+        self.assertEqual(self.client.get(f'/api/entities/{bank.pk}/balance/').data['balance'], '50.00')
+        self.assertEqual(self.client.get(f'/api/entities/{bank.pk}/balance/', {'at': 'yesterday'}).status_code, 400)
+
+    def test_import_feeds_ledger(self):
+        bank, shop = self.entities[:2]
+        rows = [
+            {'payer': bank.pk, 'payee': shop.pk, 'amount': '1.00', 'status': 'COMPLETED',
+             'date': (self.start + timezone.timedelta(days=i)).isoformat()}
+            for i in range(10)
+        ]
+        self.client.post('/api/transactions/bulk/', rows, format='json')
+        at = self.start + timezone.timedelta(days=4, hours=1)
+        self.assertEqual(balance_at(bank, at), Decimal('95.00'))
+
+
+class EntityHistoryTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='history', email='history@example.com', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.bank = Entity.objects.create(owner=self.user, name="Bank", type="ACCOUNT", current_balance=Decimal('500.00'))
+        self.shop = Entity.objects.create(owner=self.user, name="Shop", type="EXTERNAL_PAYEE")
+        self.food = Entity.objects.create(owner=self.user, name="Food", type="CATEGORY")
+        self.start = timezone.now() - timezone.timedelta(days=60)
+
+    def fetch_all(self, entity, page_size):
+        rows, url, params = [], f'/api/entities/{entity.pk}/transactions/', {'page_size': page_size}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            rows.extend(response.data['results'])
+            url, params = response.data['next'], None
+        return rows
+
+    def test_running_balance_across_pages(self):
+        """Every page anchors its window at the ledger, so running balances match a full replay."""
+        rng = random.Random(9)
+        for i in range(37):
+            incoming = rng.random() < 0.3
+            Transaction.objects.create(
+                payer=self.shop if incoming else self.bank,
+                payee=self.bank if incoming else self.shop,
+                category=None if incoming else self.food,
+                amount=Decimal(rng.randint(1, 9000)) / 100,
+                # Shared dates exercise the transaction_id tie-break.
+                date=self.start + timezone.timedelta(days=rng.randint(0, 20)),
+                status=rng.choice(['COMPLETED', 'COMPLETED', 'PENDING']),
+            )
+        self.bank.refresh_from_db()
+
+        rows = self.fetch_all(self.bank, page_size=5)
+        history = Transaction.objects.filter(payer=self.bank) | Transaction.objects.filter(payee=self.bank)
+        expected_ids = list(history.order_by('-date', '-transaction_id').values_list('transaction_id', flat=True))
+        self.assertEqual([row['transaction_id'] for row in rows], expected_ids)
+
+        balance = self.bank.current_balance
+        for row in rows:
+            self.assertEqual(Decimal(row['running_balance']), balance)
+            balance -= Decimal(row['signed_amount'])
+        self.assertEqual(balance, self.bank.opening_balance)
+
+    def test_category_history(self):
+        Transaction.objects.create(
+            payer=self.bank, payee=self.shop, category=self.food, amount=Decimal('12.50'),
+            date=self.start, status='COMPLETED'
+        )
+        Transaction.objects.create(payer=self.bank, payee=self.shop, amount=Decimal('3.00'), date=self.start)
+        rows = self.fetch_all(self.food, page_size=10)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['signed_amount'], '0.00')
+
+    def test_page_queries_are_constant(self):
+        for i in range(30):
+            Transaction.objects.create(
+                payer=self.bank, payee=self.shop, amount=Decimal('1.00'),
+                date=self.start + timezone.timedelta(hours=i), status='COMPLETED'
+            )
+        url = f'/api/entities/{self.bank.pk}/transactions/'
+        next_url = self.client.get(url, {'page_size': 10}).data['next']
+        with CaptureQueriesContext(connection) as first:
+            self.client.get(url, {'page_size': 10})
+        with CaptureQueriesContext(connection) as deep:
+            self.client.get(next_url)
+        self.assertEqual(len(first), len(deep))
+
+    def test_other_users_entity_is_not_found(self):
+        other = User.objects.create_user(username='other', email='other@example.com', password='password123')
+        theirs = Entity.objects.create(owner=other, name="Theirs", type="ACCOUNT")
+        self.assertEqual(self.client.get(f'/api/entities/{theirs.pk}/transactions/').status_code, 404)
+
+
+class CategoryRollupTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='rollup', email='rollup@example.com', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.bank = Entity.objects.create(owner=self.user, name="Bank", type="ACCOUNT", current_balance=Decimal('1000.00'))
+        self.shop = Entity.objects.create(owner=self.user, name="Shop", type="EXTERNAL_PAYEE")
+        self.categories = [
+            Entity.objects.create(owner=self.user, name=name, type="CATEGORY") for name in ("Food", "Rent")
+        ]
+
+    def snapshot(self):
+        return list(CategoryRollup.objects.order_by('entity_id', 'month', 'status').values_list(
+            'owner_id', 'entity_id', 'month', 'status', 'total', 'count'
+        ))
+
+    def test_incremental_rollups_match_full_aggregation(self):
+        """Creates, re-tags, re-dates, status flips and deletes keep rollups equal to a rebuild."""
+        rng = random.Random(10)
+        now = timezone.now()
+        transactions = []
+        for step in range(80):
+            op = rng.choice(['create', 'create', 'create', 'retag', 'redate', 'amount', 'status', 'delete'])
+            if op == 'create' or not transactions:
+                transactions.append(Transaction.objects.create(
+                    payer=self.bank, payee=self.shop, amount=Decimal(rng.randint(1, 5000)) / 100,
+                    category=rng.choice(self.categories + [None]),
+                    date=now - timezone.timedelta(days=rng.randint(0, 120)),
+                    status=rng.choice(['PENDING', 'COMPLETED', 'REJECTED'])
+                ))
+                continue
+            tx = rng.choice(transactions)
+            if op == 'delete':
+                transactions.remove(tx)
+                tx.delete()
+                continue
+            if op == 'retag':
+                tx.category = rng.choice(self.categories + [None])
+            elif op == 'redate':
+                tx.date = now - timezone.timedelta(days=rng.randint(0, 120))
+            elif op == 'amount':
+                tx.amount = Decimal(rng.randint(1, 5000)) / 100
+            else:
+                tx.status = rng.choice(['PENDING', 'COMPLETED', 'REJECTED'])
+            tx.save()
+
+        incremental = self.snapshot()
+        self.assertTrue(incremental)
+        out = StringIO()
+        call_command('rebuild_category_rollups', '--check', stdout=out)
+        self.assertIn('0 mismatched rollups', out.getvalue())
+        rebuild_rollups()
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_import_feeds_rollups(self):
+        food = self.categories[0]
+        rows = [
+            {'payer': self.bank.pk, 'payee': self.shop.pk, 'amount': '2.25', 'status': 'COMPLETED',
+             'category': food.pk, 'date': timezone.now().isoformat()}
+            for i in range(4)
+        ]
+        self.client.post('/api/transactions/bulk/', rows, format='json')
+        rollup = CategoryRollup.objects.get(entity=food)
+        self.assertEqual((rollup.total, rollup.count, rollup.owner_id), (Decimal('9.00'), 4, self.user.pk))
+
+    def test_analytics_endpoint(self):
+        food = self.categories[0]
+        now = timezone.now()
+        for amount, status, days in [('10.00', 'COMPLETED', 0), ('5.50', 'COMPLETED', 0), ('7.00', 'PENDING', 0),
+                                     ('99.00', 'COMPLETED', 400)]:
+            Transaction.objects.create(
+                payer=self.bank, payee=self.shop, amount=Decimal(amount), category=food, status=status,
+                date=now - timezone.timedelta(days=days)
+            )
+        url = f'/api/entities/{food.pk}/analytics/'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['spent_this_month'], '15.50')
+        self.assertEqual(
+            [(row['status'], row['total'], row['count']) for row in response.data['months']],
+            [('COMPLETED', '15.50', 2), ('PENDING', '7.00', 1)],
+        )
+        self.assertFalse(any('core_transaction_transaction' in q['sql'] for q in queries.captured_queries))
+        self.assertEqual(self.client.get(url, {'months': 'all'}).status_code, 400)
+
+    def test_only_my_categories_can_be_tagged(self):
+        stranger = User.objects.create_user(username='stranger', email='stranger@example.com', password=None)
+        theirs = Entity.objects.create(owner=stranger, name="Food", type="CATEGORY")
+        tx = Transaction.objects.create(payer=self.bank, payee=self.shop, amount=Decimal('5.00'), date=timezone.now())
+        body = {'payer': self.bank.pk, 'payee': self.shop.pk, 'amount': '5.00', 'date': '2025-01-15T10:00:00Z'}
+        for category in (theirs, self.shop):
+            response = self.client.post('/api/transactions/', {**body, 'category': category.pk}, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('category', response.data)
+            response = self.client.patch(f'/api/transactions/{tx.pk}/', {'category': category.pk}, format='json')
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(CategoryRollup.objects.exists())
+        self.client.force_authenticate(user=stranger)
+        self.assertEqual(self.client.get(f'/api/entities/{theirs.pk}/transactions/').data['results'], [])
+
+
+class ChatSummaryTests(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', email='alice@example.com', password=None)
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com', password=None)
+        self.entities = [
+            Entity.objects.create(owner=owner, name=f"{owner.username} {kind}", type=kind)
+            for owner in (self.alice, self.bob)
+            for kind in ("ACCOUNT", "EXTERNAL_PAYEE")
+        ]
+
+    def snapshot(self):
+        return list(ChatSummary.objects.order_by('entity_id', 'low_user_id').values_list(
+            'entity_id', 'low_user_id', 'high_user_id', 'last_transaction_id', 'last_amount', 'last_date', 'pending_count'
+        ))
+
+    def test_incremental_summaries_match_rebuild(self):
+        """Creates, moves, re-dates, status flips and deletes (including of the newest row) stay consistent."""
+        rng = random.Random(12)
+        start = timezone.now() - timezone.timedelta(days=30)
+        transactions = []
+        for step in range(100):
+            op = rng.choice(['create', 'create', 'move', 'redate', 'amount', 'status', 'delete', 'delete_newest'])
+            if op == 'create' or not transactions:
+                payer, payee = rng.sample(self.entities, 2)
+                transactions.append(Transaction.objects.create(
+                    payer=payer, payee=payee, amount=Decimal(rng.randint(1, 5000)) / 100,
+                    date=start + timezone.timedelta(days=rng.randint(0, 30)),
+                    status=rng.choice(['PENDING', 'COMPLETED', 'REJECTED'])
+                ))
+                continue
+            tx = rng.choice(transactions)
+            if op == 'delete_newest':
+                tx = max(transactions, key=lambda t: (t.date, t.pk))
+            if op.startswith('delete'):
+                transactions.remove(tx)
+                tx.delete()
+                continue
+            if op == 'move':
+                tx.payer, tx.payee = rng.sample(self.entities, 2)
+            elif op == 'redate':
+                tx.date = start + timezone.timedelta(days=rng.randint(0, 30))
+            elif op == 'amount':
+                tx.amount = Decimal(rng.randint(1, 5000)) / 100
+            else:
+                tx.status = rng.choice(['PENDING', 'COMPLETED', 'REJECTED'])
+            tx.save()
+
+        incremental = self.snapshot()
+        out = StringIO()
+        call_command('rebuild_chat_summaries', stdout=out)
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_rebuild_is_scoped_to_owner(self):
+        alice_account, alice_payee, bob_account, bob_payee = self.entities
+        Transaction.objects.create(payer=alice_account, payee=bob_account, amount=Decimal('5.00'), date=timezone.now())
+        Transaction.objects.create(payer=bob_account, payee=bob_payee, amount=Decimal('7.00'), date=timezone.now())
+        incremental = self.snapshot()
+        ChatSummary.objects.update(pending_count=99)
+        rebuild_chat_summaries([self.alice.pk])
+        bob_only = ChatSummary.objects.get(entity=bob_payee)
+        self.assertEqual(bob_only.pending_count, 99)
+        self.assertEqual(ChatSummary.objects.get(entity=alice_account).pending_count, 1)
+        self.assertEqual(ChatSummary.objects.get(low_user=self.alice).pending_count, 1)
+        rebuild_chat_summaries()
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_import_updates_summaries(self):
+        alice_account, alice_payee = self.entities[:2]
+        self.client.force_authenticate(user=self.alice)
+        now = timezone.now()
+        rows = [
+            {'payer': alice_account.pk, 'payee': alice_payee.pk, 'amount': f'{i}.00',
+             'date': (now - timezone.timedelta(days=i)).isoformat()}
+            for i in range(1, 6)
+        ]
+        self.client.post('/api/transactions/bulk/', rows, format='json')
+        incremental = self.snapshot()
+        summary = ChatSummary.objects.get(entity=alice_payee)
+        self.assertEqual((summary.last_amount, summary.pending_count), (Decimal('1.00'), 5))
+        rebuild_chat_summaries()
+        self.assertEqual(self.snapshot(), incremental)
+
+
+class NetworkedTransactionTests(APITestCase):
+    """Creating a payment into a connected user's entity applies their connection permission."""
+
+    def setUp(self):
+        self.payer = User.objects.create_user(username='papa', email='papa@example.com', password='password123')
+        self.payee = User.objects.create_user(username='kid', email='kid@example.com', password='password123')
+        UserConnection.objects.create(requester=self.payer, receiver=self.payee, status='accepted')
+        self.wallet = Entity.objects.create(owner=self.payer, name="Papa's Bank", type="ACCOUNT", current_balance=Decimal('500.00'))
+        self.gpay = Payment_Mode.objects.create(owner=self.payer, name="GPay", app_key='gpay')
+        self.kid_cash = Entity.objects.create(owner=self.payee, name="Cash", type="ACCOUNT")
+        self.kid_bank = Entity.objects.create(owner=self.payee, name="BOB", type="ACCOUNT")
+        self.client.force_authenticate(user=self.payer)
+
+    def rule(self, **fields):
+        return ConnectionPermission.objects.create(payer_user=self.payer, payee_user=self.payee, **fields)
+
+    def send(self, **overrides):
+        body = {
+            'payer': self.wallet.pk, 'payee': self.kid_cash.pk, 'amount': '50.00',
+            'date': '2025-01-15T10:00:00Z', 'mode': self.gpay.pk,
+        }
+        body.update(overrides)
+        return self.client.post('/api/transactions/', body, format='json')
+
+    def test_without_a_rule_the_payment_waits_for_approval(self):
+        response = self.send()
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['status'], 'PENDING')
+        self.kid_cash.refresh_from_db()
+        self.assertEqual(self.kid_cash.current_balance, Decimal('0.00'))
+
+    def test_auto_approve_completes_into_the_default_entity(self):
+        self.rule(app_key='gpay', default_entity=self.kid_bank, is_auto_approve_on=True)
+        response = self.send()
+        self.assertEqual(response.status_code, 201, response.data)
+        tx = Transaction.objects.get(pk=response.data['transaction_id'])
+        self.assertEqual((tx.status, tx.payee_id, tx.payee_owner_id), ('COMPLETED', self.kid_bank.pk, self.payee.pk))
+        self.kid_bank.refresh_from_db()
+        self.assertEqual(self.kid_bank.current_balance, Decimal('50.00'))
+
+    def test_other_payment_types_fall_back_to_the_catch_all_rule(self):
+        self.rule(app_key='gpay', default_entity=self.kid_bank, is_auto_approve_on=True)
+        self.rule(default_entity=self.kid_bank)
+        response = self.send(mode=None)
+        self.assertEqual((response.data['status'], response.data['payee']['entity_id']), ('PENDING', self.kid_bank.pk))
+
+    def test_blocked_payment_type_is_forbidden(self):
+        self.rule(app_key='gpay', is_allowed=False)
+        response = self.send()
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_solo_payments_skip_the_rules(self):
+        shop = Entity.objects.create(owner=self.payer, name="Shop", type="EXTERNAL_PAYEE")
+        response = self.send(payee=shop.pk)
+        self.assertEqual(response.data['status'], 'COMPLETED')
+
+    def test_payer_cannot_choose_the_status_of_a_networked_payment(self):
+        response = self.send(status='COMPLETED')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('status', response.data)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_unconnected_users_cannot_be_paid(self):
+        UserConnection.objects.all().delete()
+        self.assertEqual(self.send().status_code, 403)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_payer_must_be_mine(self):
+        response = self.send(payer=self.kid_bank.pk, payee=self.wallet.pk)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('payer', response.data)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.current_balance, Decimal('500.00'))
+
+    def test_payer_cannot_complete_or_redirect_a_pending_payment(self):
+        tx_id = self.send().data['transaction_id']
+        url = f'/api/transactions/{tx_id}/'
+        for body in ({'status': 'COMPLETED'}, {'payee': self.kid_bank.pk}, {'amount': '5000.00'}):
+            response = self.client.patch(url, body, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(list(response.data), list(body))
+        self.assertEqual(self.client.patch(url, {'description': 'pocket money'}, format='json').status_code, 200)
+        solo = self.send(payee=Entity.objects.create(owner=self.payer, name="Shop", type="EXTERNAL_PAYEE").pk)
+        response = self.client.patch(f"/api/transactions/{solo.data['transaction_id']}/", {'payee': self.kid_cash.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        self.client.force_authenticate(user=self.payee)
+        self.assertEqual(self.client.patch(url, {'description': 'mine now'}, format='json').status_code, 404)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+        tx = Transaction.objects.get(pk=tx_id)
+        self.assertEqual((tx.status, tx.payee_id, tx.amount), ('PENDING', self.kid_cash.pk, Decimal('50.00')))
+
+
+class TransactionBatchDecisionTests(APITestCase):
+    url = '/api/transactions/batch/'
+
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', email='alice@example.com', password=None)
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com', password=None)
+        self.alice_bank = Entity.objects.create(owner=self.alice, name="Alice Bank", type="ACCOUNT", current_balance=Decimal('1000.00'))
+        self.bob_accounts = [
+            Entity.objects.create(owner=self.bob, name=f"Bob {i}", type="ACCOUNT", current_balance=Decimal('100.00'))
+            for i in range(2)
+        ]
+        self.food = Entity.objects.create(owner=self.alice, name="Food", type="CATEGORY")
+        self.start = timezone.now() - timezone.timedelta(days=20)
+        self.client.force_authenticate(user=self.bob)
+
+    def pay(self, amount, days, status='PENDING', payee=None):
+        return Transaction.objects.create(
+            payer=self.alice_bank, payee=payee or self.bob_accounts[0], amount=Decimal(amount),
+            date=self.start + timezone.timedelta(days=days), status=status, category=self.food,
+        )
+
+    def snapshots(self):
+        return (
+            list(Entity.objects.order_by('pk').values_list('pk', 'current_balance')),
+            list(Posting.objects.order_by('entity_id', 'date', 'transaction_id').values_list(
+                'entity_id', 'transaction_id', 'amount', 'running_total'
+            )),
+            list(CategoryRollup.objects.order_by('entity_id', 'month', 'status').values_list(
+                'entity_id', 'month', 'status', 'total', 'count'
+            )),
+            list(ChatSummary.objects.order_by('entity_id', 'low_user_id').values_list(
+                'entity_id', 'low_user_id', 'last_transaction_id', 'pending_count'
+            )),
+        )
+
+    def test_batch_matches_one_by_one_and_rebuilds(self):
+        rng = random.Random(24)
+        for _ in range(15):
+            self.pay(f'{rng.randint(1, 900)}.00', rng.randint(0, 20), status='COMPLETED', payee=rng.choice(self.bob_accounts))
+        pending = [
+            self.pay(f'{rng.randint(1, 900)}.00', rng.randint(0, 20), payee=rng.choice(self.bob_accounts))
+            for _ in range(12)
+        ]
+        accept, reject = [tx.pk for tx in pending[:8]], [tx.pk for tx in pending[8:]]
+
+        with db_transaction.atomic():
+            for tx in pending:
+                tx.status = 'COMPLETED' if tx.pk in accept else 'REJECTED'
+                tx.save()
+            one_by_one = self.snapshots()
+            db_transaction.set_rollback(True)
+
+        response = self.client.post(self.url, {'accept': accept, 'reject': reject}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            response.data['results'],
+            {**{pk: 'COMPLETED' for pk in accept}, **{pk: 'REJECTED' for pk in reject}},
+        )
+        batched = self.snapshots()
+        self.assertEqual(batched, one_by_one)
+
+        rebuild_postings([self.alice_bank.pk] + [entity.pk for entity in self.bob_accounts])
+        rebuild_rollups()
+        rebuild_chat_summaries()
+        self.assertEqual(self.snapshots(), batched)
+
+    def test_migration_backfill_matches_the_live_tables(self):
+        backfills = [
+            import_module(f'core_transaction.migrations.{name}').backfill
+            for name in ('0008_backfill_postings', '0009_backfill_category_rollups', '0010_backfill_chat_summaries')
+        ]
+        rng = random.Random(8)
+        for _ in range(20):
+            status = rng.choice(['PENDING', 'COMPLETED', 'REJECTED'])
+            self.pay(f'{rng.randint(1, 900)}.00', rng.randint(0, 20), status=status, payee=rng.choice(self.bob_accounts))
+        live = self.snapshots()
+        for model in (Posting, CategoryRollup, ChatSummary):
+            model.objects.all().delete()
+        for backfill in backfills:
+            backfill(django_apps, None)
+        self.assertEqual(self.snapshots(), live)
+
+    def test_per_id_outcomes(self):
+        mine = self.pay('5.00', 1)
+        done = self.pay('5.00', 2, status='COMPLETED')
+        theirs = Transaction.objects.create(
+            payer=self.bob_accounts[0], payee=self.alice_bank, amount=Decimal('5.00'), date=timezone.now()
+        )
+        response = self.client.post(self.url, {'accept': [mine.pk, done.pk, theirs.pk, 999999]}, format='json')
+        self.assertEqual(response.data['results'], {
+            mine.pk: 'COMPLETED', done.pk: 'not_pending', theirs.pk: 'forbidden', 999999: 'not_found',
+        })
+        theirs.refresh_from_db()
+        self.assertEqual(theirs.status, 'PENDING')
+
+    def test_invalid_bodies(self):
+        tx = self.pay('5.00', 1)
+        for body in ({}, {'accept': [tx.pk], 'reject': [tx.pk]}, {'accept': ['x']}):
+            self.assertEqual(self.client.post(self.url, body, format='json').status_code, 400)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        def queries(n):
+            ids = [self.pay('1.00', 1).pk for _ in range(n)]
+            with CaptureQueriesContext(connection) as captured:
+                self.client.post(self.url, {'accept': ids}, format='json')
+            return len(captured)
+
+        queries(1)  # creates the COMPLETED rollup row
+        self.assertEqual(queries(3), queries(12))
+
+
+class TransactionApprovalTests(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', email='alice@example.com', password=None)
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com', password=None)
+        self.alice_bank = Entity.objects.create(owner=self.alice, name="Alice Bank", type="ACCOUNT", current_balance=Decimal('500.00'))
+        self.bob_bob = Entity.objects.create(owner=self.bob, name="BOB", type="ACCOUNT")
+        self.bob_hdfc = Entity.objects.create(owner=self.bob, name="HDFC", type="ACCOUNT")
+        self.tx = Transaction.objects.create(
+            payer=self.alice_bank, payee=self.bob_bob, amount=Decimal('40.00'), date=timezone.now()
+        )
+        self.url = f'/api/transactions/{self.tx.pk}/approve/'
+        self.client.force_authenticate(user=self.bob)
+
+    def balances(self):
+        return [Entity.objects.get(pk=e.pk).current_balance for e in (self.alice_bank, self.bob_bob, self.bob_hdfc)]
+
+    def test_accept_as_is(self):
+        response = self.client.post(self.url, {}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['status'], 'COMPLETED')
+        self.assertEqual(self.balances(), [Decimal('460.00'), Decimal('40.00'), Decimal('0.00')])
+
+    def test_modify_and_accept_moves_the_money_to_the_new_payee(self):
+        response = self.client.post(self.url, {'payee': self.bob_hdfc.pk}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['payee']['entity_id'], self.bob_hdfc.pk)
+        self.assertEqual(self.balances(), [Decimal('460.00'), Decimal('0.00'), Decimal('40.00')])
+        self.assertEqual(
+            sorted(Posting.objects.filter(transaction=self.tx).values_list('entity_id', 'amount')),
+            sorted([(self.alice_bank.pk, Decimal('-40.00')), (self.bob_hdfc.pk, Decimal('40.00'))]),
+        )
+        self.assertEqual(ChatSummary.objects.get(low_user_id=min(self.alice.pk, self.bob.pk)).pending_count, 0)
+
+    def test_new_payee_must_be_one_of_my_accounts(self):
+        food = Entity.objects.create(owner=self.bob, name="Food", type="CATEGORY")
+        for payee in (self.alice_bank.pk, food.pk, 999999):
+            response = self.client.post(self.url, {'payee': payee}, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('payee', response.data)
+        self.tx.refresh_from_db()
+        self.assertEqual((self.tx.status, self.tx.payee_id), ('PENDING', self.bob_bob.pk))
+
+    def test_only_the_payee_can_approve_a_pending_transaction(self):
+        self.client.force_authenticate(user=self.alice)
+        self.assertEqual(self.client.post(self.url, {}, format='json').status_code, 403)
+        stranger = User.objects.create_user(username='eve', email='eve@example.com', password=None)
+        self.client.force_authenticate(user=stranger)
+        self.assertEqual(self.client.post(self.url, {}, format='json').status_code, 404)
+
+        self.client.force_authenticate(user=self.bob)
+        self.assertEqual(self.client.post(self.url, {}, format='json').status_code, 200)
+        self.assertEqual(self.client.post(self.url, {}, format='json').status_code, 400)
+
+
+class ApprovalConcurrencyTests(TransactionTestCase):
+    """
+    Concurrent approvals of one transaction (some modifying the payee), each
+    thread with its own DB connection, post it exactly once. On PostgreSQL
+    the losers wait on approve_pending's row lock; SQLite ignores FOR UPDATE
+    and reports the contention as "locked" instead, so, like
+    BalanceEngineConcurrencyTests, each approval is retried until it goes
+    through and then must find the transaction no longer PENDING.
+    """
+
+    THREADS = 6
+
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', email='alice@example.com', password=None)
+        self.bob = User.objects.create_user(username='bob', email='bob@example.com', password=None)
+        self.alice_bank = Entity.objects.create(owner=self.alice, name="Alice Bank", type="ACCOUNT", current_balance=Decimal('500.00'))
+        self.bob_accounts = [
+            Entity.objects.create(owner=self.bob, name=f"Bob {i}", type="ACCOUNT") for i in range(2)
+        ]
+        self.tx = Transaction.objects.create(
+            payer=self.alice_bank, payee=self.bob_accounts[0], amount=Decimal('40.00'), date=timezone.now()
+        )
+
+    def approve_worker(self, index, barrier, outcomes):
+        try:
+            barrier.wait()
+            payee = self.bob_accounts[index % 2]
+            retry_locked(lambda: approve_pending(self.bob, self.tx.pk, payee.pk))
+            outcomes.append('approved')
+        except ValidationError:
+            outcomes.append('not_pending')
+        except Exception as exc:  # surfaced in the main thread
+            outcomes.append(exc)
+        finally:
+            connection.close()
+
+    def test_double_accepts_cannot_double_post(self):
+        outcomes, barrier = [], threading.Barrier(self.THREADS)
+        threads = [
+            threading.Thread(target=self.approve_worker, args=(index, barrier, outcomes)) for index in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(outcomes, key=str), ['approved'] + ['not_pending'] * (self.THREADS - 1))
+
+        self.tx.refresh_from_db()
+        self.alice_bank.refresh_from_db()
+        self.assertEqual(self.tx.status, 'COMPLETED')
+        self.assertEqual(self.alice_bank.current_balance, Decimal('460.00'))
+        received = [Entity.objects.get(pk=e.pk).current_balance for e in self.bob_accounts]
+        self.assertEqual(sorted(received), [Decimal('0.00'), Decimal('40.00')])
+        self.assertEqual(Entity.objects.get(pk=self.tx.payee_id).current_balance, Decimal('40.00'))
+        self.assertEqual(Posting.objects.filter(transaction=self.tx).count(), 2)
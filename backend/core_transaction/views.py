@@ -1,6 +1,19 @@
-from rest_framework import viewsets, permissions
+import os
+from functools import cached_property
+
+from django.conf import settings
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+from connections.rules import RuleResolver
+from users.batch import BatchDecisionSerializer
+from users.response_cache import conditional_per_user
+from .approvals import approve_pending, settle_pending
+from .importer import TransactionImporter, parse_rows
 from .models import Transaction
-from .serializers import TransactionSerializer
+from .pagination import TransactionCursorPagination
+from .serializers import TransactionApprovalSerializer, TransactionSerializer
 
 class TransactionViewSet(viewsets.ModelViewSet):
     """
@@ -8,6 +21,7 @@ class TransactionViewSet(viewsets.ModelViewSet):
     """
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TransactionCursorPagination
 
     def get_queryset(self):
         """
@@ -16,10 +30,109 @@ class TransactionViewSet(viewsets.ModelViewSet):
         
         Since we removed the 'user' field, we need to filter by transactions
         where the user is the owner of either the payer or the payee entity.
+        Only the payer's side may edit or delete a transaction; the payee
+        answers through `approve` and `batch`.
         """
         user = self.request.user
-        return Transaction.objects.filter(
-            models.Q(payer__owner=user) | models.Q(payee__owner=user)
-        ).distinct().order_by('-date')
+        queryset = Transaction.objects.for_display().visible_to(user).order_by('-date', '-transaction_id')
+        if self.action in ('update', 'partial_update', 'destroy'):
+            queryset = queryset.filter(payer_owner=user)
+        return queryset
+
+    @conditional_per_user('transactions')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    def get_keyset_branches(self, queryset):
+        """
+        Used by the paginator to split the list queryset for list pages:
+        one index range scan per side of the visibility filter.
+        """
+        return queryset.visibility_branches(self.request.user)
+
+    @cached_property
+    def rules(self):
+        return RuleResolver()
+
+    def perform_create(self, serializer):
+        """
+        Between the user's own entities a payment is solo: completed at once
+        unless another status is sent. A payment into someone else's entity is networked: the payee's
+        connection permission decides whether it is allowed, which of their
+        entities receives it (their default, if set) and whether it is
+        completed at once or waits for their approval. The serializer has
+        already checked that the user owns the payer.
+        """
+        payee = serializer.validated_data['payee']
+        user = self.request.user
+        if payee.owner_id == user.pk:
+            serializer.save(status=serializer.validated_data.get('status', 'COMPLETED'))
+            return
+
+        mode = serializer.validated_data.get('mode')
+        decision = self.rules.decide(user.pk, payee.owner_id, mode.app_key if mode else '')
+        if not decision.allowed:
+            raise PermissionDenied("The payee does not accept this payment type from you.")
+        if decision.default_entity_id is not None and decision.default_entity_id != payee.pk:
+            payee = decision.default_entity_copy()
+        serializer.save(payee=payee, status='COMPLETED' if decision.auto_approve else 'PENDING')
+
+    @action(detail=True, methods=['post'])
+    def approve(self, request, pk=None):
+        """
+        Accept a PENDING transaction paid to the current user, as-is or, with
+        `{"payee": <entity_id>}`, into another of their accounts ("Modify &
+        Accept"). See core_transaction/approvals.py.
+        """
+        serializer = TransactionApprovalSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        instance = approve_pending(request.user, pk, serializer.validated_data.get('payee'))
+        return Response(self.get_serializer(instance).data)
+
+    @action(detail=False, methods=['post'], url_path='batch')
+    def batch(self, request):
+        """
+        Accept and/or reject many PENDING transactions paid to the current
+        user: `{"accept": [ids], "reject": [ids]}`. Every id gets its outcome
+        in `results` (see core_transaction/approvals.py).
+        """
+        serializer = BatchDecisionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({"results": settle_pending(request.user, **serializer.validated_data)})
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Import many transactions at once.
+
+        The body is either a JSON array of transactions or a multipart upload
+        with a `file` field holding a .json or .csv document. `?partial=true`
+        inserts the valid rows and reports the rest; by default a single
+        invalid row rejects the whole batch.
+        """
+        upload = request.FILES.get('file')
+        if upload is not None:
+            fmt = os.path.splitext(upload.name)[1].lstrip('.').lower()
+            try:
+                rows = parse_rows(upload.read(), fmt)
+            except (ValueError, UnicodeDecodeError) as exc:
+                return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        elif isinstance(request.data, list):
+            rows = request.data
+        else:
+            return Response(
+                {"detail": "Send a JSON array of transactions or upload a .json/.csv file."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(rows) > settings.TRANSACTION_IMPORT_MAX_ROWS:
+            return Response(
+                {"detail": f"At most {settings.TRANSACTION_IMPORT_MAX_ROWS} transactions per import."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-from django.db import models
+        partial = request.query_params.get('partial', '').lower() in ('1', 'true', 'yes')
+        result = TransactionImporter(request.user, partial=partial).run(rows)
+        if result['errors'] and not result['created']:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_201_CREATED)
@@ -0,0 +1,66 @@
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from .models import Entity
+
+# Pre-built CATEGORY entities every user gets, by the template version that
+# introduced them. To add categories, append a new version: users already on
+# an older version get only the new names (see seed_default_categories).
+DEFAULT_CATEGORIES = {
+    1: [
+        'Food',
+        'Groceries',
+        'Transport',
+        'Shopping',
+        'Bills & Utilities',
+        'Rent',
+        'Health',
+        'Entertainment',
+        'Education',
+        'Travel',
+        'Gifts',
+        'Other',
+    ],
+}
+DEFAULT_CATEGORIES_VERSION = max(DEFAULT_CATEGORIES)
+
+
+def seed_default_categories(users):
+    """
+    Give `users` the default categories they do not have yet (by version,
+    skipping names they already use), with one bulk INSERT, and mark them as
+    up to date. Returns the number of categories created.
+    """
+    from sync.changes import record_changes
+    from sync.models import SyncChange
+    from users.models import User
+    from users.response_cache import bump_versions
+
+    users = [user for user in users if user.default_categories_version < DEFAULT_CATEGORIES_VERSION]
+    if not users:
+        return 0
+    existing = set(
+        Entity.objects.filter(owner__in=users, type='CATEGORY')
+        .annotate(lower_name=Lower('name'))
+        .values_list('owner_id', 'lower_name')
+    )
+    categories = []
+    for user in users:
+        for version in sorted(DEFAULT_CATEGORIES):
+            if version <= user.default_categories_version:
+                continue
+            for name in DEFAULT_CATEGORIES[version]:
+                if (user.pk, name.lower()) not in existing:
+                    categories.append(Entity(owner=user, name=name, type='CATEGORY'))
+
+    with transaction.atomic():
+        created = Entity.objects.bulk_create(categories)
+        User.objects.filter(pk__in=[user.pk for user in users]).update(
+            default_categories_version=DEFAULT_CATEGORIES_VERSION
+        )
+        # bulk_create sends no signals: do what the Entity receivers would.
+        record_changes((entity.owner_id, SyncChange.MODEL_ENTITY, entity.pk, False) for entity in created)
+        bump_versions(*[user.pk for user in users])
+    for user in users:
+        user.default_categories_version = DEFAULT_CATEGORIES_VERSION
+    return len(created)
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from entities.defaults import DEFAULT_CATEGORIES_VERSION, seed_default_categories
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Give existing users the default categories of the current template "
+        "version they do not have yet. Users are processed in chunks by id, "
+        "one transaction and one bulk INSERT per chunk; users already on the "
+        "current version are skipped, so the command can be re-run safely."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500, help="Users per transaction.")
+
+    def handle(self, *args, **options):
+        pending = User.objects.filter(default_categories_version__lt=DEFAULT_CATEGORIES_VERSION).order_by("pk")
+        remaining = pending.count()
+        size = options["chunk_size"]
+        t0 = time.perf_counter()
+        users = created = 0
+        last_pk = 0
+        while True:
+            chunk = list(pending.filter(pk__gt=last_pk).only("pk", "default_categories_version")[:size])
+            if not chunk:
+                break
+            created += seed_default_categories(chunk)
+            users += len(chunk)
+            last_pk = chunk[-1].pk
+            self.stdout.write(f"{users}/{remaining} users, {created} categories")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {created} categories for {users} users (template v{DEFAULT_CATEGORIES_VERSION}) "
+                f"in {time.perf_counter() - t0:.1f}s"
+            )
+        )
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:47
+
+from django.db import migrations, models
+from django.db.models import Exists, F, OuterRef, Q
+
+
+def backfill_opening_balance(apps, schema_editor):
+    """
+    An entity without COMPLETED transactions has never been posted to, so its
+    stored balance is its opening balance. For the others there is no record
+    of the balance they started with: opening_balance stays 0 rather than
+    being derived from the stored balance, which would absorb any drift.
+    `manage.py reconcile_balances --dry-run` then reports them, and
+    `--accept-drift` adopts the stored balances once they have been checked.
+    """
+    Entity = apps.get_model("entities", "Entity")
+    Transaction = apps.get_model("core_transaction", "Transaction")
+    completed = Transaction.objects.filter(status="COMPLETED")
+    posted = Q(Exists(completed.filter(payer=OuterRef("pk")))) | Q(Exists(completed.filter(payee=OuterRef("pk"))))
+    Entity.objects.exclude(posted).update(opening_balance=F("current_balance"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entities", "0003_entity_current_balance"),
+        ("core_transaction", "0003_transaction_owner_columns"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="entity",
+            name="opening_balance",
+            field=models.DecimalField(
+                decimal_places=2, default=0.0, editable=False, max_digits=19
+            ),
+        ),
+        migrations.RunPython(backfill_opening_balance, migrations.RunPython.noop),
+    ]
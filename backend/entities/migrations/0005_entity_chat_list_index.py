@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entities", "0004_entity_opening_balance"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="entity",
+            index=models.Index(
+                fields=["owner", "type", "-updated_at"],
+                name="entities_en_owner_i_ce8656_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:38
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+# Substring search on Postgres: a trigram index lets LIKE '%q%' on lower(name)
+# use an index instead of scanning the owner's names. Other backends make do
+# with the expression index.
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS entity_lname_trgm_idx ON entities_entity USING gin (lower(name) gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS entity_lname_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entities", "0005_entity_chat_list_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="entity",
+            index=models.Index(
+                models.F("owner"),
+                django.db.models.functions.text.Lower("name"),
+                models.F("type"),
+                name="entity_owner_lname_type_idx",
+            ),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Lower
 from django.conf import settings
 
 class Entity(models.Model):
@@ -19,11 +21,29 @@ class Entity(models.Model):
     name = models.CharField(max_length=255)
     type = models.CharField(max_length=20, choices=ENTITY_TYPES)
     current_balance = models.DecimalField(max_digits=19, decimal_places=2, default=0.00)
+    # Balance before any transaction, i.e. current_balance minus the net of all
+    # COMPLETED transactions. Used to rebuild current_balance from the ledger.
+    opening_balance = models.DecimalField(max_digits=19, decimal_places=2, default=0.00, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.name} ({self.get_type_display()})"
 
+    def save(self, *args, **kwargs):
+        # A new entity has no transactions yet, so whatever balance it starts
+        # with is its opening balance.
+        if self._state.adding:
+            self.opening_balance = self.current_balance
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name_plural = "Entities"
+        indexes = [
+            # Chat list: a user's external payees, most recently updated first.
+            models.Index(fields=["owner", "type", "-updated_at"]),
+            # Search/autocomplete: prefix range seeks in name order, and
+            # substring scans that stay within one owner's names (see
+            # EntityViewSet.search).
+            models.Index(F("owner"), Lower("name"), F("type"), name="entity_owner_lname_type_idx"),
+        ]
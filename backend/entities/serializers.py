@@ -7,15 +7,64 @@ class EntitySerializer(serializers.ModelSerializer):
         fields = ['entity_id', 'name', 'type', 'current_balance', 'created_at']
         read_only_fields = ['entity_id', 'created_at']
 
+    def update(self, instance, validated_data):
+        # Editing the balance by hand corrects the starting point; it is not a
+        # money movement, so keep opening_balance + ledger == current_balance.
+        if 'current_balance' in validated_data:
+            instance.opening_balance += validated_data['current_balance'] - instance.current_balance
+        return super().update(instance, validated_data)
+
+class CachedEntityRenderer:
+    """
+    Renders Entity instances exactly like EntitySerializer, for use when many
+    entities are nested in one response (e.g. payer/payee of every transaction).
+
+    Instantiating a DRF serializer per row deep-copies its fields each time, so
+    instead the readable fields of a single EntitySerializer are resolved once
+    per process and reused. Rendered dicts are memoized by entity_id for the
+    lifetime of the renderer, which should not outlive one response.
+    """
+
+    _fields = None
+
+    def __init__(self):
+        self._rendered = {}
+
+    @classmethod
+    def get_fields(cls):
+        if cls._fields is None:
+            cls._fields = [(name, field) for name, field in EntitySerializer().fields.items() if not field.write_only]
+        return cls._fields
+
+    def render(self, entity):
+        data = self._rendered.get(entity.entity_id)
+        if data is None:
+            data = {name: field.to_representation(field.get_attribute(entity)) for name, field in self.get_fields()}
+            self._rendered[entity.entity_id] = data
+        return data
+
+
 class ChatListItemSerializer(serializers.Serializer):
     """
     A unified serializer for items in the chat list.
-    Can represent either a UserConnection (Friend) or an Entity (Contact/Category).
+    Can represent either a UserConnection (Friend) or an Entity (Contact/Category),
+    as the `chat_*` rows built by ChatListViewSet.get_keyset_branches().
     """
-    id = serializers.CharField()
-    name = serializers.CharField()
-    type = serializers.CharField()
-    status = serializers.CharField(required=False, allow_null=True)
-    avatar = serializers.CharField(required=False, allow_null=True)
-    last_message = serializers.CharField(required=False, allow_null=True)
+    id = serializers.CharField(source='chat_id')
+    name = serializers.CharField(source='chat_name')
+    type = serializers.CharField(source='chat_type')
+    status = serializers.CharField(source='chat_status', required=False, allow_null=True)
+    avatar = serializers.CharField(source='chat_avatar', required=False, allow_null=True)
+    last_message = serializers.SerializerMethodField()
+    last_transaction_id = serializers.IntegerField(source='chat_last_transaction_id', allow_null=True)
+    last_amount = serializers.DecimalField(
+        source='chat_last_amount', max_digits=19, decimal_places=2, allow_null=True
+    )
+    last_transaction_at = serializers.DateTimeField(source='chat_last_date', allow_null=True)
+    pending_count = serializers.IntegerField(source='chat_pending_count')
     updated_at = serializers.DateTimeField()
+
+    def get_last_message(self, item):
+        if item['chat_last_amount'] is None:
+            return None
+        return f"₹{item['chat_last_amount']:.2f}"
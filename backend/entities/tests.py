@@ -1,6 +1,18 @@
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework.test import APITestCase
 from users.models import User
+from entities import defaults
+from entities.defaults import DEFAULT_CATEGORIES, DEFAULT_CATEGORIES_VERSION, seed_default_categories
 from entities.models import Entity
+from connections.models import UserConnection
+from core_transaction.models import Transaction
 
 class EntityTests(APITestCase):
     def setUp(self):
@@ -30,3 +42,243 @@ class EntityTests(APITestCase):
             type="WALLET"
         )
         self.assertEqual(entity_default.current_balance, 0.00)
+
+
+class ChatListTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='me', email='me@example.com', password='password123')
+        self.client.force_authenticate(user=self.user)
+
+    def make_chats(self, n):
+        for i in range(n):
+            friend = User.objects.create_user(
+                username=f'friend{i}', email=f'friend{i}@example.com', password=None,
+                first_name=f'Friend{i}' if i % 3 else ''
+            )
+            requester, receiver = (self.user, friend) if i % 2 else (friend, self.user)
+            UserConnection.objects.create(requester=requester, receiver=receiver, status='accepted')
+            Entity.objects.create(owner=self.user, name=f"Payee {i}", type="EXTERNAL_PAYEE")
+        # Neither of these is a chat.
+        UserConnection.objects.create(
+            requester=self.user, status='pending',
+            receiver=User.objects.create_user(username='stranger', email='stranger@example.com', password=None),
+        )
+        Entity.objects.create(owner=self.user, name="Savings", type="ACCOUNT")
+
+    def fetch_all(self, page_size):
+        rows, url, params = [], '/api/chat-list/', {'page_size': page_size}
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(queries), 1)
+            rows.extend(response.data['results'])
+            url, params = response.data['next'], None
+        return rows
+
+    def test_paginates_union_of_connections_and_payees_in_one_query(self):
+        """Every page is one query, and the pages add up to the full list, newest first."""
+        self.make_chats(12)
+        rows = self.fetch_all(page_size=5)
+        self.assertEqual(len(rows), 24)
+        self.assertEqual(len({row['id'] for row in rows}), 24)
+        keys = [(row['updated_at'], row['id']) for row in rows]
+        self.assertEqual(keys, sorted(keys, reverse=True))
+
+        friends = {row['name']: row for row in rows if row['type'] == 'USER'}
+        self.assertIn('Friend1', friends)
+        self.assertIn('friend0', friends)  # no name: falls back to username
+        self.assertEqual(friends['Friend1']['status'], 'online')
+        payee = next(row for row in rows if row['type'] == 'ENTITY')
+        self.assertTrue(payee['id'].startswith('ent_'))
+        self.assertIsNone(payee['status'])
+
+    def test_query_count_does_not_grow_with_chats(self):
+        self.make_chats(2)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get('/api/chat-list/')
+        for i in range(30):
+            friend = User.objects.create_user(username=f'more{i}', email=f'more{i}@example.com', password=None)
+            UserConnection.objects.create(requester=self.user, receiver=friend, status='accepted')
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get('/api/chat-list/')
+        self.assertEqual(len(response.data['results']), 34)
+        self.assertEqual(len(few), len(many))
+
+    def test_rows_carry_last_transaction_and_pending_count(self):
+        """The chat summary comes from the same single query as the list."""
+        friend = User.objects.create_user(username='pal', email='pal@example.com', password=None, first_name='Pal')
+        UserConnection.objects.create(requester=friend, receiver=self.user, status='accepted')
+        mine = Entity.objects.create(owner=self.user, name="Bank", type="ACCOUNT")
+        theirs = Entity.objects.create(owner=friend, name="Pal's Bank", type="ACCOUNT")
+        shop = Entity.objects.create(owner=self.user, name="Shop", type="EXTERNAL_PAYEE")
+        Entity.objects.create(owner=self.user, name="Quiet Payee", type="EXTERNAL_PAYEE")
+        now = timezone.now()
+        Transaction.objects.create(payer=mine, payee=theirs, amount=Decimal('40.00'), date=now)
+        Transaction.objects.create(payer=theirs, payee=mine, amount=Decimal('15.50'), date=now, status='COMPLETED')
+        Transaction.objects.create(payer=mine, payee=shop, amount=Decimal('9.99'), date=now, status='COMPLETED')
+
+        rows = {row['name']: row for row in self.fetch_all(page_size=10)}
+        self.assertEqual(rows['Pal']['last_message'], '₹15.50')
+        self.assertEqual(rows['Pal']['pending_count'], 1)
+        self.assertEqual(rows['Shop']['last_amount'], '9.99')
+        self.assertEqual(rows['Shop']['pending_count'], 0)
+        self.assertIsNone(rows['Quiet Payee']['last_message'])
+        self.assertIsNone(rows['Quiet Payee']['last_transaction_id'])
+
+
+class DefaultCategoryTests(APITestCase):
+    def test_signup_seeds_default_categories_in_one_insert(self):
+        """
+        Ensure a new user gets the default categories with a single bulk INSERT.
+        """
+        payload = {'email': 'new@example.com', 'username': 'newbie', 'password': 'pass12345'}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/users/', payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        inserts = [q['sql'] for q in queries if q['sql'].startswith('INSERT INTO "entities_entity"')]
+        self.assertEqual(len(inserts), 1)
+
+        user = User.objects.get(email='new@example.com')
+        names = sorted(Entity.objects.filter(owner=user, type='CATEGORY').values_list('name', flat=True))
+        self.assertEqual(names, sorted(DEFAULT_CATEGORIES[DEFAULT_CATEGORIES_VERSION]))
+        self.assertEqual(user.default_categories_version, DEFAULT_CATEGORIES_VERSION)
+
+    def test_backfill_command_skips_existing_names_and_is_idempotent(self):
+        """
+        Ensure the backfill seeds existing users in chunks without duplicating categories.
+        """
+        users = [
+            User.objects.create_user(email=f'old{i}@example.com', username=f'old{i}', password=None)
+            for i in range(3)
+        ]
+        Entity.objects.create(owner=users[0], name='food', type='CATEGORY')
+        out = StringIO()
+        call_command('seed_default_categories', chunk_size=2, stdout=out)
+        self.assertIn('3 users', out.getvalue())
+
+        template = DEFAULT_CATEGORIES[DEFAULT_CATEGORIES_VERSION]
+        for user in users:
+            self.assertEqual(Entity.objects.filter(owner=user, type='CATEGORY').count(), len(template))
+        call_command('seed_default_categories', stdout=StringIO())
+        self.assertEqual(Entity.objects.filter(type='CATEGORY').count(), 3 * len(template))
+
+    def test_new_template_version_adds_only_new_names(self):
+        """
+        Ensure users on an older template version only get the categories added since.
+        """
+        user = User.objects.create_user(email='v1@example.com', username='v1', password=None)
+        seed_default_categories([user])
+        templates = {**DEFAULT_CATEGORIES, DEFAULT_CATEGORIES_VERSION + 1: ['Pets']}
+        with mock.patch.dict(defaults.DEFAULT_CATEGORIES, templates), \
+                mock.patch.object(defaults, 'DEFAULT_CATEGORIES_VERSION', DEFAULT_CATEGORIES_VERSION + 1):
+            self.assertEqual(seed_default_categories([user]), 1)
+        self.assertTrue(Entity.objects.filter(owner=user, name='Pets').exists())
+        user.refresh_from_db()
+        self.assertEqual(user.default_categories_version, DEFAULT_CATEGORIES_VERSION + 1)
+
+
+class EntitySearchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='search@example.com', username='search', password=None)
+        self.other = User.objects.create_user(email='else@example.com', username='else', password=None)
+        self.client.force_authenticate(user=self.user)
+        for name, type_ in [
+            ('Ramesh Kirana', 'EXTERNAL_PAYEE'),
+            ('Auto Rickshaw', 'EXTERNAL_PAYEE'),
+            ('ramu chaiwala', 'EXTERNAL_PAYEE'),
+            ('Ram Mandir Trust', 'CATEGORY'),
+            ('HDFC Bank', 'ACCOUNT'),
+        ]:
+            Entity.objects.create(owner=self.user, name=name, type=type_)
+        Entity.objects.create(owner=self.other, name='Ramesh (theirs)', type='EXTERNAL_PAYEE')
+
+    def search(self, **params):
+        response = self.client.get('/api/entities/search/', params)
+        self.assertEqual(response.status_code, 200)
+        return [entity['name'] for entity in response.data]
+
+    def test_prefix_matches_rank_before_substring_matches(self):
+        """
+        Ensure names starting with the query come first, then names containing it.
+        """
+        self.assertEqual(self.search(q='RAM'), ['Ram Mandir Trust', 'Ramesh Kirana', 'ramu chaiwala'])
+        self.assertEqual(self.search(q='k'), ['Auto Rickshaw', 'HDFC Bank', 'Ramesh Kirana'])
+        self.assertEqual(self.search(q='ram', limit=1), ['Ram Mandir Trust'])
+
+    def test_type_filter_and_owner_scope(self):
+        """
+        Ensure results are the user's own entities of the requested types.
+        """
+        self.assertEqual(self.search(q='ram', type='EXTERNAL_PAYEE'), ['Ramesh Kirana', 'ramu chaiwala'])
+        self.assertEqual(self.search(q='a', type='ACCOUNT,CATEGORY'), ['HDFC Bank', 'Ram Mandir Trust'])
+        self.assertEqual(self.search(q='theirs'), [])
+
+    def test_wildcards_are_literal(self):
+        """
+        Ensure LIKE wildcards in the query are matched literally.
+        """
+        self.assertEqual(self.search(q='%'), [])
+        self.assertEqual(self.search(q='_'), [])
+
+    def test_invalid_parameters(self):
+        """
+        Ensure a missing query or an unknown type is a 400.
+        """
+        self.assertEqual(self.client.get('/api/entities/search/').status_code, 400)
+        self.assertEqual(self.client.get('/api/entities/search/', {'q': 'x', 'type': 'FRIEND'}).status_code, 400)
+
+    @skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite syntax')
+    def test_prefix_search_is_one_indexed_query(self):
+        """
+        Ensure a page filled by prefix matches is one range seek on the (owner, lower(name)) index.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            self.search(q='ram', limit=2)
+        self.assertEqual(len(queries), 1)
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {queries[-1]['sql']}")
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+        self.assertIn('USING INDEX entity_owner_lname_type_idx', plan)
+
+
+class TotalBalanceTests(APITestCase):
+    url = '/api/entities/total-balance/'
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='total@example.com', username='total', password=None)
+        self.other = User.objects.create_user(email='nottotal@example.com', username='nottotal', password=None)
+        self.client.force_authenticate(user=self.user)
+        self.bank = Entity.objects.create(owner=self.user, name='HDFC', type='ACCOUNT', current_balance=Decimal('1000.10'))
+        self.cash = Entity.objects.create(owner=self.user, name='Cash', type='ACCOUNT', current_balance=Decimal('0.20'))
+        self.wallet = Entity.objects.create(owner=self.user, name='Paytm', type='WALLET', current_balance=Decimal('50.00'))
+        Entity.objects.create(owner=self.user, name='Food', type='CATEGORY', current_balance=Decimal('999.00'))
+        Entity.objects.create(owner=self.other, name='Their Bank', type='ACCOUNT', current_balance=Decimal('5.00'))
+
+    def test_totals_per_type_and_account(self):
+        """
+        Ensure only the user's ACCOUNT and WALLET balances are summed, exactly.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total'], '1050.30')
+        self.assertEqual(response.data['by_type'], {'ACCOUNT': '1000.30', 'WALLET': '50.00'})
+        self.assertEqual([a['name'] for a in response.data['accounts']], ['Cash', 'HDFC', 'Paytm'])
+        self.assertEqual(response.data['accounts'][1]['current_balance'], '1000.10')
+
+    def test_cached_until_a_transaction_moves_money(self):
+        """
+        Ensure repeat reads are served from the cache and a transaction invalidates them.
+        """
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url)['X-Cache'], 'HIT')
+
+        shop = Entity.objects.create(owner=self.user, name='Shop', type='EXTERNAL_PAYEE')
+        Transaction.objects.create(
+            payer=self.bank, payee=shop, amount=Decimal('100.00'), date=timezone.now(), status='COMPLETED'
+        )
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['total'], '950.30')
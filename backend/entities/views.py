@@ -1,11 +1,31 @@
-from rest_framework import viewsets, permissions
+from decimal import Decimal
+from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from django.db.models import Q
+from django.db.models import Case, CharField, F, OuterRef, Q, Subquery, Value, When
+from django.conf import settings
+from django.db.models.functions import Cast, Coalesce, Concat, Lower, NullIf, Trim
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from .models import Entity
 from .serializers import EntitySerializer, ChatListItemSerializer
 from connections.models import UserConnection
 from connections.serializers import UserConnectionListSerializer
+from users.response_cache import cache_per_user, conditional_per_user
+from core_transaction.ledger import balance_at, balance_before
+from core_transaction.models import ChatSummary, Transaction
+from core_transaction.pagination import KeysetPagination, TransactionCursorPagination
+from core_transaction.rollups import month_of
+from core_transaction.serializers import EntityHistorySerializer
+
+SUMMARY_FIELDS = ('last_transaction_id', 'last_amount', 'last_date')
+# Columns of every chat list row, whatever the kind of chat (see ChatListViewSet).
+CHAT_COLUMNS = (
+    'chat_id', 'chat_name', 'chat_type', 'chat_status', 'chat_avatar',
+    *(f'chat_{field}' for field in SUMMARY_FIELDS), 'chat_pending_count', 'updated_at',
+)
+# Entity types whose balances make up the user's "Total Balance".
+BALANCE_TYPES = ('ACCOUNT', 'WALLET')
 
 class EntityViewSet(viewsets.ModelViewSet):
     serializer_class = EntitySerializer
@@ -14,51 +34,222 @@ class EntityViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return Entity.objects.filter(owner=self.request.user)
 
+    @conditional_per_user('entities')
+    @cache_per_user('entities')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Autocomplete over the user's entity names, case-insensitive: names
+        starting with `?q=` first, then names containing it, alphabetically.
+        `?type=` (repeatable or comma-separated) narrows the entity types and
+        `?limit=` caps the number of results.
+
+        Prefix matches are a range seek on the (owner, lower(name)) index;
+        the substring query only runs when they do not fill the page, and
+        scans that owner's index entries (or a trigram index on Postgres).
+        """
+        query = request.query_params.get('q', '').strip().lower()
+        if not query:
+            return Response({"detail": "`q` is required."}, status=status.HTTP_400_BAD_REQUEST)
+        types = {t for value in request.query_params.getlist('type') for t in value.split(',') if t}
+        unknown = types - {choice for choice, _ in Entity.ENTITY_TYPES}
+        if unknown:
+            return Response(
+                {"detail": f"Unknown entity type: {', '.join(sorted(unknown))}."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = min(int(request.query_params['limit']), settings.ENTITY_SEARCH_MAX_LIMIT)
+        except (KeyError, ValueError):
+            limit = settings.ENTITY_SEARCH_LIMIT
+        limit = max(limit, 1)
+
+        entities = self.get_queryset().annotate(lower_name=Lower('name'))
+        if types:
+            entities = entities.filter(type__in=types)
+        # lower(name) LIKE 'q%' cannot use the index everywhere; the range can,
+        # and LIKE then only rechecks the rows in it.
+        seek = Q(lower_name__gte=query, lower_name__lt=query[:-1] + chr(ord(query[-1]) + 1))
+        prefix = seek & Q(lower_name__startswith=query)
+        results = list(entities.filter(prefix).order_by('lower_name', 'entity_id')[:limit])
+        if len(results) < limit:
+            results += entities.filter(lower_name__contains=query).exclude(prefix).order_by(
+                'lower_name', 'entity_id'
+            )[: limit - len(results)]
+        return Response(EntitySerializer(results, many=True).data)
+
+    @action(detail=False, methods=['get'], url_path='total-balance')
+    @conditional_per_user('total-balance')
+    @cache_per_user('total-balance')
+    def total_balance(self, request):
+        """
+        The pinned "Total Balance" chat: the sum of the user's ACCOUNT and
+        WALLET balances, per type and per entity, from one query over the
+        stored balances. Cached per user; any transaction touching the user's
+        entities invalidates it (see users/signals.py).
+        """
+        accounts = list(
+            self.get_queryset()
+            .filter(type__in=BALANCE_TYPES)
+            .order_by('type', 'name', 'entity_id')
+            .values('entity_id', 'name', 'type', 'current_balance')
+        )
+        by_type = {entity_type: Decimal('0.00') for entity_type in BALANCE_TYPES}
+        for account in accounts:
+            by_type[account['type']] += account['current_balance']
+        return Response({
+            'total': str(sum(by_type.values(), Decimal('0.00'))),
+            'by_type': {entity_type: str(total) for entity_type, total in by_type.items()},
+            'accounts': [{**account, 'current_balance': str(account['current_balance'])} for account in accounts],
+        })
+
+    @action(detail=True, methods=['get'])
+    def balance(self, request, pk=None):
+        """
+        Balance of this entity as of `?at=<ISO datetime>` (default: now),
+        read from the posting ledger.
+        """
+
+        entity = self.get_object()
+        at = timezone.now()
+        if 'at' in request.query_params:
+            at = parse_datetime(request.query_params['at'])
+            if at is None:
+                return Response({"detail": "`at` must be an ISO 8601 datetime."}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(at):
+                at = timezone.make_aware(at)
+        return Response({
+            'entity_id': entity.entity_id,
+            'at': at,
+            'balance': str(balance_at(entity, at)),
+        })
+
+    @action(detail=True, methods=['get'])
+    def transactions(self, request, pk=None):
+        """
+        Newest-first, keyset-paginated history of this entity (as payer, payee
+        or category), each row carrying the entity's running balance.
+        """
+
+        entity = self.get_object()
+        paginator = TransactionCursorPagination()
+        # The first row of the page is the newest one before the cursor, so the
+        # balance after it is the ledger balance up to (excluding) the cursor.
+        position = paginator.decode_cursor(request, Transaction)
+        queryset = Transaction.objects.for_display().entity_history(entity, balance_before(entity, position))
+        page = paginator.paginate_queryset(queryset, request, self)
+        serializer = EntityHistorySerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def analytics(self, request, pk=None):
+        """
+        Monthly totals of the transactions tagged with this (category) entity,
+        per status, for the last `?months=` months (default 12), read from the
+        category rollups. `spent_this_month` is the COMPLETED total of the
+        current month.
+        """
+
+        entity = self.get_object()
+        try:
+            months = int(request.query_params.get('months', 12))
+        except ValueError:
+            months = 0
+        if not 1 <= months <= 120:
+            return Response({"detail": "`months` must be between 1 and 120."}, status=status.HTTP_400_BAD_REQUEST)
+
+        this_month = month_of(timezone.now())
+        first = this_month.year * 12 + this_month.month - months
+        since = this_month.replace(year=first // 12, month=first % 12 + 1)
+        rollups = entity.rollups.filter(month__gte=since).order_by('-month', 'status')
+        spent = sum(
+            (r.total for r in rollups if r.month == this_month and r.status == 'COMPLETED'),
+            Decimal('0.00'),
+        )
+        return Response({
+            'entity_id': entity.entity_id,
+            'spent_this_month': str(spent),
+            'months': [
+                {'month': r.month, 'status': r.status, 'total': str(r.total), 'count': r.count}
+                for r in rollups
+            ],
+        })
+
+class ChatListPagination(KeysetPagination):
+    """
+    Most recently updated chats first. `chat_id` ("conn_<id>"/"ent_<id>") is
+    unique across both kinds of chat and breaks ties.
+    """
+    ordering = ('-updated_at', '-chat_id')
+    union_branches = True
+
+
 class ChatListViewSet(viewsets.ViewSet):
+    """
+    The home screen chat list: accepted connections and external payees,
+    fetched, merged and paged by a single UNION ALL query.
+    """
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ChatListPagination
 
+    @conditional_per_user('chat-list')
+    @cache_per_user('chat-list')
     def list(self, request):
-        user = request.user
-        
-        # 1. Get Accepted Connections
-        connections = UserConnection.objects.filter(
-            (Q(requester=user) | Q(receiver=user)) & Q(status='accepted')
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(self.get_queryset(), request, self)
+        serializer = ChatListItemSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    def get_queryset(self):
+        """
+        The user's chats with friends: accepted connections. The friend is
+        whichever side is not the current user; both sides are joined in the
+        same row. The last transaction and pending count come from the pair's
+        ChatSummary, a unique-key lookup per row.
+        """
+        user = self.request.user
+
+        def friend(field):
+            return Case(
+                When(requester=user, then=F(f'receiver__{field}')),
+                default=F(f'requester__{field}'),
+            )
+
+        def summary(field):
+            pair = ChatSummary.objects.filter(low_user=OuterRef('low_user'), high_user=OuterRef('high_user'))
+            return Subquery(pair.values(field)[:1])
+
+        full_name = Trim(Concat(friend('first_name'), Value(' '), friend('last_name')))
+        friend_is_active = Q(requester=user, receiver__is_active=True) | Q(receiver=user, requester__is_active=True)
+        connections = UserConnection.objects.involving(user).filter(status='accepted').annotate(
+            chat_id=Concat(Value('conn_'), Cast('connection_id', CharField())),
+            chat_name=Coalesce(NullIf(full_name, Value('')), friend('username')),
+            chat_type=Value('USER'),
+            chat_status=Case(When(friend_is_active, then=Value('online')), default=Value('offline')),
+            chat_avatar=Value(None, output_field=CharField()),
+            **{f'chat_{field}': summary(field) for field in SUMMARY_FIELDS},
+            chat_pending_count=Coalesce(summary('pending_count'), 0),
+        )
+        return connections.values(*CHAT_COLUMNS)
+
+    def get_keyset_branches(self, queryset):
+        """
+        The connection chats plus one branch for the user's external payees,
+        with identical columns so the paginator can UNION them; an entity's
+        ChatSummary is a LEFT JOIN.
+        """
+        entities = Entity.objects.filter(owner=self.request.user, type='EXTERNAL_PAYEE').annotate(
+            chat_id=Concat(Value('ent_'), Cast('entity_id', CharField())),
+            chat_name=F('name'),
+            chat_type=Value('ENTITY'),
+            chat_status=Value(None, output_field=CharField()),
+            chat_avatar=Value(None, output_field=CharField()),
+            **{f'chat_{field}': F(f'chat_summary__{field}') for field in SUMMARY_FIELDS},
+            chat_pending_count=Coalesce(F('chat_summary__pending_count'), 0),
         )
-        
-        # 2. Get External Payees (Entities)
-        entities = Entity.objects.filter(owner=user, type='EXTERNAL_PAYEE')
-        
-        # 3. Transform to unified format
-        chat_list = []
-        
-        for conn in connections:
-            friend = conn.receiver if conn.requester == user else conn.requester
-            chat_list.append({
-                'id': f"conn_{conn.connection_id}",
-                'name': f"{friend.first_name} {friend.last_name}".strip() or friend.username,
-                'type': 'USER',
-                'status': 'online' if friend.is_active else 'offline',  # Use is_active field
-                'avatar': None, # Placeholder
-                'last_message': "No messages yet", # Placeholder
-                'updated_at': conn.updated_at
-            })
-            
-        for entity in entities:
-            chat_list.append({
-                'id': f"ent_{entity.entity_id}",
-                'name': entity.name,
-                'type': 'ENTITY',
-                'status': None,
-                'avatar': None,
-                'last_message': None,
-                'updated_at': entity.updated_at
-            })
-            
-        # Sort by updated_at desc
-        chat_list.sort(key=lambda x: x['updated_at'], reverse=True)
-        
-        serializer = ChatListItemSerializer(chat_list, many=True)
-        return Response(serializer.data)
+        return [queryset, entities.values(*CHAT_COLUMNS)]
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PaymentModesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "payment_modes"
+
+    def ready(self):
+        import payment_modes.signals  # noqa: F401
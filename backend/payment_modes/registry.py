@@ -0,0 +1,85 @@
+"""
+Process-wide, read-only view of the SupportedApp table.
+
+The table is tiny and almost never changes, but used to be queried once per
+payment mode serialized. The registry loads it once per process and is
+dropped whenever a SupportedApp is saved or deleted through the ORM (see
+payment_modes/signals.py). Writes that bypass signals (queryset.update(),
+raw SQL, other processes) are picked up after invalidate() or a restart.
+"""
+
+import hashlib
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from django.db import transaction
+
+
+@dataclass(frozen=True)
+class App:
+    key: str
+    name: str
+    supports_wallet: bool
+    icon: str | None
+
+
+class AppRegistry:
+    def __init__(self, apps):
+        self.apps = tuple(apps)
+        self.by_key = MappingProxyType({app.key: app for app in self.apps})
+        fingerprint = repr([(app.key, app.name, app.supports_wallet, app.icon) for app in self.apps])
+        self.etag = hashlib.md5(fingerprint.encode()).hexdigest()
+
+    def __contains__(self, key):
+        return key in self.by_key
+
+    def get(self, key):
+        return self.by_key.get(key)
+
+    def supports_wallet(self, key):
+        app = self.get(key)
+        return app is not None and app.supports_wallet
+
+
+_registry = None
+_generation = 0
+_lock = threading.Lock()
+
+
+def _load():
+    from .models import SupportedApp
+
+    rows = SupportedApp.objects.order_by('pk').values_list('key', 'name', 'supports_wallet', 'icon')
+    return AppRegistry(App(*row) for row in rows)
+
+
+def get_registry():
+    registry = _registry
+    if registry is not None:
+        return registry
+    generation = _generation
+    registry = _load()
+    _store(registry, generation)
+    return registry
+
+
+def _store(registry, generation):
+    global _registry
+    with _lock:
+        # An invalidation during the load means the rows read may be stale.
+        if generation == _generation:
+            _registry = registry
+
+
+def _drop():
+    global _registry, _generation
+    with _lock:
+        _registry = None
+        _generation += 1
+
+
+def invalidate():
+    """Drop the registry now and again after commit (a reload in between may have read uncommitted rows)."""
+    _drop()
+    transaction.on_commit(_drop)
@@ -1,6 +1,12 @@
+from django.db import transaction
 from rest_framework import serializers
 from .models import Payment_Mode, SupportedApp
+from .registry import get_registry
 from entities.models import Entity
+from entities.serializers import EntitySerializer
+from sync.changes import record_changes
+from sync.models import SyncChange
+from users.response_cache import bump_versions
 
 class SupportedAppSerializer(serializers.ModelSerializer):
     class Meta:
@@ -16,11 +22,12 @@ class PaymentModeSerializer(serializers.ModelSerializer):
         read_only_fields = ['mode_id', 'created_at', 'updated_at']
 
     def get_supports_wallet(self, obj):
-        try:
-            app = SupportedApp.objects.get(key=obj.app_key)
-            return app.supports_wallet
-        except SupportedApp.DoesNotExist:
-            return False
+        return get_registry().supports_wallet(obj.app_key)
+
+    def validate_app_key(self, value):
+        if value not in get_registry():
+            raise serializers.ValidationError("Unknown payment app. See /api/payment-modes/options/.")
+        return value
 
     def validate_linked_entity(self, value):
         user = self.context['request'].user
@@ -31,3 +38,87 @@ class PaymentModeSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data['owner'] = self.context['request'].user
         return super().create(validated_data)
+
+
+class PaymentModeSetupItemSerializer(serializers.Serializer):
+    app_key = serializers.CharField(max_length=50)
+    name = serializers.CharField(max_length=255, required=False)
+    linked_entity = serializers.IntegerField(required=False, allow_null=True)
+    create_wallet = serializers.BooleanField(default=False)
+
+    def validate_app_key(self, value):
+        if value not in get_registry():
+            raise serializers.ValidationError("Unknown payment app. See /api/payment-modes/options/.")
+        return value
+
+    def validate(self, attrs):
+        app = get_registry().get(attrs['app_key'])
+        attrs.setdefault('name', app.name)
+        if attrs['create_wallet']:
+            if attrs.get('linked_entity') is not None:
+                raise serializers.ValidationError("Pass either linked_entity or create_wallet, not both.")
+            if not app.supports_wallet:
+                raise serializers.ValidationError(f"{app.name} does not support wallets.")
+        return attrs
+
+
+class PaymentModeSetupSerializer(serializers.Serializer):
+    """
+    Smart Setup for many payment apps at once: creates every Payment_Mode,
+    plus a WALLET entity for the ones with create_wallet, with one bulk
+    INSERT each in a single transaction.
+    """
+
+    MAX_MODES = 50
+
+    modes = PaymentModeSetupItemSerializer(many=True, allow_empty=False, max_length=MAX_MODES)
+
+    def validate_modes(self, value):
+        user = self.context['request'].user
+        wanted = {item['linked_entity'] for item in value if item.get('linked_entity') is not None}
+        entities = Entity.objects.filter(owner=user, pk__in=wanted).in_bulk() if wanted else {}
+        # Keyed by item index, like DRF's own errors for nested lists.
+        errors = {
+            index: {'linked_entity': ["You can only link payment modes to your own entities."]}
+            for index, item in enumerate(value)
+            if item.get('linked_entity') is not None and item['linked_entity'] not in entities
+        }
+        if errors:
+            raise serializers.ValidationError(errors)
+        for item in value:
+            item['linked_entity'] = entities.get(item.get('linked_entity'))
+        return value
+
+    def create(self, validated_data):
+        user = self.context['request'].user
+        items = validated_data['modes']
+        with transaction.atomic():
+            wallets = Entity.objects.bulk_create([
+                Entity(owner=user, name=f"{item['name']} Wallet", type='WALLET')
+                for item in items if item['create_wallet']
+            ])
+            created_wallets = iter(wallets)
+            modes = Payment_Mode.objects.bulk_create([
+                Payment_Mode(
+                    owner=user,
+                    name=item['name'],
+                    app_key=item['app_key'],
+                    linked_entity=next(created_wallets) if item['create_wallet'] else item['linked_entity'],
+                )
+                for item in items
+            ])
+            # bulk_create sends no signals: do what the Entity and
+            # Payment_Mode receivers would.
+            record_changes(
+                [(user.pk, SyncChange.MODEL_ENTITY, wallet.pk, False) for wallet in wallets]
+                + [(user.pk, SyncChange.MODEL_PAYMENT_MODE, mode.pk, False) for mode in modes]
+            )
+            bump_versions(user.pk)
+        return modes
+
+
+class PaymentModeSetupResultSerializer(PaymentModeSerializer):
+    linked_entity_detail = EntitySerializer(source='linked_entity', read_only=True)
+
+    class Meta(PaymentModeSerializer.Meta):
+        fields = PaymentModeSerializer.Meta.fields + ['linked_entity_detail']
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import registry
+from .models import SupportedApp
+
+
+@receiver(post_save, sender=SupportedApp)
+@receiver(post_delete, sender=SupportedApp)
+def invalidate_registry(sender, **kwargs):
+    registry.invalidate()
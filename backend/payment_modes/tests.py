@@ -1,10 +1,13 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from users.models import User
 from entities.models import Entity
-from .models import Payment_Mode
+from .models import Payment_Mode, SupportedApp
 from .constants import SUPPORTED_APPS
+from . import registry
 
 class PaymentModeTests(APITestCase):
     def setUp(self):
@@ -170,3 +173,137 @@ class PaymentModeTests(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("already linked", response.data['error'])
+
+
+class SupportedAppRegistryTests(APITestCase):
+    def setUp(self):
+        registry.invalidate()
+        # Rows created by a test are rolled back without a signal.
+        self.addCleanup(registry.invalidate)
+        self.user = User.objects.create_user(username='reg', email='reg@example.com', password=None)
+        self.client.force_authenticate(user=self.user)
+
+    def test_serializing_modes_does_not_query_per_row(self):
+        """
+        Ensure supports_wallet is read from the registry, not one query per mode.
+        """
+        for app in SUPPORTED_APPS:
+            Payment_Mode.objects.create(owner=self.user, name=app['name'], app_key=app['key'])
+        registry.get_registry()
+        # The response version, then the modes.
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('payment-mode-list'))
+        wallets = {mode['app_key']: mode['supports_wallet'] for mode in response.data}
+        self.assertEqual(wallets, {app['key']: app['supports_wallet'] for app in SUPPORTED_APPS})
+
+    def test_registry_reloads_after_supported_app_changes(self):
+        """
+        Ensure saving or deleting a SupportedApp drops the registry.
+        """
+        self.assertFalse(registry.get_registry().supports_wallet('gpay'))
+        gpay = SupportedApp.objects.get(key='gpay')
+        gpay.supports_wallet = True
+        gpay.save()
+        self.assertTrue(registry.get_registry().supports_wallet('gpay'))
+        gpay.delete()
+        self.assertNotIn('gpay', registry.get_registry())
+
+    def test_unknown_app_key_is_rejected(self):
+        """
+        Ensure payment modes can only be created for a supported app.
+        """
+        url = reverse('payment-mode-list')
+        response = self.client.post(url, {'name': 'Mystery', 'app_key': 'nope'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('app_key', response.data)
+
+    def test_options_are_cacheable(self):
+        """
+        Ensure options carry an ETag and max-age, and revalidate to an empty 304.
+        """
+        url = reverse('payment-mode-options')
+        first = self.client.get(url)
+        self.assertIn('max-age=', first['Cache-Control'])
+        with self.assertNumQueries(0):
+            again = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(again.content, b'')
+
+        SupportedApp.objects.create(key='bhim', name='BHIM', supports_wallet=False)
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(changed.data[-1]['key'], 'bhim')
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+
+
+class PaymentModeSetupTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='setup', email='setup@example.com', password=None)
+        self.other = User.objects.create_user(username='other', email='other@example.com', password=None)
+        self.bank = Entity.objects.create(owner=self.user, name="My Bank", type="ACCOUNT")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('payment-mode-setup')
+
+    def setup(self, modes):
+        return self.client.post(self.url, {'modes': modes}, format='json')
+
+    def test_creates_modes_and_wallets(self):
+        """
+        Ensure one request creates every mode, creates wallets and links everything.
+        """
+        response = self.setup([
+            {'app_key': 'phonepe', 'create_wallet': True},
+            {'app_key': 'gpay', 'name': 'GPay (HDFC)', 'linked_entity': self.bank.entity_id},
+            {'app_key': 'cash'},
+        ])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        modes = response.data['payment_modes']
+        self.assertEqual([mode['name'] for mode in modes], ['PhonePe', 'GPay (HDFC)', 'Cash'])
+        self.assertEqual(modes[0]['linked_entity_detail']['name'], 'PhonePe Wallet')
+        self.assertEqual(modes[0]['linked_entity_detail']['type'], 'WALLET')
+        self.assertEqual(modes[1]['linked_entity_detail']['entity_id'], self.bank.entity_id)
+        self.assertIsNone(modes[2]['linked_entity'])
+
+        wallet = Entity.objects.get(type='WALLET')
+        self.assertEqual(wallet.owner, self.user)
+        self.assertEqual(Payment_Mode.objects.get(app_key='phonepe').linked_entity, wallet)
+        self.assertEqual(len(self.client.get(reverse('payment-mode-list')).data), 3)
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        """
+        Ensure the setup is a fixed number of queries however many apps are set up.
+        """
+        def count(modes):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.setup(modes).status_code, status.HTTP_201_CREATED)
+            return len(queries)
+
+        small = count([{'app_key': 'paytm', 'create_wallet': True}, {'app_key': 'gpay', 'linked_entity': self.bank.pk}])
+        large = count(
+            [{'app_key': app['key'], 'create_wallet': app['supports_wallet']} for app in SUPPORTED_APPS]
+            + [{'app_key': 'card', 'linked_entity': self.bank.pk}] * 3
+        )
+        self.assertEqual(small, large)
+
+    def test_invalid_item_creates_nothing(self):
+        """
+        Ensure one bad item rejects the whole batch with per-item errors.
+        """
+        theirs = Entity.objects.create(owner=self.other, name="Their Bank", type="ACCOUNT")
+        response = self.setup([
+            {'app_key': 'phonepe', 'create_wallet': True},
+            {'app_key': 'gpay', 'linked_entity': theirs.entity_id},
+            {'app_key': 'cash', 'create_wallet': True},
+            {'app_key': 'nope'},
+        ])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data['modes']
+        self.assertEqual(sorted(errors), [2, 3])
+        self.assertIn('non_field_errors', errors[2])
+        self.assertIn('app_key', errors[3])
+        self.assertEqual(Payment_Mode.objects.count(), 0)
+        self.assertFalse(Entity.objects.filter(type='WALLET').exists())
+
+        response = self.setup([{'app_key': 'gpay', 'linked_entity': theirs.entity_id}])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('linked_entity', response.data['modes'][0])
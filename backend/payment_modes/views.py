@@ -2,9 +2,17 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from .models import Payment_Mode, SupportedApp
-from .serializers import PaymentModeSerializer
+from django.conf import settings
+from .models import Payment_Mode
+from .registry import get_registry
+from .serializers import (
+    PaymentModeSerializer,
+    PaymentModeSetupResultSerializer,
+    PaymentModeSetupSerializer,
+    SupportedAppSerializer,
+)
 from .constants import SUPPORTED_APPS
+from users.response_cache import cache_per_user, conditional_per_user, etag_matches
 
 class PaymentModeViewSet(viewsets.ModelViewSet):
     serializer_class = PaymentModeSerializer
@@ -13,17 +21,41 @@ class PaymentModeViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return Payment_Mode.objects.filter(owner=self.request.user)
 
+    @conditional_per_user('payment-modes')
+    @cache_per_user('payment-modes')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     @action(detail=False, methods=['get'])
     def options(self, request):
         """
         Returns the server-defined list of supported payment apps/modes.
+        Served from the registry with an ETag and a long max-age; a matching
+        If-None-Match gets an empty 304.
         """
-        from .models import SupportedApp
-        from .serializers import SupportedAppSerializer
-        
-        apps = SupportedApp.objects.all()
-        serializer = SupportedAppSerializer(apps, many=True)
-        return Response(serializer.data)
+        registry = get_registry()
+        headers = {
+            "ETag": f'W/"{registry.etag}"',
+            "Cache-Control": f"private, max-age={settings.SUPPORTED_APPS_MAX_AGE}",
+        }
+        if etag_matches(request, registry.etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        serializer = SupportedAppSerializer(registry.apps, many=True)
+        return Response(serializer.data, headers=headers)
+
+    @action(detail=False, methods=['post'])
+    def setup(self, request):
+        """
+        Batch Smart Setup: creates several payment modes (and their wallets)
+        in one request. See PaymentModeSetupSerializer.
+        """
+        serializer = PaymentModeSetupSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        modes = serializer.save()
+        return Response(
+            {"payment_modes": PaymentModeSetupResultSerializer(modes, many=True).data},
+            status=status.HTTP_201_CREATED
+        )
 
     @action(detail=True, methods=['post'], url_path='create-wallet')
     def create_wallet(self, request, pk=None):
@@ -34,9 +66,8 @@ class PaymentModeViewSet(viewsets.ModelViewSet):
         payment_mode = self.get_object()
         
         # 1. Check if app supports wallet
-        try:
-            supported_app = SupportedApp.objects.get(key=payment_mode.app_key)
-        except SupportedApp.DoesNotExist:
+        supported_app = get_registry().get(payment_mode.app_key)
+        if supported_app is None:
              return Response(
                 {"error": "This payment mode type is not supported."},
                 status=status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,91 @@
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+
+from .models import SyncChange, SyncCounter
+
+
+def record_changes(changes):
+    """
+    Journal `changes`, an iterable of (user_id, model, object_id, deleted),
+    in the caller's database transaction.
+
+    Every affected user's counter row is locked (in user order, like
+    post_balance_deltas) and advanced by that user's number of changes with a
+    single UPDATE; the changes are then upserted in one statement. The query
+    count does not depend on how many users or objects are involved.
+    """
+    latest = {}
+    for user_id, model, object_id, deleted in changes:
+        if user_id is not None:
+            latest[(user_id, model, object_id)] = deleted
+    if not latest:
+        return
+
+    per_user = {}
+    for user_id, _, _ in latest:
+        per_user[user_id] = per_user.get(user_id, 0) + 1
+    user_ids = sorted(per_user)
+
+    # No savepoint: nothing here recovers from a failed statement, and every
+    # caller is already inside a transaction (a signal's save, the importer).
+    with transaction.atomic(savepoint=False):
+        counters = dict(
+            SyncCounter.objects.select_for_update()
+            .filter(user_id__in=user_ids)
+            .order_by("user_id")
+            .values_list("user_id", "last_seq")
+        )
+        missing = [user_id for user_id in user_ids if user_id not in counters]
+        if missing:
+            SyncCounter.objects.bulk_create([SyncCounter(user_id=user_id) for user_id in missing], ignore_conflicts=True)
+            counters.update(
+                SyncCounter.objects.select_for_update()
+                .filter(user_id__in=missing)
+                .order_by("user_id")
+                .values_list("user_id", "last_seq")
+            )
+        SyncCounter.objects.filter(user_id__in=user_ids).update(
+            last_seq=F("last_seq")
+            + Case(*(When(user_id=user_id, then=Value(count)) for user_id, count in per_user.items()), default=0)
+        )
+
+        rows = []
+        for (user_id, model, object_id), deleted in sorted(latest.items()):
+            counters[user_id] += 1
+            rows.append(
+                SyncChange(user_id=user_id, seq=counters[user_id], model=model, object_id=object_id, deleted=deleted)
+            )
+        SyncChange.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["user", "model", "object_id"],
+            update_fields=["seq", "deleted"],
+        )
+
+
+def transaction_changes(before, after):
+    """
+    Journal entries for a transaction going from stored state `before` to
+    `after` (either may be None): the transaction for everyone who could see
+    it before or can see it now (those who lost it find it missing and are
+    told it was deleted), and the payer/payee entities for their owners when
+    money may have moved.
+    """
+    moved = before is None or after is None or any(
+        getattr(before, field) != getattr(after, field) for field in ("payer_id", "payee_id", "amount", "status", "date")
+    )
+    changes = []
+    for state in (before, after):
+        if state is None:
+            continue
+        deleted = after is None
+        changes += [
+            (state.payer_owner_id, SyncChange.MODEL_TRANSACTION, state.pk, deleted),
+            (state.payee_owner_id, SyncChange.MODEL_TRANSACTION, state.pk, deleted),
+        ]
+        if moved and state.status == "COMPLETED":
+            changes += [
+                (state.payer_owner_id, SyncChange.MODEL_ENTITY, state.payer_id, False),
+                (state.payee_owner_id, SyncChange.MODEL_ENTITY, state.payee_id, False),
+            ]
+    return changes
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+
+def backfill_changes(apps, schema_editor):
+    """Journal everything that already exists, so a first sync downloads it."""
+    SyncChange = apps.get_model("sync", "SyncChange")
+    SyncCounter = apps.get_model("sync", "SyncCounter")
+    Entity = apps.get_model("entities", "Entity")
+    Payment_Mode = apps.get_model("payment_modes", "Payment_Mode")
+    UserConnection = apps.get_model("connections", "UserConnection")
+    Transaction = apps.get_model("core_transaction", "Transaction")
+
+    seen = {}
+    for model, rows in (
+        ("entity", Entity.objects.values_list("owner_id", "pk")),
+        ("payment_mode", Payment_Mode.objects.values_list("owner_id", "pk")),
+        ("connection", UserConnection.objects.values_list("requester_id", "pk")),
+        ("connection", UserConnection.objects.values_list("receiver_id", "pk")),
+        ("transaction", Transaction.objects.values_list("payer_owner_id", "pk")),
+        ("transaction", Transaction.objects.values_list("payee_owner_id", "pk")),
+    ):
+        for user_id, object_id in rows.iterator(chunk_size=5000):
+            seen.setdefault((user_id, model, object_id), None)
+
+    last_seq = {}
+    changes = []
+    for user_id, model, object_id in seen:
+        last_seq[user_id] = last_seq.get(user_id, 0) + 1
+        changes.append(SyncChange(user_id=user_id, seq=last_seq[user_id], model=model, object_id=object_id))
+    SyncChange.objects.bulk_create(changes, batch_size=5000)
+    SyncCounter.objects.bulk_create(
+        [SyncCounter(user_id=user_id, last_seq=seq) for user_id, seq in last_seq.items()], batch_size=5000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sync", "0001_initial"),
+        ("entities", "0005_entity_chat_list_index"),
+        ("payment_modes", "0004_alter_payment_mode_linked_entity"),
+        ("connections", "0001_initial"),
+        ("core_transaction", "0007_chat_summary"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_changes, migrations.RunPython.noop),
+    ]
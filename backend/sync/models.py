@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.db import models
+
+
+class SyncCounter(models.Model):
+    """
+    Per-user change sequence. Writers lock the row while they record changes,
+    so a user's sequence numbers become visible in the order they were
+    assigned and a client never skips a change that commits late.
+    """
+
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True)
+    last_seq = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.last_seq}"
+
+
+class SyncChange(models.Model):
+    """
+    Latest change of one object as seen by one user: the sequence number it
+    was last written at, and whether it is gone (a tombstone). One row per
+    (user, object), so the feed since a token returns each object once.
+    """
+
+    MODEL_ENTITY = "entity"
+    MODEL_PAYMENT_MODE = "payment_mode"
+    MODEL_CONNECTION = "connection"
+    MODEL_TRANSACTION = "transaction"
+
+    MODEL_CHOICES = [
+        (MODEL_ENTITY, "Entity"),
+        (MODEL_PAYMENT_MODE, "Payment mode"),
+        (MODEL_CONNECTION, "Connection"),
+        (MODEL_TRANSACTION, "Transaction"),
+    ]
+
+    change_id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    seq = models.BigIntegerField()
+    model = models.CharField(max_length=20, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "model", "object_id"], name="unique_sync_change_per_object"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "seq"]),
+        ]
+
+    def __str__(self):
+        verb = "deleted" if self.deleted else "changed"
+        return f"{self.user_id}#{self.seq}: {self.model} {self.object_id} {verb}"
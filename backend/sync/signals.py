@@ -0,0 +1,45 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core_transaction.signals import transaction_changed
+
+from .changes import record_changes, transaction_changes
+from .models import SyncChange, SyncCounter
+
+
+@receiver(post_save, sender="entities.Entity")
+@receiver(post_delete, sender="entities.Entity")
+def journal_entity(sender, instance, **kwargs):
+    deleted = kwargs["signal"] is post_delete
+    record_changes([(instance.owner_id, SyncChange.MODEL_ENTITY, instance.pk, deleted)])
+
+
+@receiver(post_save, sender="payment_modes.Payment_Mode")
+@receiver(post_delete, sender="payment_modes.Payment_Mode")
+def journal_payment_mode(sender, instance, **kwargs):
+    deleted = kwargs["signal"] is post_delete
+    record_changes([(instance.owner_id, SyncChange.MODEL_PAYMENT_MODE, instance.pk, deleted)])
+
+
+@receiver(post_save, sender="connections.UserConnection")
+@receiver(post_delete, sender="connections.UserConnection")
+def journal_connection(sender, instance, **kwargs):
+    deleted = kwargs["signal"] is post_delete
+    record_changes(
+        (user_id, SyncChange.MODEL_CONNECTION, instance.pk, deleted)
+        for user_id in (instance.requester_id, instance.receiver_id)
+    )
+
+
+@receiver(transaction_changed)
+def journal_transaction(sender, before, after, **kwargs):
+    record_changes(transaction_changes(before, after))
+
+
+@receiver(post_delete, sender="users.User")
+def drop_journal(sender, instance, **kwargs):
+    # Deleting a user cascades to their entities, connections and
+    # transactions, whose post_delete receivers above journal tombstones for
+    # the user too, after the cascade already removed the user's journal.
+    SyncChange.objects.filter(user_id=instance.pk).delete()
+    SyncCounter.objects.filter(user_id=instance.pk).delete()
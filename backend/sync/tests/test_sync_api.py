@@ -0,0 +1,142 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from connections.models import UserConnection
+from core_transaction.models import Transaction
+from entities.models import Entity
+from payment_modes.models import Payment_Mode
+from sync.models import SyncChange
+from users.models import User
+
+
+class SyncApiTests(TestCase):
+    url = "/api/sync/"
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="sync@example.com", username="sync", password=None)
+        self.friend = User.objects.create_user(email="mate@example.com", username="mate", password=None)
+        self.client.force_authenticate(user=self.user)
+        self.bank = Entity.objects.create(owner=self.user, name="Bank", type="ACCOUNT")
+        self.theirs = Entity.objects.create(owner=self.friend, name="Mate's Bank", type="ACCOUNT")
+
+    def sync(self, since=None, **params):
+        if since is not None:
+            params["since"] = since
+        resp = self.client.get(self.url, params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return resp.data
+
+    def test_full_then_incremental(self):
+        Payment_Mode.objects.create(owner=self.user, name="GPay", app_key="gpay")
+        first = self.sync()
+        self.assertFalse(first["has_more"])
+        self.assertEqual([e["name"] for e in first["entities"]], ["Bank"])
+        self.assertEqual([m["name"] for m in first["payment_modes"]], ["GPay"])
+        self.assertEqual(first["transactions"], [])
+
+        self.assertEqual(self.sync(first["token"])["entities"], [])
+
+        self.bank.name = "Savings"
+        self.bank.save()
+        wallet = Entity.objects.create(owner=self.user, name="Wallet", type="WALLET")
+        delta = self.sync(first["token"])
+        self.assertEqual([e["name"] for e in delta["entities"]], ["Savings", "Wallet"])
+        self.assertEqual(delta["payment_modes"], [])
+
+        wallet_id = wallet.pk
+        wallet.delete()
+        delta = self.sync(delta["token"])
+        self.assertEqual(delta["entities"], [])
+        self.assertEqual(delta["deleted"]["entities"], [wallet_id])
+
+    def test_transactions_reach_both_sides(self):
+        token = self.sync()["token"]
+        friend_token = SyncChange.objects.filter(user=self.friend).order_by("-seq").values_list("seq", flat=True)[0]
+        tx = Transaction.objects.create(
+            payer=self.theirs, payee=self.bank, amount=Decimal("20.00"), date=timezone.now(), status="COMPLETED"
+        )
+        delta = self.sync(token)
+        self.assertEqual([t["transaction_id"] for t in delta["transactions"]], [tx.pk])
+        self.assertEqual([e["current_balance"] for e in delta["entities"]], ["20.00"])
+
+        self.client.force_authenticate(user=self.friend)
+        delta = self.sync(friend_token)
+        self.assertEqual([t["transaction_id"] for t in delta["transactions"]], [tx.pk])
+
+    def test_transaction_moved_away_is_reported_deleted(self):
+        other = User.objects.create_user(email="other@example.com", username="other", password=None)
+        elsewhere = Entity.objects.create(owner=other, name="Elsewhere", type="ACCOUNT")
+        tx = Transaction.objects.create(payer=self.theirs, payee=self.bank, amount=Decimal("5.00"), date=timezone.now())
+        token = self.sync()["token"]
+        tx.payee = elsewhere
+        tx.save()
+        delta = self.sync(token)
+        self.assertEqual(delta["transactions"], [])
+        self.assertEqual(delta["deleted"]["transactions"], [tx.pk])
+
+    def test_connections_are_journaled_for_both_users(self):
+        token = self.sync()["token"]
+        link = UserConnection.objects.create(requester=self.friend, receiver=self.user)
+        delta = self.sync(token)
+        self.assertEqual([c["connection_id"] for c in delta["connections"]], [link.pk])
+        link_id = link.pk
+        link.delete()
+        self.assertEqual(self.sync(delta["token"])["deleted"]["connections"], [link_id])
+
+    def test_pages_follow_the_token(self):
+        for i in range(4):
+            Entity.objects.create(owner=self.user, name=f"Wallet {i}", type="WALLET")
+        names, token, pages = [], None, 0
+        while True:
+            page = self.sync(token, limit=2)
+            names += [e["name"] for e in page["entities"]]
+            token, pages = page["token"], pages + 1
+            if not page["has_more"]:
+                break
+        self.assertEqual(pages, 3)
+        self.assertEqual(names, ["Bank"] + [f"Wallet {i}" for i in range(4)])
+
+    def test_invalid_token_is_rejected(self):
+        for since in ("abc", "-1"):
+            resp = self.client.get(self.url, {"since": since})
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("detail", resp.data)
+
+    def test_query_count_does_not_grow_with_changes(self):
+        def queries():
+            with CaptureQueriesContext(connection) as captured:
+                self.sync()
+            return len(captured)
+
+        UserConnection.objects.create(requester=self.friend, receiver=self.user)
+        Transaction.objects.create(payer=self.theirs, payee=self.bank, amount=Decimal("1.00"), date=timezone.now())
+        baseline = queries()
+        for i in range(5):
+            Entity.objects.create(owner=self.user, name=f"Wallet {i}", type="WALLET")
+            pal = User.objects.create_user(email=f"pal{i}@example.com", username=f"pal{i}", password=None)
+            UserConnection.objects.create(requester=pal, receiver=self.user)
+            Transaction.objects.create(payer=self.theirs, payee=self.bank, amount=Decimal("1.00"), date=timezone.now())
+        self.assertEqual(queries(), baseline)
+
+    def test_bulk_import_is_journaled(self):
+        token = self.sync()["token"]
+        shop = Entity.objects.create(owner=self.user, name="Shop", type="ACCOUNT")
+        row = {"payer": self.bank.pk, "payee": shop.pk, "amount": "10.00", "date": "2025-01-15T10:00:00Z"}
+        resp = self.client.post("/api/transactions/bulk/", [row, row], format="json")
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        delta = self.sync(token)
+        self.assertEqual(len(delta["transactions"]), 2)
+
+    def test_deleting_a_user_drops_their_journal_and_leaves_tombstones(self):
+        tx = Transaction.objects.create(payer=self.theirs, payee=self.bank, amount=Decimal("5.00"), date=timezone.now())
+        friend_id = self.friend.pk
+        self.friend.delete()
+        self.assertFalse(SyncChange.objects.filter(user_id=friend_id).exists())
+        self.assertEqual(self.sync()["deleted"]["transactions"], [tx.pk])
@@ -0,0 +1,85 @@
+from django.conf import settings
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from connections.models import UserConnection
+from connections.serializers import UserConnectionListSerializer
+from core_transaction.models import Transaction
+from core_transaction.serializers import TransactionSerializer
+from entities.models import Entity
+from entities.serializers import EntitySerializer
+from payment_modes.models import Payment_Mode
+from payment_modes.serializers import PaymentModeSerializer
+
+from .models import SyncChange
+
+# Response key, queryset of what the user may see, serializer, per journal model.
+RESOURCES = {
+    SyncChange.MODEL_ENTITY: (
+        "entities",
+        lambda user: Entity.objects.filter(owner=user),
+        EntitySerializer,
+    ),
+    SyncChange.MODEL_PAYMENT_MODE: (
+        "payment_modes",
+        lambda user: Payment_Mode.objects.filter(owner=user),
+        PaymentModeSerializer,
+    ),
+    SyncChange.MODEL_CONNECTION: (
+        "connections",
+        lambda user: UserConnection.objects.involving(user).select_related("requester", "receiver"),
+        UserConnectionListSerializer,
+    ),
+    SyncChange.MODEL_TRANSACTION: (
+        "transactions",
+        lambda user: Transaction.objects.for_display().visible_to(user),
+        TransactionSerializer,
+    ),
+}
+
+
+class SyncView(APIView):
+    """
+    Everything that changed for the current user since `?since=<token>`
+    (omit it for a full download): current versions of created/updated
+    entities, payment modes, connections and transactions, and the ids of
+    deleted ones (or ones the user can no longer see). Follow with the
+    returned token until `has_more` is false.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            since = int(request.query_params.get("since") or 0)
+            if since < 0:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"detail": "`since` must be a token returned by a previous sync."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = min(int(request.query_params["limit"]), settings.SYNC_MAX_PAGE_SIZE)
+        except (KeyError, ValueError):
+            limit = settings.SYNC_PAGE_SIZE
+        limit = max(limit, 1)
+
+        changes = list(
+            SyncChange.objects.filter(user=request.user, seq__gt=since)
+            .order_by("seq")
+            .values_list("seq", "model", "object_id", "deleted")[: limit + 1]
+        )
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        payload = {"token": str(changes[-1][0] if changes else since), "has_more": has_more}
+        deleted = {}
+        for model, (key, visible_to, serializer_class) in RESOURCES.items():
+            wanted = {object_id for _, kind, object_id, gone in changes if kind == model and not gone}
+            gone = {object_id for _, kind, object_id, is_gone in changes if kind == model and is_gone}
+            rows = list(visible_to(request.user).filter(pk__in=wanted).order_by("pk")) if wanted else []
+            payload[key] = serializer_class(rows, many=True, context={"request": request}).data
+            deleted[key] = sorted(gone | (wanted - {row.pk for row in rows}))
+        payload["deleted"] = deleted
+        return Response(payload)
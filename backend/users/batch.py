@@ -0,0 +1,28 @@
+"""
+The shape shared by the batch accept/reject endpoints
+(POST /api/connections/batch/ and POST /api/transactions/batch/): the
+request body, and the per-id outcomes reported besides the new status.
+"""
+
+from rest_framework import serializers
+
+NOT_FOUND = "not_found"
+FORBIDDEN = "forbidden"
+NOT_PENDING = "not_pending"
+
+
+class BatchDecisionSerializer(serializers.Serializer):
+    """Ids to accept and ids to reject in one call (connections or pending transactions)."""
+
+    MAX_IDS = 500
+
+    accept = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, max_length=MAX_IDS)
+    reject = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, max_length=MAX_IDS)
+
+    def validate(self, attrs):
+        accept, reject = set(attrs.get("accept", [])), set(attrs.get("reject", []))
+        if not accept and not reject:
+            raise serializers.ValidationError("Send at least one id to accept or reject.")
+        if accept & reject:
+            raise serializers.ValidationError(f"Ids both accepted and rejected: {sorted(accept & reject)}.")
+        return {"accept": sorted(accept), "reject": sorted(reject)}
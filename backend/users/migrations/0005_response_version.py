@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:04
+
+import time
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_versions(apps, schema_editor):
+    """A version row for every existing user, time-based like start_version()."""
+    User = apps.get_model("users", "User")
+    ResponseVersion = apps.get_model("users", "ResponseVersion")
+    version = time.time_ns()
+    ResponseVersion.objects.bulk_create(
+        (ResponseVersion(user_id=user_id, version=version) for user_id in User.objects.values_list("pk", flat=True)),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0004_default_categories_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResponseVersion",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("version", models.BigIntegerField()),
+            ],
+        ),
+        migrations.RunPython(create_versions, migrations.RunPython.noop),
+    ]
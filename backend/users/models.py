@@ -37,6 +37,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     date_joined = models.DateTimeField(default=timezone.now)
+    # Version of entities.defaults.DEFAULT_CATEGORIES applied to this user.
+    default_categories_version = models.PositiveSmallIntegerField(default=0, editable=False)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username"]
@@ -45,3 +47,17 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     def __str__(self):
         return self.email
+
+
+class ResponseVersion(models.Model):
+    """
+    Per-user version of everything the user's cached GET responses and ETags
+    are derived from (see users/response_cache.py). It lives in the database
+    so every worker sees a bump as soon as the write that caused it commits.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="+")
+    version = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.user_id}: {self.version}"
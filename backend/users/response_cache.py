@@ -0,0 +1,164 @@
+"""
+Per-user response cache and conditional GETs.
+
+Every user has a version number, a ResponseVersion row. Cached GET
+payloads are stored under that version, so bumping it (on any write that
+could change what the user sees, see users/signals.py) invalidates all of
+the user's cached responses at once without tracking individual keys.
+The same version yields ETags that are checked with one primary-key lookup
+before any other query runs. The version is read and bumped in the
+database, inside the writer's transaction, so every worker sees a bump
+as soon as the write commits, whichever process made it. The payload
+backend is whatever CACHES["responses"] is configured as.
+"""
+
+import hashlib
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import ResponseVersion
+
+CACHE_ALIAS = "responses"
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def fresh_version():
+    # Not 1: if a user id is reused, payloads cached for its previous owner
+    # must not become reachable again.
+    return time.time_ns()
+
+
+def start_version(user_id):
+    """Give a new user their version row (see users/signals.py)."""
+    ResponseVersion.objects.create(user_id=user_id, version=fresh_version())
+
+
+def get_version(user_id):
+    version = ResponseVersion.objects.filter(user_id=user_id).values_list("version", flat=True).first()
+    return 0 if version is None else version
+
+
+def request_version(request):
+    """The requesting user's version, read once per request."""
+    if not hasattr(request, "_response_version"):
+        request._response_version = get_version(request.user.pk)
+    return request._response_version
+
+
+def bump_versions(*user_ids):
+    """
+    Invalidate the cached responses of `user_ids` with one UPDATE in the
+    caller's transaction: other requests see the new version exactly when
+    they can see the write.
+    """
+    user_ids = sorted({user_id for user_id in user_ids if user_id is not None})
+    if not user_ids:
+        return
+    ResponseVersion.objects.filter(user_id__in=user_ids).update(version=F("version") + 1)
+
+
+def record(name, outcome):
+    with _stats_lock:
+        _stats[(name, outcome)] += 1
+
+
+def stats():
+    """Hit/miss counters of this process, per cached view: {name: {"hits", "misses"}}."""
+    with _stats_lock:
+        snapshot = dict(_stats)
+    names = sorted({name for name, _ in snapshot})
+    return {name: {"hits": snapshot.get((name, "hit"), 0), "misses": snapshot.get((name, "miss"), 0)} for name in names}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def _request_key(request, name):
+    """Version-scoped key of one GET: user, view name and full path (query string included)."""
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f"user:{request.user.pk}:{request_version(request)}:{name}:{path}"
+
+
+def cache_per_user(name):
+    """
+    Cache the 200 responses of a GET view method per user, query string and
+    version. Responses carry an `X-Cache: HIT|MISS` header.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method != "GET" or not request.user.is_authenticated:
+                return method(self, request, *args, **kwargs)
+
+            key = _request_key(request, name)
+            cache = get_cache()
+            data = cache.get(key)
+            if data is not None:
+                record(name, "hit")
+                return Response(data, headers={"X-Cache": "HIT"})
+
+            record(name, "miss")
+            response = method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
+            response["X-Cache"] = "MISS"
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def etag_matches(request, tag):
+    """Whether the request's If-None-Match covers the ETag with opaque value `tag` (weak comparison)."""
+    candidates = {etag.removeprefix("W/") for etag in parse_etags(request.headers.get("If-None-Match", ""))}
+    return f'"{tag}"' in candidates or "*" in candidates
+
+
+def conditional_per_user(name):
+    """
+    Conditional GET for a view method: the ETag is derived from the user's
+    version, so it is known after one primary-key lookup, and a matching
+    If-None-Match gets an empty 304 without running the view or the
+    serializer. Apply outside cache_per_user.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method != "GET" or not request.user.is_authenticated:
+                return method(self, request, *args, **kwargs)
+
+            # The rendered body depends on the negotiated format too.
+            tag = hashlib.md5(f"{_request_key(request, name)}:{request.accepted_renderer.format}".encode()).hexdigest()
+            headers = {"ETag": f'W/"{tag}"', "Cache-Control": "private, no-cache"}
+            if etag_matches(request, tag):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+            response = method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                for header, value in headers.items():
+                    response[header] = value
+            return response
+
+        return wrapper
+
+    return decorator
@@ -1,5 +1,8 @@
+from django.db import transaction
 from rest_framework import serializers
 
+from entities.defaults import seed_default_categories
+
 from .models import User
 
 
@@ -36,5 +39,7 @@ class UserSerializer(serializers.ModelSerializer):
         return value
 
     def create(self, validated_data):
-        user = User.objects.create_user(**validated_data)
+        with transaction.atomic():
+            user = User.objects.create_user(**validated_data)
+            seed_default_categories([user])
         return user
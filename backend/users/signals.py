@@ -0,0 +1,54 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import User
+from .response_cache import bump_versions, start_version
+
+# Writes that change what a user's cached responses (entities, payment modes,
+# chat list, profile) would contain. Senders are lazy references so this app
+# does not import the others.
+
+
+def connected_users(user_id):
+    from connections.models import UserConnection
+
+    pairs = UserConnection.objects.involving(user_id).values_list("low_user_id", "high_user_id")
+    return [other for pair in pairs for other in pair if other != user_id]
+
+
+@receiver(post_save, sender="payment_modes.Payment_Mode")
+@receiver(post_delete, sender="payment_modes.Payment_Mode")
+def invalidate_owner(sender, instance, **kwargs):
+    bump_versions(instance.owner_id)
+
+
+@receiver(post_save, sender="entities.Entity")
+@receiver(post_delete, sender="entities.Entity")
+def invalidate_entity(sender, instance, **kwargs):
+    # Friends see the entity inside shared transactions (transaction feed ETags).
+    bump_versions(instance.owner_id, *connected_users(instance.owner_id))
+
+
+@receiver(post_save, sender="connections.UserConnection")
+@receiver(post_delete, sender="connections.UserConnection")
+def invalidate_connection(sender, instance, **kwargs):
+    bump_versions(instance.requester_id, instance.receiver_id)
+
+
+@receiver(post_save, sender="core_transaction.Transaction")
+@receiver(post_delete, sender="core_transaction.Transaction")
+def invalidate_transaction(sender, instance, **kwargs):
+    # Balances and chat summaries of both sides move with the transaction.
+    bump_versions(instance.payer_owner_id, instance.payee_owner_id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        # Start a fresh namespace, in case a deleted user's id is reused.
+        start_version(instance.pk)
+        return
+    if update_fields == frozenset(["last_login"]):
+        return
+    # The user's name and status also appear in their friends' chat lists.
+    bump_versions(instance.pk, *connected_users(instance.pk))
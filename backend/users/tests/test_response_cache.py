@@ -0,0 +1,165 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from connections.models import UserConnection
+from core_transaction.models import Transaction
+from entities.models import Entity
+from payment_modes.models import Payment_Mode
+from users import response_cache
+from users.models import ResponseVersion, User
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="cache@example.com", username="cache", password=None)
+        self.friend = User.objects.create_user(email="friend@example.com", username="friend", password=None)
+        self.client.force_authenticate(user=self.user)
+        response_cache.reset_stats()
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return resp, len(queries)
+
+    def test_second_read_is_served_from_cache(self):
+        Entity.objects.create(owner=self.user, name="Bank", type="ACCOUNT")
+        first, _ = self.get("/api/entities/")
+        second, queries = self.get("/api/entities/")
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(queries, 1)  # the response version
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(response_cache.stats()["entities"], {"hits": 1, "misses": 1})
+
+    def test_stats_endpoint_is_for_staff_only(self):
+        self.get("/api/entities/")
+        self.get("/api/entities/")
+        self.assertEqual(self.client.get("/api/users/cache-stats/").status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        resp = self.client.get("/api/users/cache-stats/")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["entities"], {"hits": 1, "misses": 1})
+
+    def test_writes_invalidate_the_owner(self):
+        self.get("/api/entities/")
+        Entity.objects.create(owner=self.user, name="Wallet", type="WALLET")
+        resp, _ = self.get("/api/entities/")
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual([e["name"] for e in resp.data], ["Wallet"])
+
+        self.get("/api/payment-modes/")
+        Payment_Mode.objects.create(owner=self.user, name="GPay", app_key="gpay")
+        resp, _ = self.get("/api/payment-modes/")
+        self.assertEqual(len(resp.data), 1)
+
+    def test_other_users_transaction_invalidates_both_sides(self):
+        mine = Entity.objects.create(owner=self.user, name="Bank", type="ACCOUNT")
+        theirs = Entity.objects.create(owner=self.friend, name="Their Bank", type="ACCOUNT", current_balance=50)
+        self.get("/api/entities/")
+        Transaction.objects.create(
+            payer=theirs, payee=mine, amount=Decimal("20.00"), date=timezone.now(), status="COMPLETED"
+        )
+        resp, _ = self.get("/api/entities/")
+        self.assertEqual(resp.data[0]["current_balance"], "20.00")
+
+    def test_connection_and_profile_changes_invalidate_chat_list(self):
+        self.assertEqual(self.get("/api/chat-list/")[0].data["results"], [])
+        connection_ = UserConnection.objects.create(requester=self.friend, receiver=self.user)
+        connection_.status = "accepted"
+        connection_.save()
+        self.assertEqual([c["name"] for c in self.get("/api/chat-list/")[0].data["results"]], ["friend"])
+
+        self.friend.first_name = "Fiona"
+        self.friend.save()
+        self.assertEqual([c["name"] for c in self.get("/api/chat-list/")[0].data["results"]], ["Fiona"])
+
+    def test_profile_update_is_visible(self):
+        self.get("/api/users/me/")
+        resp = self.client.patch("/api/users/me/", {"first_name": "Cached"}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        resp, _ = self.get("/api/users/me/")
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(resp.data["first_name"], "Cached")
+
+    def test_users_do_not_share_entries(self):
+        Entity.objects.create(owner=self.user, name="Mine", type="ACCOUNT")
+        self.get("/api/entities/")
+        self.client.force_authenticate(user=self.friend)
+        resp, _ = self.get("/api/entities/")
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(resp.data, [])
+
+    def test_version_lives_in_the_database(self):
+        version = response_cache.get_version(self.user.pk)
+        Entity.objects.create(owner=self.user, name="Bank", type="ACCOUNT")
+        # Another worker's local cache knows nothing of the write.
+        response_cache.get_cache().clear()
+        self.assertEqual(response_cache.get_version(self.user.pk), version + 1)
+        self.assertEqual(ResponseVersion.objects.get(user=self.user).version, version + 1)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="etag@example.com", username="etag", password=None)
+        self.friend = User.objects.create_user(email="pal@example.com", username="pal", password=None)
+        self.client.force_authenticate(user=self.user)
+        self.bank = Entity.objects.create(owner=self.user, name="Bank", type="ACCOUNT")
+
+    def test_matching_etag_gets_empty_304_after_the_version_lookup(self):
+        for url in ("/api/entities/", "/api/chat-list/", "/api/payment-modes/", "/api/transactions/"):
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                self.assertEqual(first.status_code, status.HTTP_200_OK)
+                self.assertTrue(first["ETag"].startswith('W/"'))
+                with CaptureQueriesContext(connection) as queries:
+                    again = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+                self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+                self.assertEqual(again.content, b"")
+                self.assertEqual(len(queries), 1)
+                self.assertIn("users_responseversion", queries[0]["sql"])
+                self.assertEqual(again["ETag"], first["ETag"])
+
+    def test_etag_changes_with_data_and_query_string(self):
+        first = self.client.get("/api/transactions/")
+        self.assertNotEqual(self.client.get("/api/transactions/", {"page_size": 5})["ETag"], first["ETag"])
+
+        theirs = Entity.objects.create(owner=self.friend, name="Pal's Bank", type="ACCOUNT")
+        Transaction.objects.create(payer=theirs, payee=self.bank, amount=Decimal("5.00"), date=timezone.now())
+        resp = self.client.get("/api/transactions/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(resp.data["results"]), 1)
+        self.assertNotEqual(resp["ETag"], first["ETag"])
+
+    def test_friend_renaming_a_shared_entity_changes_the_feed_etag(self):
+        UserConnection.objects.create(requester=self.user, receiver=self.friend, status="accepted")
+        theirs = Entity.objects.create(owner=self.friend, name="Pal's Bank", type="ACCOUNT")
+        Transaction.objects.create(payer=theirs, payee=self.bank, amount=Decimal("5.00"), date=timezone.now())
+        etag = self.client.get("/api/transactions/")["ETag"]
+        theirs.name = "Pal's Savings"
+        theirs.save()
+        resp = self.client.get("/api/transactions/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["results"][0]["payer"]["name"], "Pal's Savings")
+
+    def test_etag_survives_losing_the_local_cache_but_not_a_write(self):
+        etag = self.client.get("/api/entities/")["ETag"]
+        response_cache.get_cache().clear()
+        self.assertEqual(self.client.get("/api/entities/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # A write made by another worker: only the database knows about it.
+        Entity.objects.filter(pk=self.bank.pk).update(name="Savings")
+        response_cache.bump_versions(self.user.pk)
+        response_cache.get_cache().clear()
+        resp = self.client.get("/api/entities/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data[0]["name"], "Savings")
@@ -1,10 +1,12 @@
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
 from .models import User
 from .permissions import IsAdminOrSelf
+from . import response_cache
+from .response_cache import cache_per_user
 from .serializers import UserSerializer
 
 
@@ -16,12 +18,15 @@ class UserViewSet(viewsets.ModelViewSet):
     def get_permissions(self):
         if self.action in ["create"]:
             return [AllowAny()]
+        if self.action == "cache_stats":
+            return [IsAdminUser()]
         return [IsAuthenticated()]
 
     def list(self, request, *args, **kwargs):
         return Response({"detail": "Listing all users is not permitted."}, status=status.HTTP_403_FORBIDDEN)
 
     @action(detail=False, methods=["get", "patch"], url_path="me")
+    @cache_per_user("me")
     def me(self, request):
         """Retrieve or update current user's profile."""
         user = request.user
@@ -33,3 +38,8 @@ class UserViewSet(viewsets.ModelViewSet):
             serializer.is_valid(raise_exception=True)
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"], url_path="cache-stats")
+    def cache_stats(self, request):
+        """Hit/miss counters of the response cache in the worker that serves this request."""
+        return Response(response_cache.stats())
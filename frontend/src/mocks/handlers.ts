@@ -21,7 +21,12 @@ export const handlers = [
 
 	// Mock for: GET /api/connections/
 	http.get(`${API_BASE_URL}connections/`, () => {
-		return HttpResponse.json([]);
+		return HttpResponse.json({ next: null, results: [] });
+	}),
+
+	// Mock for: GET /api/connections/summary/
+	http.get(`${API_BASE_URL}connections/summary/`, () => {
+		return HttpResponse.json({ total: 0, pending: 0, accepted: 0, rejected: 0 });
 	}),
 
 	// Mock for: POST /api/connections/
@@ -1,7 +1,9 @@
 import { fireEvent, render, screen } from "@testing-library/react";
 import { BrowserRouter } from "react-router-dom";
+import { http, HttpResponse } from "msw";
 import { describe, expect, it } from "vitest";
 import { AuthProvider } from "../context/AuthContext";
+import { server } from "../mocks/server";
 import Connections from "./Connections";
 
 // Helper function to render with necessary providers
@@ -62,4 +64,26 @@ describe("Connections Page", () => {
 		// Wait for the error message
 		expect(await screen.findByText("User not found.")).toBeInTheDocument();
 	});
+
+	it("should load the next page of connections", async () => {
+		const API_URL = "http://127.0.0.1:8000/api";
+		server.use(
+			http.get(`${API_URL}/connections/`, ({ request }) => {
+				const cursor = new URL(request.url).searchParams.get("cursor");
+				const connection_id = cursor ? 2 : 1;
+				return HttpResponse.json({
+					next: cursor ? null : `${API_URL}/connections/?cursor=abc`,
+					results: [{ connection_id, requester: 99, receiver: connection_id + 10, status: "accepted" }],
+				});
+			}),
+		);
+		renderConnections();
+
+		expect(await screen.findByText("User #11")).toBeInTheDocument();
+		fireEvent.click(screen.getByRole("button", { name: "Load more" }));
+
+		expect(await screen.findByText("User #12")).toBeInTheDocument();
+		expect(screen.getByText("User #11")).toBeInTheDocument();
+		expect(screen.queryByRole("button", { name: "Load more" })).not.toBeInTheDocument();
+	});
 });
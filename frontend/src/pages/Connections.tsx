@@ -19,6 +19,8 @@ export default function Connections() {
 	const [username, setUsername] = useState("");
 	const [message, setMessage] = useState("");
 	const [loading, setLoading] = useState(true);
+	const [loadingMore, setLoadingMore] = useState(false);
+	const [next, setNext] = useState<string | null>(null);
 
 	const [error, setError] = useState("");
 	const [success, setSuccess] = useState("");
@@ -26,12 +28,28 @@ export default function Connections() {
 	const fetchConnections = async () => {
 		try {
 			const res = await api.get("connections/");
-			setConnections(res.data);
+			setConnections(res.data.results);
+			setNext(res.data.next);
 		} finally {
 			setLoading(false);
 		}
 	};
 
+	const loadMore = async () => {
+		if (!next) return;
+		try {
+			setLoadingMore(true);
+			// `next` is an absolute URL carrying the cursor of the last row shown.
+			const res = await api.get(next);
+			setConnections((current) => [...current, ...res.data.results]);
+			setNext(res.data.next);
+		} catch (err) {
+			console.error(err);
+		} finally {
+			setLoadingMore(false);
+		}
+	};
+
 	useEffect(() => {
 		fetchConnections();
 	}, []);
@@ -164,6 +182,14 @@ export default function Connections() {
 						})}
 					</ul>
 				)}
+
+				{next && (
+					<div className="flex justify-center mt-4">
+						<button onClick={loadMore} disabled={loadingMore} className="btn btn-outline">
+							{loadingMore ? "Loading..." : "Load more"}
+						</button>
+					</div>
+				)}
 			</div>
 		</div>
 	);
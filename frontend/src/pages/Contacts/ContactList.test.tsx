@@ -16,7 +16,7 @@ describe("ContactList Component", () => {
 		// Mock the API response
 		server.use(
 			http.get(`${API_URL}/chat-list/`, () => {
-				return HttpResponse.json([
+				return HttpResponse.json({ next: null, results: [
 					{
 						id: "conn_1",
 						name: "John Doe",
@@ -35,7 +35,7 @@ describe("ContactList Component", () => {
 						last_message: null,
 						updated_at: "2023-01-02T12:00:00Z"
 					}
-				]);
+				] });
 			})
 		);
 
@@ -52,7 +52,7 @@ describe("ContactList Component", () => {
 		
 		server.use(
 			http.get(`${API_URL}/chat-list/`, () => {
-				return HttpResponse.json([
+				return HttpResponse.json({ next: null, results: [
 					{
 						id: "conn_1",
 						name: "John Doe",
@@ -62,7 +62,7 @@ describe("ContactList Component", () => {
 						last_message: "Hello",
 						updated_at: "2023-01-01T12:00:00Z"
 					}
-				]);
+				] });
 			})
 		);
 
@@ -76,6 +76,30 @@ describe("ContactList Component", () => {
 		expect(onSelect).toHaveBeenCalledWith("conn_1");
 	});
 
+	it("should load the next page of chats", async () => {
+		server.use(
+			http.get(`${API_URL}/chat-list/`, ({ request }) => {
+				const cursor = new URL(request.url).searchParams.get("cursor");
+				const name = cursor ? "Older Chat" : "Newer Chat";
+				return HttpResponse.json({
+					next: cursor ? null : `${API_URL}/chat-list/?cursor=abc`,
+					results: [
+						{ id: name, name, type: "ENTITY", status: null, avatar: null, last_message: null, updated_at: "2023-01-01T12:00:00Z" },
+					],
+				});
+			})
+		);
+
+		render(<ContactList onSelect={vi.fn()} selected={null} />);
+
+		expect(await screen.findByText("Newer Chat")).toBeInTheDocument();
+		fireEvent.click(screen.getByRole("button", { name: "Load more" }));
+
+		expect(await screen.findByText("Older Chat")).toBeInTheDocument();
+		expect(screen.getByText("Newer Chat")).toBeInTheDocument();
+		expect(screen.queryByRole("button", { name: "Load more" })).not.toBeInTheDocument();
+	});
+
 	it("should handle error state", async () => {
 		server.use(
 			http.get(`${API_URL}/chat-list/`, () => {
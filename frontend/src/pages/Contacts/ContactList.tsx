@@ -21,12 +21,15 @@ export default function ContactList({ onSelect, selected }: ContactListProps) {
 	const [contacts, setContacts] = useState<ChatListItem[]>([]);
 	const [loading, setLoading] = useState(true);
 	const [error, setError] = useState<string | null>(null);
+	const [loadingMore, setLoadingMore] = useState(false);
+	const [next, setNext] = useState<string | null>(null);
 
 	useEffect(() => {
 		api
 			.get("chat-list/")
 			.then((res) => {
-				setContacts(res.data);
+				setContacts(res.data.results);
+				setNext(res.data.next);
 				setLoading(false);
 			})
 			.catch((err) => {
@@ -36,6 +39,21 @@ export default function ContactList({ onSelect, selected }: ContactListProps) {
 			});
 	}, []);
 
+	const loadMore = async () => {
+		if (!next) return;
+		try {
+			setLoadingMore(true);
+			// `next` is an absolute URL carrying the cursor of the last row shown.
+			const res = await api.get(next);
+			setContacts((current) => [...current, ...res.data.results]);
+			setNext(res.data.next);
+		} catch (err) {
+			console.error("Failed to fetch more chats", err);
+		} finally {
+			setLoadingMore(false);
+		}
+	};
+
 	return (
 		<div className="h-full flex flex-col">
 			{/* HEADER & ACTIONS */}
@@ -85,6 +103,14 @@ export default function ContactList({ onSelect, selected }: ContactListProps) {
 						</div>
 					</div>
 				))}
+
+				{next && (
+					<div className="flex justify-center p-4">
+						<button onClick={loadMore} disabled={loadingMore} className="btn btn-outline">
+							{loadingMore ? "Loading..." : "Load more"}
+						</button>
+					</div>
+				)}
 			</div>
 		</div>
 	);
@@ -30,14 +30,14 @@ export default function Dashboard() {
 	useEffect(() => {
 		const fetchSummary = async () => {
 			try {
-				const res = await api.get("connections/");
+				const res = await api.get("connections/summary/");
 				const data = res.data;
 
 				setSummary({
-					totalConnections: data.length,
-					pendingRequests: data.filter((c: any) => c.status === "pending").length,
-					acceptedConnections: data.filter((c: any) => c.status === "accepted").length,
-					rejectedConnections: data.filter((c: any) => c.status === "rejected").length,
+					totalConnections: data.total,
+					pendingRequests: data.pending,
+					acceptedConnections: data.accepted,
+					rejectedConnections: data.rejected,
 				});
 			} catch (err) {
 				console.error("Failed to load connections", err);
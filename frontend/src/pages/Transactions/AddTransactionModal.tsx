@@ -41,7 +41,7 @@ const AddTransactionModal: React.FC<AddTransactionModalProps> = ({ onClose, onSu
     try {
       const [entitiesRes, chatListRes] = await Promise.all([
         api.get('/entities/'),
-        api.get('/chat-list/')
+        api.get('/chat-list/', { params: { page_size: 500 } })
       ]);
 
       const entities: Entity[] = entitiesRes.data;
@@ -49,7 +49,7 @@ const AddTransactionModal: React.FC<AddTransactionModalProps> = ({ onClose, onSu
       setCategories(entities.filter(e => e.type === 'CATEGORY'));
       
       // Filter chat list for Users only
-      const chatList: ChatItem[] = chatListRes.data;
+      const chatList: ChatItem[] = chatListRes.data.results;
       setConnectedUsers(chatList.filter(c => c.type === 'USER'));
 
     } catch (err) {
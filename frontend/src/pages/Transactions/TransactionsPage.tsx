@@ -19,13 +19,17 @@ interface Transaction {
 const TransactionsPage: React.FC = () => {
   const [transactions, setTransactions] = useState<Transaction[]>([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [next, setNext] = useState<string | null>(null);
   const [isModalOpen, setIsModalOpen] = useState(false);
 
   const fetchTransactions = async () => {
     try {
       setLoading(true);
+      // The feed is keyset-paginated: { next, results }
       const response = await api.get('/transactions/');
-      setTransactions(response.data);
+      setTransactions(response.data.results);
+      setNext(response.data.next);
     } catch (error) {
       console.error("Failed to fetch transactions", error);
     } finally {
@@ -33,6 +37,21 @@ const TransactionsPage: React.FC = () => {
     }
   };
 
+  const loadMore = async () => {
+    if (!next) return;
+    try {
+      setLoadingMore(true);
+      // `next` is an absolute URL carrying the cursor of the last row shown.
+      const response = await api.get(next);
+      setTransactions((current) => [...current, ...response.data.results]);
+      setNext(response.data.next);
+    } catch (error) {
+      console.error("Failed to fetch more transactions", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     fetchTransactions();
   }, []);
@@ -61,7 +80,16 @@ const TransactionsPage: React.FC = () => {
         {loading ? (
           <div className="text-center text-muted mt-10">Loading transactions...</div>
         ) : (
-          <TransactionList transactions={transactions} />
+          <>
+            <TransactionList transactions={transactions} />
+            {next && (
+              <div className="flex justify-center mt-4">
+                <button onClick={loadMore} disabled={loadingMore} className="btn btn-outline">
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </button>
+              </div>
+            )}
+          </>
         )}
       </div>
 